@@ -11,13 +11,15 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
 from pathlib import Path
-from dotenv import load_dotenv
 
-load_dotenv()
+from django.core.exceptions import ImproperlyConfigured
+from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -45,10 +47,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.ConditionalGZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -83,6 +87,138 @@ DATABASES = {
     }
 }
 
+# Chat tables (see core.routers). CHAT_DB_SHARDS=0 keeps them in the default
+# database; 1 moves them to chat.sqlite3 and N > 1 splits them by user id
+# over chat_0.sqlite3 ... chat_{N-1}.sqlite3, so chat inserts stop holding
+# the write lock that logins, sessions and todos wait on. After changing it,
+# run `manage.py migrate --database=<alias>` for every alias in
+# CHAT_DATABASES; existing history is not moved.
+CHAT_DB_SHARDS = int(os.getenv('CHAT_DB_SHARDS', '0'))
+CHAT_DB_DIR = Path(os.getenv('CHAT_DB_DIR', BASE_DIR))
+if CHAT_DB_SHARDS == 1:
+    CHAT_DATABASES = ['chat']
+else:
+    CHAT_DATABASES = [f'chat_{n}' for n in range(CHAT_DB_SHARDS)]
+for alias in CHAT_DATABASES:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': CHAT_DB_DIR / f'{alias}.sqlite3',
+    }
+
+DATABASE_ROUTERS = ['core.routers.ChatDatabaseRouter']
+
+
+# Cache, sessions and auth
+# The default LocMemCache is private to each worker process. Sessions are
+# therefore kept in the database unless CACHE_BACKEND names a shared cache
+# (Redis, Memcached, database), in which case cached_db serves session
+# reads from it. A per-process cache would keep a session that was logged
+# out in one worker alive in the others, so cached_db/cache sessions on
+# LocMemCache refuse to start. SESSION_ENGINE=...signed_cookies skips
+# session storage entirely.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'bb-project'),
+    }
+}
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+SHARED_CACHE = CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if SHARED_CACHE else 'django.contrib.sessions.backends.db',
+)
+if not SHARED_CACHE and SESSION_ENGINE in (
+    'django.contrib.sessions.backends.cached_db', 'django.contrib.sessions.backends.cache',
+):
+    raise ImproperlyConfigured(
+        f"SESSION_ENGINE={SESSION_ENGINE} needs a cache shared by all workers; "
+        f"set CACHE_BACKEND/CACHE_LOCATION or use the db session engine"
+    )
+
+# Seconds a worker may reuse a user object without querying auth_user.
+# Entries are dropped on logout and on save/delete of the user, but only in
+# the process where that happened: after a password change or deactivation
+# in another worker, this worker keeps accepting the user's other sessions
+# for up to this many seconds. 0 disables the cache.
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '60'))
+
+# Login and registration throttles as 'attempts/window seconds', counted in
+# the cache above and checked before any password hashing. Failed logins
+# count per client IP and per username; registrations count per IP.
+# AUTH_TRUSTED_PROXIES is the number of reverse proxies that append to
+# X-Forwarded-For; 0 means REMOTE_ADDR is the client.
+AUTH_THROTTLE_LOGIN_IP = tuple(int(n) for n in os.getenv('AUTH_THROTTLE_LOGIN_IP', '20/300').split('/'))
+AUTH_THROTTLE_LOGIN_USER = tuple(int(n) for n in os.getenv('AUTH_THROTTLE_LOGIN_USER', '10/900').split('/'))
+AUTH_THROTTLE_REGISTER_IP = tuple(int(n) for n in os.getenv('AUTH_THROTTLE_REGISTER_IP', '10/3600').split('/'))
+AUTH_TRUSTED_PROXIES = int(os.getenv('AUTH_TRUSTED_PROXIES', '0'))
+
+
+# Chat context selection
+# 'recency' sends the newest messages that fit the token budget;
+# 'retrieval' sends the last CHAT_RECENT_MESSAGES plus the CHAT_RETRIEVAL_TOP_K
+# most relevant older question/answer pairs from a local BM25 index.
+
+CHAT_CONTEXT_STRATEGY = os.getenv('CHAT_CONTEXT_STRATEGY', 'recency')
+CHAT_RECENT_MESSAGES = int(os.getenv('CHAT_RECENT_MESSAGES', '4'))
+CHAT_RETRIEVAL_TOP_K = int(os.getenv('CHAT_RETRIEVAL_TOP_K', '3'))
+CHAT_RETRIEVAL_MAX_TURNS = int(os.getenv('CHAT_RETRIEVAL_MAX_TURNS', '500'))
+
+# Model routing (core.algorithms.ChatRouter)
+# Each turn is classified locally and sent with its route's model, number of
+# context messages (None = all the context strategy selects) and max_tokens.
+# CHAT_ROUTING=False sends every turn like before: CHAT_MODEL, full context,
+# no output limit.
+
+CHAT_MODEL = os.getenv('CHAT_MODEL', 'gpt-4o-mini')
+CHAT_ROUTING = os.getenv('CHAT_ROUTING', 'True') == 'True'
+CHAT_ROUTES = {
+    # Messages made only of greetings and acknowledgements
+    'small_talk': {'model': os.getenv('CHAT_MODEL_SMALL', CHAT_MODEL), 'context_messages': 2, 'max_tokens': 150},
+    # Ordinary questions and short follow-ups
+    'quick': {'model': CHAT_MODEL, 'context_messages': 6, 'max_tokens': 500},
+    # Plans, comparisons, explanations, long or multi-part messages
+    'detailed': {'model': os.getenv('CHAT_MODEL_LARGE', CHAT_MODEL), 'context_messages': None, 'max_tokens': 1500},
+}
+
+# Cap on in-memory chat contexts per process; least recently used users are
+# evicted and rebuilt from the database on their next message
+CHAT_CONTEXT_MEMORY_LIMIT = int(os.getenv('CHAT_CONTEXT_MEMORY_MB', '64')) * 1024 * 1024
+
+# Most new messages /chat/stats/ folds into the analytics rollups per request
+CHAT_STATS_FOLD_LIMIT = int(os.getenv('CHAT_STATS_FOLD_LIMIT', '20000'))
+
+# Answer chat questions found in the FAQEntry table (filled by
+# `manage.py generate_faq`) without calling the model
+CHAT_FAQ = os.getenv('CHAT_FAQ', 'True') == 'True'
+
+# Import the OpenAI library in the WSGI parent before workers fork
+# (gunicorn --preload, Passenger smart spawning). Off: imported on first chat.
+LLM_PRELOAD = os.getenv('LLM_PRELOAD', 'False') == 'True'
+
+
+# Background tasks (core.tasks)
+# 0 workers runs tasks inline; overflow and shutdown leftovers go to the
+# QueuedTask table and are run by `manage.py run_queued_tasks`.
+
+TASK_RUNNER_WORKERS = int(os.getenv('TASK_RUNNER_WORKERS', '2'))
+TASK_QUEUE_SIZE = int(os.getenv('TASK_QUEUE_SIZE', '200'))
+TASK_SHUTDOWN_TIMEOUT = int(os.getenv('TASK_SHUTDOWN_TIMEOUT', '10'))
+
+
+# Batch calorie API
+# CSV and JSONL bodies stream in chunks, so memory stays flat; rows past the
+# limit get one error record instead of a result. A JSON document (body or
+# .json upload) is parsed whole, so it is refused with 413 over the byte cap.
+
+CALORIE_BATCH_MAX_ROWS = int(os.getenv('CALORIE_BATCH_MAX_ROWS', '100000'))
+CALORIE_BATCH_MAX_JSON_BYTES = int(os.getenv('CALORIE_BATCH_MAX_JSON_BYTES', str(2 * 1024 * 1024)))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -125,6 +261,21 @@ STATICFILES_DIRS = [
     BASE_DIR / 'core' / 'static',
 ]
 
+# collectstatic writes content-hashed copies (style.<hash>.css) plus .gz
+# siblings for text assets; {% static %} resolves to the hashed names
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Serve STATIC_ROOT from the app with far-future cache headers; turn off
+# when the web server (Apache, nginx) maps STATIC_URL itself
+SERVE_STATIC = os.getenv('SERVE_STATIC', 'True') == 'True'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""Admin changelist cost on a large chat_message table: stock vs LargeTableAdmin
+
+Renders the ChatMessage changelist (first page, a date drill-down and a
+role filter) as a superuser with the stock ModelAdmin and with the
+project's admin, reporting wall time, query count and the slowest query.
+Runs against a throwaway test database.
+Usage: python benchmarks/admin_changelist.py [rows]   (default 500,000)
+"""
+import datetime
+import importlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment
+from django.urls import clear_url_caches
+
+from core.admin import ChatMessageAdmin
+from core.models import ChatMessage
+
+TEXT = "Keep your elbow under the ball and follow through on every free throw. " * 3
+USERS = 200
+START = datetime.date(2025, 4, 1)
+URL = '/admin/core/chatmessage/'
+PAGES = [
+    ("first page", URL),
+    ("month drill-down", URL + '?created_at__year=2026&created_at__month=3'),
+    ("role filter", URL + '?role__exact=assistant'),
+]
+
+
+class StockChatMessageAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'role', 'created_at')
+    list_filter = ('role',)
+    date_hierarchy = 'created_at'
+
+
+def populate(rows):
+    users = User.objects.bulk_create([User(username=f'admin-bench-{n}') for n in range(USERS)])
+    user_ids = [user.id for user in users]
+    insert = (
+        'INSERT INTO core_chatmessage (user_id, role, content, raw_content, created_at) '
+        'VALUES (%s, %s, %s, %s, %s)'
+    )
+    with connection.cursor() as cursor:
+        batch = []
+        for i in range(rows):
+            role = 'user' if i % 2 == 0 else 'assistant'
+            # Spread over ~14 months so the hierarchy has something to show
+            created = START + datetime.timedelta(days=i * 420 // rows)
+            batch.append((user_ids[i % USERS], role, TEXT, TEXT, f'{created} 12:00:00'))
+            if len(batch) == 20_000:
+                cursor.executemany(insert, batch)
+                batch = []
+        if batch:
+            cursor.executemany(insert, batch)
+        cursor.execute('ANALYZE')
+
+
+def measure(client, url):
+    reset_queries()
+    start = time.perf_counter()
+    response = client.get(url)
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.status_code
+    queries = connection.queries
+    slowest = max((float(query['time']) for query in queries), default=0.0)
+    return elapsed * 1000, len(queries), slowest * 1000
+
+
+def use_admin(admin_class):
+    admin.site.unregister(ChatMessage)
+    admin.site.register(ChatMessage, admin_class)
+    # Admin views are bound when the URLconf is built
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    setup_test_environment()
+    settings.DEBUG = True  # records connection.queries
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        populate(rows)
+        superuser = User.objects.create_superuser('admin-bench', 'admin@example.com', 'x')
+        client = Client()
+        client.force_login(superuser)
+
+        print("=" * 72)
+        print(f"ADMIN CHANGELIST ({rows} chat messages, {USERS} users)")
+        print("=" * 72)
+        for label, admin_class in [("stock ModelAdmin", StockChatMessageAdmin),
+                                   ("LargeTableAdmin", ChatMessageAdmin)]:
+            use_admin(admin_class)
+            print(label)
+            for page, url in PAGES:
+                client.get(url)  # warm caches
+                ms, count, slowest = measure(client, url)
+                print(f"  {page:18} {ms:8.1f} ms  {count:3d} queries  slowest {slowest:7.1f} ms")
+        print("=" * 72)
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
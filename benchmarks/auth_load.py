@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+"""Sustained bad-login traffic with and without the auth throttles
+
+Serves the app over real HTTP from a threaded WSGI server on a throwaway
+SQLite database. Attacker threads POST wrong passwords to /login/ as fast
+as they can while a few signed-in users keep loading /todo/. Runs three
+rounds: throttles disabled, one attacking IP, and an attacker rotating
+X-Forwarded-For over many addresses against a few victim accounts.
+Reports attacker req/s, the share answered 429, process CPU per attacker
+request and the signed-in users' latency.
+Usage: python benchmarks/auth_load.py [--attackers 8] [--users 4] [--duration 30]
+"""
+import argparse
+import itertools
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+from load_test import PASSWORD, SimUser, Stats, percentile
+
+FORM = {'Content-Type': 'application/x-www-form-urlencoded'}
+UNLIMITED = (0, 60)
+TARGETS = 2  # accounts sprayed in the rotating-IP round
+
+
+def attack(user, deadline, rotate):
+    """Wrong passwords until the deadline; rotate=True forges a new IP each time."""
+    user.request('login_page', 'GET', '/login/')
+    for n in itertools.count():
+        if time.monotonic() >= deadline:
+            break
+        if rotate:
+            username = f'victim{n % TARGETS}'
+            headers = {**FORM, 'X-Forwarded-For': f'10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}'}
+        else:
+            username = f'nobody-{user.username}-{n}'
+            headers = {**FORM, 'X-Forwarded-For': '203.0.113.7'}
+        body = urlencode({'username': username, 'password': 'wrong-password'})
+        user.request('attack', 'POST', '/login/', body, headers)
+
+
+def browse(user, deadline, ip):
+    """A signed-in user loading their todo list back to back."""
+    user.request('login_page', 'GET', '/login/', headers={'X-Forwarded-For': ip})
+    body = urlencode({'username': user.username, 'password': PASSWORD})
+    status, _ = user.request('login', 'POST', '/login/', body, {**FORM, 'X-Forwarded-For': ip})
+    if status != 302:
+        return
+    while time.monotonic() < deadline:
+        user.request('todo', 'GET', '/todo/', headers={'X-Forwarded-For': ip})
+
+
+def run_round(port, args, rotate):
+    stats = Stats()
+    statuses = {}
+    lock = threading.Lock()
+
+    class CountingUser(SimUser):
+        def request(self, label, method, path, body=None, headers=None):
+            status, payload = super().request(label, method, path, body, headers)
+            with lock:
+                statuses[(label, status)] = statuses.get((label, status), 0) + 1
+            return status, payload
+
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=attack, args=(CountingUser('127.0.0.1', port, f'a{i}', stats), deadline, rotate))
+        for i in range(args.attackers)
+    ] + [
+        threading.Thread(target=browse, args=(CountingUser('127.0.0.1', port, f'user{i}', stats), deadline,
+                                              f'198.51.100.{i + 1}'))
+        for i in range(args.users)
+    ]
+    cpu_start, started = time.process_time(), time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed, cpu = time.monotonic() - started, time.process_time() - cpu_start
+
+    attacks = len(stats.samples['attack'])
+    todo = sorted(stats.samples['todo'])
+    return {
+        'attack_rps': attacks / elapsed,
+        'throttled': statuses.get(('attack', 429), 0) / attacks if attacks else 0,
+        'cpu_ms': cpu / attacks * 1000 if attacks else 0,
+        'todo_count': len(todo),
+        'todo_p50': (percentile(todo, 0.5) or 0) * 1000,
+        'todo_p95': (percentile(todo, 0.95) or 0) * 1000,
+        'logins_ok': statuses.get(('login', 302), 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--attackers', type=int, default=8)
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds per round')
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    # One warning per throttled request would drown the report
+    logging.getLogger('core.views').setLevel(logging.ERROR)
+
+    from django.conf import settings
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import override_settings
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    # Threads need a real file; an in-memory test database is per-connection
+    db_dir = tempfile.mkdtemp(prefix='bb-auth-')
+    settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = os.path.join(db_dir, 'auth.sqlite3')
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    server = None
+    try:
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            [User(username=f'user{i}', password=password) for i in range(args.users)]
+            + [User(username=f'victim{i}', password=password) for i in range(TARGETS)]
+        )
+
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler, allow_reuse_address=True)
+        server.daemon_threads = True
+        server.set_app(get_wsgi_application())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+
+        rounds = [
+            ('throttles off', False, {'AUTH_THROTTLE_LOGIN_IP': UNLIMITED, 'AUTH_THROTTLE_LOGIN_USER': UNLIMITED}),
+            ('one IP', False, {}),
+            ('rotating IPs', True, {}),
+        ]
+        print("=" * 78)
+        print(f"AUTH LOAD ({args.attackers} attackers, {args.users} signed-in users, {args.duration:g} s rounds)")
+        print("=" * 78)
+        print(f"{'round':14} {'attack/s':>9} {'429':>6} {'CPU/attack':>11} "
+              f"{'todo reqs':>10} {'todo p50':>9} {'todo p95':>9}")
+        for label, rotate, overrides in rounds:
+            cache.clear()
+            with override_settings(AUTH_TRUSTED_PROXIES=1, **overrides):
+                result = run_round(port, args, rotate)
+            print(f"{label:14} {result['attack_rps']:9.1f} {result['throttled']:6.1%} "
+                  f"{result['cpu_ms']:8.2f} ms {result['todo_count']:10d} "
+                  f"{result['todo_p50']:6.1f} ms {result['todo_p95']:6.1f} ms")
+            if result['logins_ok'] < args.users:
+                print(f"  only {result['logins_ok']} of {args.users} signed-in users got in")
+        print("=" * 78)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""Batch calorie endpoint vs one form POST per player
+
+Sends a roster of generated players (a few rows deliberately invalid) to
+POST /calories/batch/ as CSV and as JSONL, and compares with posting the
+form at /calories/ once per player (timed on a sample, extrapolated).
+Peak Python memory is measured on a second, traced pass.
+Runs against a throwaway test database.
+Usage: python benchmarks/calorie_batch.py [rows] [form_sample]   (default 100,000 and 500)
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment
+
+BAD_EVERY = 97  # one malformed row per this many
+
+
+def roster(count, seed=42):
+    rng = random.Random(seed)
+    activities = ['1.2', '1.375', '1.55', '1.725', 'high']
+    for n in range(count):
+        row = {
+            'id': n + 1,
+            'name': f'Player {n + 1}',
+            'gender': rng.choice(['male', 'female']),
+            'age': str(rng.randint(14, 40)),
+            'height': str(rng.randint(160, 215)),
+            'weight': f'{rng.uniform(55, 130):.1f}',
+            'activity': rng.choice(activities),
+        }
+        if n % BAD_EVERY == BAD_EVERY - 1:
+            row['age'] = 'twenty'
+        yield row
+
+
+def as_csv(rows):
+    header = 'id,name,gender,age,height,weight,activity\n'
+    lines = (
+        f"{r['id']},{r['name']},{r['gender']},{r['age']},{r['height']},{r['weight']},{r['activity']}\n"
+        for r in rows
+    )
+    return (header + ''.join(lines)).encode()
+
+
+def as_jsonl(rows):
+    return ''.join(json.dumps(r) + '\n' for r in rows).encode()
+
+
+def consume(client, body, content_type, trace=False):
+    response = client.post('/calories/batch/?format=jsonl', data=body, content_type=content_type)
+    assert response.status_code == 200, response.status_code
+    # Rows are read and computed while the stream is consumed; starting
+    # here leaves out the test client's own copy of the request body
+    if trace:
+        tracemalloc.start()
+    lines = errors = 0
+    for chunk in response.streaming_content:
+        lines += chunk.count(b'\n')
+        errors += chunk.count(b'"ok":false')
+    peak = 0
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return lines, errors, peak
+
+
+def run_batch(client, body, content_type):
+    start = time.perf_counter()
+    lines, errors, _ = consume(client, body, content_type)
+    elapsed = time.perf_counter() - start
+    # Separate pass: tracemalloc slows allocation-heavy code several times over
+    _, _, peak = consume(client, body, content_type, trace=True)
+    return elapsed, peak / 1024 / 1024, lines, errors
+
+
+def run_forms(client, rows):
+    start = time.perf_counter()
+    for row in rows:
+        client.post('/calories/', {
+            'gender': row['gender'], 'age': row['age'], 'height': row['height'],
+            'weight': row['weight'], 'activity': row['activity'],
+        })
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        user = User.objects.create_user('calorie-bench', password='x')
+        client = Client()
+        client.force_login(user)
+        rows = list(roster(count))
+        csv_body, jsonl_body = as_csv(rows), as_jsonl(rows)
+
+        print("=" * 72)
+        print(f"CALORIE BATCH ({count} rows, 1 in {BAD_EVERY} invalid)")
+        print("=" * 72)
+        for label, body, content_type in [
+            ("batch CSV", csv_body, 'text/csv'),
+            ("batch JSONL", jsonl_body, 'application/x-ndjson'),
+        ]:
+            elapsed, peak_mb, lines, errors = run_batch(client, body, content_type)
+            print(f"{label:14} {elapsed:8.2f} s  {count / elapsed:10.0f} rows/s  "
+                  f"peak {peak_mb:6.1f} MB  ({lines} lines, {errors} errors)")
+
+        elapsed = run_forms(client, rows[:sample])
+        per_row = elapsed / sample
+        print(f"{'form POST':14} {per_row * count:8.2f} s  {1 / per_row:10.0f} rows/s  "
+              f"(extrapolated from {sample} requests)")
+        print("=" * 72)
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""Stress test: concurrent chat turns from the same users keep their order
+
+Many threads post to /chat/ for a handful of users at once (double clicks,
+several tabs). The fake model answers each question by echoing the last
+user message it was sent, after a random delay. Afterwards every user's
+stored history and in-memory context must read question, answer, question,
+answer... with each answer matching its own question.
+Usage: python benchmarks/chat_concurrency.py [threads] [users] [turns_per_thread] [--no-lock]
+"""
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment
+
+from core import llm, tasks, views
+from core.models import ChatMessage
+
+
+def fake_completion(messages, **kwargs):
+    question = messages[-1]['content']
+    time.sleep(random.uniform(0, 0.03))
+    message = SimpleNamespace(content=f"Answer: {question}")
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+FAKE_CLIENT = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=fake_completion)))
+
+
+class NoLock:
+    """Stand-in for KeyedLock showing what happens without per-user serialization."""
+
+    @contextmanager
+    def hold(self, key, timeout=-1):
+        yield
+
+
+def worker(user, turns, statuses, index):
+    client = Client()
+    client.force_login(user)
+    try:
+        for turn in range(turns):
+            response = client.post(
+                '/chat/', json.dumps({'message': f"question {index}.{turn}"}),
+                content_type='application/json'
+            )
+            statuses.append(response.status_code)
+    finally:
+        connections.close_all()
+
+
+def check_pairs(pairs):
+    """Problems in a list of (role, text) that should alternate question/answer."""
+    problems = []
+    for i in range(0, len(pairs) - 1, 2):
+        (role_q, question), (role_a, answer) = pairs[i], pairs[i + 1]
+        if role_q != 'user' or role_a != 'assistant':
+            problems.append(f"roles {role_q}/{role_a} at {i}")
+        elif answer != f"Answer: {question}":
+            problems.append(f"'{answer}' follows '{question}'")
+    return problems
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    threads = int(args[0]) if len(args) > 0 else 32
+    users = int(args[1]) if len(args) > 1 else 4
+    turns = int(args[2]) if len(args) > 2 else 10
+    use_lock = '--no-lock' not in sys.argv
+
+    setup_test_environment()
+    logging.disable(logging.WARNING)  # queue overflow notices are expected here
+    # Threads need a real file; an in-memory test database is per-connection
+    settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = os.path.join(
+        tempfile.mkdtemp(prefix='bb-chat-'), 'chat.sqlite3'
+    )
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        accounts = [User.objects.create_user(f'stress{i}', password='x') for i in range(users)]
+        statuses = []
+        patches = [mock.patch.object(llm, 'get_client', return_value=FAKE_CLIENT)]
+        if not use_lock:
+            patches.append(mock.patch.object(views, 'chat_locks', NoLock()))
+        for patch in patches:
+            patch.start()
+
+        pool = [
+            threading.Thread(target=worker, args=(accounts[i % users], turns, statuses, i))
+            for i in range(threads)
+        ]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        tasks.runner.queue.join()  # answers are saved in the background
+        tasks.run_persisted_tasks()  # ...or persisted when the queue overflowed
+        elapsed = time.perf_counter() - started
+        for patch in patches:
+            patch.stop()
+
+        problems = []
+        for account in accounts:
+            stored = list(
+                ChatMessage.objects.filter(user=account).order_by('seq')
+                .values_list('seq', 'role', 'raw_content')
+            )
+            seqs = [seq for seq, _, _ in stored]
+            if None in seqs or len(set(seqs)) != len(seqs) or seqs != sorted(seqs):
+                problems.append(f"{account.username}: sequence numbers not unique/monotonic")
+            problems += [f"{account.username} db: {p}" for p in check_pairs([row[1:] for row in stored])]
+
+            memory = [(m['role'], m['content']) for m in views.chat_managers[account.id].conversation_history]
+            if memory and memory[0][0] == 'assistant':
+                memory = memory[1:]  # the deque may start mid-turn
+            problems += [f"{account.username} memory: {p}" for p in check_pairs(memory)]
+
+        expected = threads * turns
+        stored_total = ChatMessage.objects.count()
+        print("=" * 60)
+        print(f"CHAT CONCURRENCY ({threads} threads, {users} users, "
+              f"{'per-user locks' if use_lock else 'NO locks'})")
+        print("=" * 60)
+        print(f"Turns:      {len(statuses)} in {elapsed:.2f} s, "
+              f"non-200: {sum(1 for s in statuses if s != 200)}")
+        print(f"Stored:     {stored_total} messages (expected {expected * 2})")
+        print(f"Problems:   {len(problems)}")
+        for problem in problems[:10]:
+            print(f"  {problem}")
+        print("=" * 60)
+        ok = not problems and stored_total == expected * 2 and set(statuses) == {200}
+    finally:
+        runner.teardown_databases(old_config)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+"""Todo latency under heavy chat writes: one database vs chat on its own
+
+Serves the app over real HTTP from a threaded WSGI server on throwaway
+SQLite files. Chat writer threads store question/answer turns for many
+users (turn number, question, answer: three write transactions, as in
+chat_view) while signed-in users add and list todos. Each layout runs in
+its own process with CHAT_DB_SHARDS set: 0 (everything in one file), 1
+(chat.sqlite3) and 4 (chat split by user id). Reports chat turns/s and the
+todo views' latency, whose tail is time spent waiting for the write lock.
+Everything shares one process, so faster todo views also leave the chat
+writers less CPU.
+Usage: python benchmarks/chat_db_split.py [--writers 8] [--users 4] [--duration 15] [--shards 0,1,4]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+from load_test import PASSWORD, SimUser, Stats, percentile
+
+FORM = {'Content-Type': 'application/x-www-form-urlencoded'}
+CHAT_USERS = 200
+ANSWER = "Keep the elbow under the ball and follow through. " * 6
+
+
+def write_chat(deadline, user_ids, seed, turns):
+    """Chat turns for random users, straight through the ORM."""
+    from django.db import connections
+
+    from core.chat_state import reserve_turn_seq
+    from core.models import ChatMessage
+
+    rng = random.Random(seed)
+    done = 0
+    while time.monotonic() < deadline:
+        user_id = rng.choice(user_ids)
+        seq = reserve_turn_seq(user_id, 2)
+        question = f"How do I fix my free throw? #{seq}"
+        ChatMessage.objects.create(user_id=user_id, role='user', content=question, raw_content=question, seq=seq)
+        ChatMessage.objects.create(user_id=user_id, role='assistant', content=ANSWER, raw_content=ANSWER, seq=seq + 1)
+        done += 1
+    turns.append(done)
+    connections.close_all()
+
+
+def use_todos(user, deadline):
+    """A signed-in user adding a todo and reloading the list, back to back."""
+    user.request('login_page', 'GET', '/login/')
+    body = urlencode({'username': user.username, 'password': PASSWORD})
+    status, _ = user.request('login', 'POST', '/login/', body, FORM)
+    if status != 302:
+        return
+    today = date.today().isoformat()
+    n = 0
+    while time.monotonic() < deadline:
+        n += 1
+        body = urlencode({'title': f'Drill {n}', 'date': today})
+        user.request('todo_add', 'POST', '/todo/', body, FORM)
+        user.request('todo_list', 'GET', f'/todo/?date={today}')
+
+
+def run_layout(args):
+    """Child process: one database layout, result as JSON on the last line."""
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+    from django.test.runner import DiscoverRunner
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    # Threads need real files; in-memory test databases are per-connection
+    db_dir = tempfile.mkdtemp(prefix='bb-split-')
+    for alias, config in settings.DATABASES.items():
+        config.setdefault('TEST', {})['NAME'] = os.path.join(db_dir, f'{alias}.sqlite3')
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    server = None
+    try:
+        password = make_password(PASSWORD)
+        users = User.objects.bulk_create(
+            [User(username=f'todo{i}', password=password) for i in range(args.users)]
+            + [User(username=f'chat{i}') for i in range(CHAT_USERS)]
+        )
+        chat_user_ids = [user.id for user in users[args.users:]]
+
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler, allow_reuse_address=True)
+        server.daemon_threads = True
+        server.set_app(get_wsgi_application())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+
+        stats = Stats()
+        turns = []
+        deadline = time.monotonic() + args.duration
+        threads = [
+            threading.Thread(target=write_chat, args=(deadline, chat_user_ids, i, turns))
+            for i in range(args.writers)
+        ] + [
+            threading.Thread(target=use_todos, args=(SimUser('127.0.0.1', port, f'todo{i}', stats), deadline))
+            for i in range(args.users)
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        result = {'shards': settings.CHAT_DB_SHARDS, 'turns_per_s': sum(turns) / elapsed}
+        for label in ('todo_add', 'todo_list'):
+            samples = sorted(stats.samples[label])
+            result[label] = {
+                'count': len(samples),
+                'errors': stats.errors[label],
+                'p50': (percentile(samples, 0.5) or 0) * 1000,
+                'p95': (percentile(samples, 0.95) or 0) * 1000,
+                'max': (samples[-1] if samples else 0) * 1000,
+            }
+        print(json.dumps(result))
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        runner.teardown_databases(old_config)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=8, help='chat writer threads')
+    parser.add_argument('--users', type=int, default=4, help='signed-in todo users')
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds per layout')
+    parser.add_argument('--shards', default='0,1,4', help='CHAT_DB_SHARDS values to compare')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_layout(args)
+        return
+
+    print("=" * 86)
+    print(f"CHAT DB SPLIT ({args.writers} chat writers, {args.users} todo users, {args.duration:g} s per layout)")
+    print("=" * 86)
+    print(f"{'layout':16} {'turns/s':>8} {'view':10} {'reqs':>6} {'errors':>6} {'p50':>9} {'p95':>9} {'max':>9}")
+    for shards in args.shards.split(','):
+        with tempfile.TemporaryDirectory(prefix='bb-chat-') as chat_dir:
+            env = {**os.environ, 'CHAT_DB_SHARDS': shards, 'CHAT_DB_DIR': chat_dir}
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', '--writers', str(args.writers),
+                 '--users', str(args.users), '--duration', str(args.duration)],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        layout = {'0': 'one database', '1': 'chat database'}.get(shards, f'{shards} chat shards')
+        turns = f"{result['turns_per_s']:.1f}"
+        for label in ('todo_add', 'todo_list'):
+            view = result[label]
+            print(f"{layout:16} {turns:>8} {label:10} {view['count']:6d} {view['errors']:6d} "
+                  f"{view['p50']:6.1f} ms {view['p95']:6.1f} ms {view['max']:6.1f} ms")
+            layout = turns = ''
+    print("=" * 86)
+
+
+if __name__ == '__main__':
+    main()
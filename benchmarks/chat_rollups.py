@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""Chat dashboard from rollups vs ad-hoc aggregation over chat_message
+
+Fills the message table (many users over ~90 days), folds it into the
+rollups (full backfill, then an incremental run after new messages), and
+times the 30-day dashboard both from the rollup tables and with the
+equivalent GROUP BY queries over core_chatmessage. The two answers are
+checked against each other. Runs against a throwaway test database.
+Usage: python benchmarks/chat_rollups.py [messages] [users]   (default 1,000,000 and 500)
+"""
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Length, TruncDay, TruncHour
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+
+from core.analytics import chat_stats, update_chat_rollups
+from core.models import ChatMessage
+
+DAYS = 90
+REPLY = "Keep the elbow under the ball and follow through. " * 4
+
+
+def populate(count, user_ids, end, seed=7):
+    """Question/answer pairs in id order with non-decreasing timestamps."""
+    rng = random.Random(seed)
+    start = end - datetime.timedelta(days=DAYS)
+    step = (end - start) / count
+    insert = (
+        'INSERT INTO core_chatmessage (user_id, role, content, raw_content, created_at) '
+        'VALUES (%s, %s, %s, %s, %s)'
+    )
+    with connection.cursor() as cursor:
+        batch = []
+        user_id = None
+        for n in range(count):
+            if n % 2 == 0:
+                user_id = rng.choice(user_ids)
+                role, text = 'user', 'How do I shoot better?'
+            else:
+                role, text = 'assistant', REPLY[:rng.randint(40, len(REPLY))]
+            created = (start + step * n).replace(tzinfo=None).isoformat(' ')
+            batch.append((user_id, role, text, text, created))
+            if len(batch) == 20_000:
+                cursor.executemany(insert, batch)
+                batch = []
+        if batch:
+            cursor.executemany(insert, batch)
+
+
+def adhoc_stats(days, by='day', top_users=10):
+    """The same dashboard computed straight from core_chatmessage."""
+    since = timezone.localdate() - datetime.timedelta(days=days - 1)
+    start = timezone.make_aware(datetime.datetime.combine(since, datetime.time()))
+    recent = ChatMessage.objects.filter(created_at__gte=start)
+    periods = list(
+        recent.annotate(period=(TruncDay if by == 'day' else TruncHour)('created_at')).values('period').annotate(
+            messages=Count('id'),
+            questions=Count('id', filter=Q(role='user')),
+            replies=Count('id', filter=Q(role='assistant')),
+            reply_chars=Sum(Length('raw_content'), filter=Q(role='assistant')),
+            active_users=Count('user', distinct=True),
+        ).order_by('period')
+    )
+    users = list(
+        recent.values('user_id').annotate(messages=Count('id')).order_by('-messages', 'user_id')[:top_users]
+    )
+    return periods, users
+
+
+def timed(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        user_ids = [u.id for u in User.objects.bulk_create(
+            [User(username=f'rollup-bench-{n}') for n in range(users)]
+        )]
+        # Leave the last hour out so the incremental run has fresh data
+        end = timezone.now() - datetime.timedelta(hours=1)
+        populate(count, user_ids, end)
+
+        print("=" * 72)
+        print(f"CHAT ROLLUPS ({count} messages, {users} users, {DAYS} days)")
+        print("=" * 72)
+        start = time.perf_counter()
+        backfill = update_chat_rollups(settle_seconds=0)
+        elapsed = time.perf_counter() - start
+        print(f"backfill          {elapsed:8.2f} s  {backfill['processed'] / elapsed:10.0f} messages/s")
+
+        ChatMessage.objects.bulk_create([
+            ChatMessage(user_id=user_ids[n % users], role='user' if n % 2 == 0 else 'assistant',
+                        content=REPLY, raw_content=REPLY, created_at=end + datetime.timedelta(seconds=n))
+            for n in range(2000)
+        ])
+        start = time.perf_counter()
+        incremental = update_chat_rollups(settle_seconds=0)
+        elapsed = time.perf_counter() - start
+        print(f"incremental       {elapsed * 1000:8.1f} ms  ({incremental['processed']} new messages)")
+
+        nothing_new = timed(lambda: update_chat_rollups(settle_seconds=0))[0]
+        print(f"no-op update      {nothing_new:8.1f} ms")
+
+        rollup_ms, _ = timed(lambda: chat_stats(days=30))
+        adhoc_ms, _ = timed(lambda: adhoc_stats(30), repeat=1)
+        print(f"dashboard rollup  {rollup_ms:8.1f} ms")
+        print(f"dashboard ad-hoc  {adhoc_ms:8.1f} ms")
+
+        for days, by in [(30, 'day'), (2, 'hour')]:
+            periods, top = adhoc_stats(days, by)
+            stats = chat_stats(days=days, by=by)
+            expected = [
+                (p['period'].date().isoformat() if by == 'day' else p['period'].isoformat(),
+                 p['messages'], p['questions'], p['active_users'])
+                for p in periods
+            ]
+            actual = [(p[by], p['messages'], p['questions'], p['active_users']) for p in stats['periods']]
+            assert actual == expected, f"rollup {by} periods differ from ad-hoc aggregation"
+            assert [u['user_id'] for u in stats['top_users']] == [u['user_id'] for u in top]
+        print("rollup and ad-hoc results match")
+        print("=" * 72)
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""Per-route latency and tokens: one model for everything vs ChatRouter
+
+Replays a scripted conversation mix (greetings, quick questions, follow-ups,
+plan requests) through chat_view twice - CHAT_ROUTING off, then on - with
+the real OpenAI client talking to benchmarks/fake_openai.py. The stub
+generates --reply-tokens of output at --tokens-per-second, so output
+limits show up as latency the way they do with a real model.
+Usage: python benchmarks/chat_routing.py [rounds] [reply_tokens]
+"""
+import json
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import fake_openai
+
+CONVERSATION = (
+    "Привіт!",
+    "How many points did Jokic average last season?",
+    "and his assists?",
+    "Склади детальний план тренувань кидка на тиждень",
+    "Compare LeBron and Jordan in the playoffs, step by step",
+    "Дякую!",
+    "What is a good warm-up before a game?",
+    "ok thanks",
+)
+
+
+def run_mode(client, config, rounds):
+    per_route = defaultdict(lambda: {'turns': 0, 'latency': [], 'prompt': 0, 'completion': 0})
+    for _ in range(rounds):
+        for message in CONVERSATION:
+            calls_before = len(config.log)
+            start = time.perf_counter()
+            response = client.post('/chat/', json.dumps({'message': message}),
+                                   content_type='application/json')
+            elapsed = time.perf_counter() - start
+            data = response.json()
+            route = (data.get('context_info') or {}).get('route', 'error')
+            stats = per_route[route]
+            stats['turns'] += 1
+            stats['latency'].append(elapsed)
+            for _, _, prompt, completion in list(config.log)[calls_before:]:
+                stats['prompt'] += prompt
+                stats['completion'] += completion
+    return per_route
+
+
+def print_mode(title, per_route):
+    print(f"{title}")
+    totals = {'turns': 0, 'latency': [], 'prompt': 0, 'completion': 0}
+    for route, stats in sorted(per_route.items()):
+        print(f"  {route:<11}{stats['turns']:>6}{statistics.median(stats['latency']) * 1000:>10.0f}"
+              f"{stats['prompt'] / stats['turns']:>10.0f}{stats['completion'] / stats['turns']:>12.0f}")
+        for key in ('turns', 'prompt', 'completion'):
+            totals[key] += stats[key]
+        totals['latency'] += stats['latency']
+    print(f"  {'all':<11}{totals['turns']:>6}{statistics.mean(totals['latency']) * 1000:>10.0f}"
+          f"{totals['prompt'] / totals['turns']:>10.0f}{totals['completion'] / totals['turns']:>12.0f}")
+    return totals
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    reply_tokens = int(sys.argv[2]) if len(sys.argv) > 2 else 800
+
+    config = fake_openai.StubConfig(latency=0.05, jitter=0.0, tokens_per_second=2000,
+                                    reply_tokens=reply_tokens)
+    stub, base_url = fake_openai.start_in_thread(config)
+    # Never let a benchmark reach the real API
+    os.environ['OPENAI_BASE_URL'] = base_url
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+    import django
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import override_settings, setup_test_environment
+
+    from core import views
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        print("=" * 60)
+        print(f"CHAT ROUTING ({rounds} x {len(CONVERSATION)} turns, model writes up to {reply_tokens} tokens)")
+        print("=" * 60)
+        print(f"  {'route':<11}{'turns':>6}{'p50 ms':>10}{'prompt':>10}{'completion':>12}")
+        results = {}
+        for routing in (False, True):
+            user = User.objects.create_user(f'routing{int(routing)}', password='x')
+            client = Client()
+            client.force_login(user)
+            with override_settings(CHAT_ROUTING=routing):
+                per_route = run_mode(client, config, rounds)
+            views.chat_managers.pop(user.id)
+            results[routing] = print_mode('Routing on' if routing else 'Routing off', per_route)
+
+        off, on = results[False], results[True]
+        print(f"Mean turn latency: {statistics.mean(off['latency']) * 1000:.0f} ms -> "
+              f"{statistics.mean(on['latency']) * 1000:.0f} ms; tokens per turn: "
+              f"{(off['prompt'] + off['completion']) / off['turns']:.0f} -> "
+              f"{(on['prompt'] + on['completion']) / on['turns']:.0f}")
+        print("=" * 60)
+    finally:
+        stub.shutdown()
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
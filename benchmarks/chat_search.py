@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""Chat search latency: FTS5 index vs icontains scan
+
+Runs against a throwaway test database.
+Usage: python benchmarks/chat_search.py [rows]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.test.utils import setup_test_environment
+from django.test.runner import DiscoverRunner
+
+from core.models import ChatMessage
+from core.search import search_chat_messages
+
+USERS = 100
+WORDS = (
+    "ball shot dribble defense coach practice free throws rebound pass screen "
+    "кидок тренування захист команда гравець очки штрафна підбирання"
+).split()
+
+
+def populate(rows):
+    rng = random.Random(11)
+    # Zipf-like vocabulary: a few very common words, a long tail of rare ones
+    vocabulary = WORDS + [f'word{i}' for i in range(5000)]
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    rng.shuffle(vocabulary)
+    users = User.objects.bulk_create([User(username=f'search{i}') for i in range(USERS)])
+    batch = []
+    for i in range(rows):
+        text = ' '.join(rng.choices(vocabulary, weights, k=rng.randint(8, 60)))
+        batch.append(ChatMessage(user=users[i % USERS], role='user', content=text, raw_content=text))
+        if len(batch) == 10_000:
+            ChatMessage.objects.bulk_create(batch)
+            batch = []
+    ChatMessage.objects.bulk_create(batch)
+    return users[0]
+
+
+def timed(func, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        user = populate(rows)
+        query = 'free throws'
+
+        fts_ms = timed(lambda: search_chat_messages(user, query))
+        scan_ms = timed(lambda: list(
+            ChatMessage.objects.filter(user=user, raw_content__icontains='free')
+            .filter(raw_content__icontains='throws').order_by('-created_at')[:21]
+        ))
+
+        print("=" * 60)
+        print(f"CHAT SEARCH ({rows} messages, {USERS} users, query '{query}')")
+        print("=" * 60)
+        print(f"FTS ranked + snippets:  {fts_ms:8.2f} ms")
+        print(f"icontains scan:         {scan_ms:8.2f} ms")
+        print("=" * 60)
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
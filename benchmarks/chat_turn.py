@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Per-turn server time and response bytes: page reload vs incremental JSON
+
+The OpenAI client is replaced with an instant fake, so only our own work
+is measured. Runs against a throwaway test database.
+Usage: python benchmarks/chat_turn.py [history_messages] [turns]
+"""
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.test.runner import DiscoverRunner
+
+from core import chat, llm, views
+from core.models import ChatMessage
+
+REPLY = "**Free throws**\n- Keep your elbow under the ball\n- Follow through\n" * 3
+
+
+def fake_completion(**kwargs):
+    message = SimpleNamespace(content=REPLY)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+FAKE_CLIENT = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=fake_completion)))
+
+
+def run_turns(client, turns, ajax):
+    """Old flow: POST rendering the page, then a reload. New flow: one AJAX POST."""
+    times, sizes = [], []
+    headers = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'} if ajax else {}
+    for i in range(turns):
+        start = time.perf_counter()
+        response = client.post('/chat/', {'message': f'How do I improve free throws? #{i}'}, **headers)
+        size = len(response.content)
+        if not ajax:
+            response = client.get('/chat/')
+            size += len(response.content)
+        times.append(time.perf_counter() - start)
+        sizes.append(size)
+    return statistics.median(times) * 1000, statistics.median(sizes)
+
+
+def main():
+    history = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        user = User.objects.create_user('bench', password='bench-pass')
+        ChatMessage.objects.bulk_create([
+            ChatMessage(user=user, role='user' if i % 2 == 0 else 'assistant',
+                        content=chat.convert_markdown_to_html(REPLY))
+            for i in range(history)
+        ])
+        client = Client()
+        client.force_login(user)
+
+        with mock.patch.object(llm, 'get_client', return_value=FAKE_CLIENT):
+            reload_ms, reload_bytes = run_turns(client, turns, ajax=False)
+            ajax_ms, ajax_bytes = run_turns(client, turns, ajax=True)
+
+        print("=" * 60)
+        print(f"CHAT TURN ({history}+ messages of history, median of {turns} turns)")
+        print("=" * 60)
+        print(f"POST + page reload:  {reload_ms:8.2f} ms  {reload_bytes:>10,.0f} bytes")
+        print(f"Incremental JSON:    {ajax_ms:8.2f} ms  {ajax_bytes:>10,.0f} bytes")
+        print("=" * 60)
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""Memory of in-memory chat contexts: dict records vs compact ChatRecord
+
+Builds contexts for many simulated users (tracemalloc), times one API
+payload per user, and checks that ContextRegistry holds the process under
+its cap.
+Usage: python benchmarks/context_memory.py [users] [messages_per_user]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+import django
+django.setup()
+
+import fixtures
+from core.algorithms import ChatContextManager
+from core.chat_state import ContextRegistry
+
+
+class LegacyContextManager:
+    """The previous representation: a dict and a datetime per message, copied per call."""
+
+    def __init__(self, max_messages=10, max_tokens=3000):
+        self.max_tokens = max_tokens
+        self.conversation_history = deque(maxlen=max_messages)
+
+    def add_message(self, role, content):
+        self.conversation_history.append({"role": role, "content": content, "timestamp": datetime.now()})
+
+    def get_context_for_api(self):
+        messages = []
+        total_tokens = 0
+        for msg in reversed(self.conversation_history):
+            msg_tokens = len(msg["content"]) // 4
+            if total_tokens + msg_tokens > self.max_tokens:
+                break
+            messages.insert(0, {"role": msg["role"], "content": msg["content"]})
+            total_tokens += msg_tokens
+        return messages
+
+
+def user_histories(users, per_user):
+    """Distinct string objects per user, as real histories would be."""
+    base = fixtures.cyrillic_messages(per_user * 4)
+    return [
+        [(role, f"{content} #{u}") for role, content in base[(u % 4) * per_user:(u % 4 + 1) * per_user]]
+        for u in range(users)
+    ]
+
+
+def build(cls, histories):
+    """Traced bytes for the context structures only (strings exist beforehand)."""
+    tracemalloc.start()
+    managers = []
+    for history in histories:
+        manager = cls()
+        for role, content in history:
+            manager.add_message(role, content)
+        managers.append(manager)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return managers, current
+
+
+def payloads(managers):
+    """Seconds to build one API payload per user; bytes held by 1,000 live payloads."""
+    start = time.perf_counter()
+    for manager in managers:
+        manager.get_context_for_api()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    live = [manager.get_context_for_api() for manager in managers[:1000]]
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del live
+    return elapsed, held
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    histories = user_histories(users, per_user)
+    text_bytes = sum(sys.getsizeof(content) for history in histories for _, content in history)
+
+    legacy, legacy_bytes = build(LegacyContextManager, histories)
+    legacy_time, legacy_peak = payloads(legacy)
+    del legacy
+    compact, compact_bytes = build(ChatContextManager, histories)
+    compact_time, compact_peak = payloads(compact)
+
+    registry = ContextRegistry(max_bytes=1 << 62)
+    for user_id, manager in enumerate(compact):
+        registry[user_id] = manager
+    estimate = registry.get_stats()['bytes']
+
+    cap = estimate // 4
+    capped = ContextRegistry(max_bytes=cap)
+    for user_id, manager in enumerate(compact):
+        capped[user_id] = manager
+    stats = capped.get_stats()
+
+    mib = 1024 * 1024
+    print("=" * 66)
+    print(f"CHAT CONTEXT MEMORY ({users:,} users x {per_user} messages)")
+    print("=" * 66)
+    print(f"Message text (shared by both):     {text_bytes / mib:9.1f} MiB")
+    print(f"Dict records:   {legacy_bytes / mib:9.1f} MiB  {legacy_bytes / users:7.0f} B/user"
+          f"  payloads {legacy_time * 1000:6.1f} ms, 1k payloads hold {legacy_peak / 1024:6.0f} KiB")
+    print(f"ChatRecord:     {compact_bytes / mib:9.1f} MiB  {compact_bytes / users:7.0f} B/user"
+          f"  payloads {compact_time * 1000:6.1f} ms, 1k payloads hold {compact_peak / 1024:6.0f} KiB")
+    print(f"Registry estimate (text + records): {estimate / mib:8.1f} MiB "
+          f"(traced {(text_bytes + compact_bytes) / mib:.1f} MiB)")
+    print(f"With cap {cap / mib:.1f} MiB: {stats['users']:,} users kept, "
+          f"{stats['bytes'] / mib:.1f} MiB, {stats['evictions']:,} evicted")
+    print("=" * 66)
+
+
+if __name__ == '__main__':
+    main()
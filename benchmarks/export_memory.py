@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""Peak Python memory of the streaming export vs building a list
+
+Runs against a throwaway test database.
+Usage: python benchmarks/export_memory.py [rows]   (default 1,000,000)
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import setup_test_environment
+from django.test.runner import DiscoverRunner
+
+from core.export import export_stream
+from core.models import ChatMessage
+
+TEXT = "Keep your elbow under the ball and follow through on every free throw. " * 3
+
+
+def populate(user, rows):
+    # Raw executemany keeps fixture creation itself out of the way
+    with connection.cursor() as cursor:
+        batch = []
+        for i in range(rows):
+            role = 'user' if i % 2 == 0 else 'assistant'
+            batch.append((user.id, role, TEXT, TEXT, '2026-03-01 12:00:00'))
+            if len(batch) == 20_000:
+                cursor.executemany(
+                    'INSERT INTO core_chatmessage (user_id, role, content, raw_content, created_at) '
+                    'VALUES (%s, %s, %s, %s, %s)', batch
+                )
+                batch = []
+        if batch:
+            cursor.executemany(
+                'INSERT INTO core_chatmessage (user_id, role, content, raw_content, created_at) '
+                'VALUES (%s, %s, %s, %s, %s)', batch
+            )
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak / 1024 / 1024
+
+
+def stream_export(user, **kwargs):
+    total = 0
+    for chunk in export_stream(user, **kwargs):
+        total += len(chunk)
+    return total
+
+
+def list_export(user):
+    return len(list(ChatMessage.objects.filter(user=user)))
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        user = User.objects.create_user('export-bench')
+        populate(user, rows)
+
+        print("=" * 60)
+        print(f"EXPORT MEMORY ({rows} chat messages)")
+        print("=" * 60)
+        for label, func in [
+            ("Streaming JSONL", lambda: stream_export(user, fmt='jsonl')),
+            ("Streaming CSV + gzip", lambda: stream_export(user, fmt='csv', compress=True)),
+            ("list(queryset)", lambda: list_export(user)),
+        ]:
+            size, elapsed, peak_mb = measure(func)
+            print(f"{label:22} peak {peak_mb:8.1f} MB  {elapsed:6.1f} s  ({size} bytes/rows)")
+        print("=" * 60)
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+"""Local OpenAI-compatible stub for load tests
+
+Implements POST /v1/chat/completions (plain and stream=true) with
+configurable latency, jitter and error rate. Replies are --reply-tokens
+long, cut at the request's max_tokens, and take --latency plus generation
+time at --tokens-per-second, like a real model. Point the app at it with
+OPENAI_BASE_URL=http://127.0.0.1:<port>/v1
+
+Usage: python benchmarks/fake_openai.py [--port 8765] [--latency 0.3]
+           [--jitter 0.1] [--error-rate 0.02] [--tokens-per-second 200]
+           [--reply-tokens 40]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = (
+    "**Free throw routine**\n"
+    "- Same number of dribbles every time\n"
+    "- Elbow under the ball, eyes on the rim\n"
+    "- Hold the follow-through until the ball lands\n"
+)
+
+
+class StubConfig:
+    def __init__(self, latency=0.3, jitter=0.1, error_rate=0.0, tokens_per_second=200.0, seed=None,
+                 reply_tokens=40):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.models = {}
+        # Recent successful calls: (model, max_tokens, prompt_tokens, completion_tokens)
+        self.log = deque(maxlen=10000)
+
+    def record(self, model, failed):
+        with self.lock:
+            self.calls += 1
+            self.errors += int(failed)
+            self.models[model] = self.models.get(model, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return {"calls": self.calls, "errors": self.errors, "models": dict(self.models)}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None  # set by make_server
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        config = self.config
+        model = request.get("model", "unknown")
+
+        with config.lock:
+            delay = max(0.0, config.random.gauss(config.latency, config.jitter))
+            failed = config.random.random() < config.error_rate
+        config.record(model, failed)
+
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        if failed:
+            time.sleep(delay)
+            self._send_json(500, {"error": {"message": "Injected failure", "type": "server_error"}})
+            return
+
+        prompt_tokens = sum(len(m.get("content", "")) for m in request.get("messages", [])) // 4
+        completion_tokens = config.reply_tokens
+        if request.get("max_tokens"):
+            completion_tokens = min(completion_tokens, request["max_tokens"])
+        reply = (REPLY * (completion_tokens * 4 // len(REPLY) + 1))[:completion_tokens * 4]
+        config.log.append((model, request.get("max_tokens"), prompt_tokens, completion_tokens))
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        time.sleep(delay)  # time to first token
+        if request.get("stream"):
+            self._stream(completion_id, model, reply)
+            return
+        if config.tokens_per_second:
+            time.sleep(completion_tokens / config.tokens_per_second)
+
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    def _stream(self, completion_id, model, reply):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        pause = 1.0 / self.config.tokens_per_second if self.config.tokens_per_second else 0
+        for start in range(0, len(reply), 4):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": reply[start:start + 4]}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            time.sleep(pause)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+
+def make_server(config, host="127.0.0.1", port=0):
+    """Create (but do not start) a stub server; port 0 picks a free port."""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(config, host="127.0.0.1", port=0):
+    server = make_server(config, host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3, help="mean seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.1, help="latency std deviation")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="generation speed")
+    parser.add_argument("--reply-tokens", type=int, default=40, help="reply length before max_tokens")
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency, args.jitter, args.error_rate, args.tokens_per_second,
+                        reply_tokens=args.reply_tokens)
+    server = make_server(config, args.host, args.port)
+    print(f"Fake OpenAI listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStats: {config.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""FAQ answers: bulk generation and chat turns served without the model
+
+Starts benchmarks/fake_openai.py in-process (with injected 5xx errors) and
+runs `manage.py generate_faq` over generated questions one at a time and
+with bounded concurrency. Then sends chat turns through the full view
+stack: FAQ questions, written with different case and punctuation, and
+questions that are not in the table. Reports wall time, upstream calls
+and per-turn latency. Runs against a throwaway test database.
+Usage: python benchmarks/faq_answers.py [questions] [turns]   (default 200 and 40)
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import fake_openai
+
+SKILLS = ['free throws', 'my jump shot', 'ball handling', 'my vertical jump', 'court vision',
+          'defensive footwork', 'rebounding position', 'my left hand', 'passing accuracy', 'shot selection']
+FORMS = ['How do I improve {}?', 'What drills help with {}?', 'How long does it take to get better at {}?',
+         'What are common mistakes with {}?', 'How should a guard practice {}?',
+         'How should a center practice {}?', 'What is a weekly plan for {}?',
+         'How do NBA players train {}?', 'Can I work on {} alone?', 'How do I test {}?',
+         'What equipment helps with {}?', 'How do I warm up before working on {}?',
+         'What does good {} look like?', 'How do I fix bad habits in {}?',
+         'What should a beginner know about {}?', 'How do I keep {} consistent in games?',
+         'What is the best age to start {}?', 'How often should I practice {}?',
+         'How does fatigue affect {}?', 'What stats measure {}?']
+OTHER = "Compare the 1996 Bulls and the 2017 Warriors, turn {}"
+
+
+def questions(count):
+    every = [form.format(skill) for form in FORMS for skill in SKILLS]
+    return every[:count]
+
+
+def timed_generate(path, concurrency):
+    from django.core.management import call_command
+    from core.models import FAQEntry
+
+    FAQEntry.objects.all().delete()
+    start = time.perf_counter()
+    call_command('generate_faq', path, concurrency=concurrency, backoff=0.05,
+                 stdout=open(os.devnull, 'w'), stderr=open(os.devnull, 'w'))
+    return time.perf_counter() - start, FAQEntry.objects.count()
+
+
+def chat_latency(client, messages):
+    timings = []
+    for message in messages:
+        start = time.perf_counter()
+        response = client.post('/chat/', {'message': message}, content_type='application/json')
+        timings.append(time.perf_counter() - start)
+        # 502: an injected upstream failure, answered like a real one
+        assert response.status_code in (200, 502), response.status_code
+    return statistics.median(timings) * 1000, max(timings) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    config = fake_openai.StubConfig(latency=0.3, jitter=0.05, error_rate=0.05, seed=3)
+    stub, base_url = fake_openai.start_in_thread(config)
+    # Never let a benchmark reach the real API
+    os.environ['OPENAI_BASE_URL'] = base_url
+    os.environ.setdefault('OPENAI_API_KEY', 'faq-bench')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment
+
+    # Answers are saved from other threads; an in-memory test database
+    # with a shared cache would fail them with "table is locked"
+    db_dir = tempfile.mkdtemp(prefix='bb-faq-')
+    settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = os.path.join(db_dir, 'faq.sqlite3')
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        asked = questions(count)
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as fh:
+            fh.write('\n'.join(asked))
+        print("=" * 72)
+        print(f"FAQ ANSWERS ({len(asked)} questions, fake LLM 0.3 s, {config.error_rate:.0%} errors)")
+        print("=" * 72)
+        for concurrency in (1, 16):
+            calls = config.snapshot()['calls']
+            elapsed, stored = timed_generate(fh.name, concurrency)
+            calls = config.snapshot()['calls'] - calls
+            print(f"generate, concurrency {concurrency:2d}  {elapsed:7.1f} s  {stored / elapsed:6.1f} answers/s  "
+                  f"{stored}/{len(asked)} stored, {calls} upstream calls")
+        os.unlink(fh.name)
+
+        user = User.objects.create_user('faq-bench', password='x')
+        client = Client()
+        client.force_login(user)
+        variants = [q.upper().rstrip('?') + ' ??' if n % 2 else q.lower() for n, q in enumerate(asked[:turns])]
+        for label, messages in [("FAQ turns", variants), ("other turns", [OTHER.format(n) for n in range(turns)])]:
+            calls = config.snapshot()['calls']
+            p50, worst = chat_latency(client, messages)
+            calls = config.snapshot()['calls'] - calls
+            print(f"{label:24} p50 {p50:7.1f} ms  max {worst:7.1f} ms  {calls / turns:.2f} upstream calls/turn")
+        print("=" * 72)
+    finally:
+        runner.teardown_databases(old_config)
+        stub.shutdown()
+
+
+if __name__ == '__main__':
+    main()
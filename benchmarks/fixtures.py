@@ -0,0 +1,81 @@
+"""Deterministic generated fixtures for the benchmarks
+
+Everything is seeded so two runs (and two machines) see the same data.
+"""
+import os
+import random
+import tempfile
+
+FIRST_NAMES = ['LeBron', 'Stephen', 'Kevin', 'Luka', 'Nikola', 'Giannis', 'Jayson',
+               'Святослав', 'Олексій', 'Кирило', 'Joel', 'Anthony', 'Devin', 'Damian']
+LAST_NAMES = ['James', 'Curry', 'Durant', 'Doncic', 'Jokic', 'Antetokounmpo', 'Tatum',
+              'Михайлюк', 'Лень', 'Фесенко', 'Embiid', 'Davis', 'Booker', 'Lillard']
+TEAMS = ['Lakers', 'Celtics', 'Warriors', 'Bulls', 'Heat', 'Trail Blazers', 'Real Madrid',
+         'Будівельник', 'Прометей', 'Golden State', 'San Antonio Spurs', 'Nuggets']
+
+# Українська лексика з предметної області, щоб історії чату були схожі на справжні
+CHAT_WORDS = (
+    'гравець команда матч статистика кидок очки тренування захист атака підбір '
+    'передача трьохочковий штрафний кидок сезон плей-офф фінал тренер тактика '
+    'пік-н-рол зонний захист швидкий прорив дриблінг позиція розігруючий центровий '
+    'як покращити чому найкращий порівняй поясни розкажи про в у на з за і та але '
+    'NBA Euroleague LeBron Jokic Doncic Curry points rebounds assists'
+).split()
+
+
+def cyrillic_messages(count, seed=7, min_words=8, max_words=120):
+    """(role, content) pairs alternating user/assistant; assistant turns run longer."""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(count):
+        role = 'user' if i % 2 == 0 else 'assistant'
+        upper = max(min_words, max_words // 4) if role == 'user' else max_words
+        words = rng.randint(min_words, upper)
+        text = ' '.join(rng.choice(CHAT_WORDS) for _ in range(words))
+        messages.append((role, text[0].upper() + text[1:] + ('?' if role == 'user' else '.')))
+    return messages
+
+
+def player_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def player_pool(count, seed=11):
+    """Season totals shaped like real box scores: PlayerStats input dicts."""
+    rng = random.Random(seed)
+    pool = []
+    for i in range(count):
+        games = rng.randint(1, 82)
+        pool.append({
+            'name': f"{player_name(rng)} #{i}",
+            'points': int(games * rng.uniform(2, 32)),
+            'rebounds': int(games * rng.uniform(1, 13)),
+            'assists': int(games * rng.uniform(0.5, 11)),
+            'games_played': games,
+        })
+    return pool
+
+
+def stat_lines(count, seed=42, broken_every=100):
+    """Mixed player stat / game score lines with a sprinkling of malformed ones."""
+    rng = random.Random(seed)
+    for i in range(count):
+        if broken_every and i % broken_every == 0:
+            yield "broken line without stats"
+        elif i % 2:
+            yield (f"{player_name(rng)}: {rng.uniform(5, 35):.1f} PPG, "
+                   f"{rng.uniform(1, 15):.1f} RPG, {rng.uniform(1, 12):.1f} APG")
+        else:
+            home, away = rng.sample(TEAMS, 2)
+            yield f"{home} {rng.randint(80, 130)} - {rng.randint(80, 130)} {away}"
+
+
+def stat_file(count, seed=42):
+    """Path to a generated stat file, written once and reused between runs."""
+    path = os.path.join(tempfile.gettempdir(), f'bb-stats-{count}-{seed}.txt')
+    if not os.path.exists(path):
+        partial = f'{path}.{os.getpid()}.tmp'
+        with open(partial, 'w', encoding='utf-8') as fh:
+            fh.writelines(f'{line}\n' for line in stat_lines(count, seed))
+        os.replace(partial, path)
+    return path
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Worker cold start: time, memory and -X importtime breakdown
+
+Each run is a fresh interpreter doing what a Passenger/gunicorn worker does
+before its first request: build the WSGI application and resolve the URLconf.
+'lazy' is the current tree; 'eager' additionally imports openai, which is
+what importing core.views used to do.
+Usage: python benchmarks/import_time.py [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+WORKER = """
+import json, os, resource, sys, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+if sys.argv[1] == 'eager':
+    import openai
+print(json.dumps({
+    'seconds': time.perf_counter() - start,
+    'maxrss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'openai_loaded': 'openai' in sys.modules,
+}))
+"""
+
+
+def spawn(mode, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', WORKER, mode]
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get('OPENAI_API_KEY', 'benchmark'))
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def top_level_imports(stderr, limit=8):
+    """Biggest top-level packages by cumulative import time (microseconds)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        # Nested imports are indented two spaces per level
+        if name.startswith('  '):
+            continue
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+
+    print("=" * 60)
+    print(f"WORKER COLD START (median of {runs} fresh interpreters)")
+    print("=" * 60)
+    for mode in ('eager', 'lazy'):
+        samples = [spawn(mode)[0] for _ in range(runs)]
+        seconds = statistics.median(s['seconds'] for s in samples) * 1000
+        rss = statistics.median(s['maxrss_kb'] for s in samples) / 1024
+        print(f"{mode:<6} {seconds:8.1f} ms  {rss:7.1f} MiB max RSS  "
+              f"openai loaded: {samples[0]['openai_loaded']}")
+
+    for mode in ('eager', 'lazy'):
+        _, stderr = spawn(mode, importtime=True)
+        print(f"\nTop-level imports ({mode}, -X importtime cumulative):")
+        for cumulative_us, name in top_level_imports(stderr):
+            print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+"""Concurrent load test for chat, todo and auth against a fake LLM
+
+Starts benchmarks/fake_openai.py in-process, serves the app over real HTTP
+from a threaded WSGI server on a throwaway SQLite database, and drives it
+with simulated users. Writes req/s, latency percentiles, DB queries per
+request and upstream calls per chat turn to a JSON file.
+
+Usage: python benchmarks/load_test.py [--users 16] [--duration 30]
+           [--latency 0.3] [--error-rate 0.02] [--output load_test.json]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import fake_openai
+
+# Weighted mix of what a simulated user does between think times
+SCENARIOS = (('chat', 5), ('todo_list', 3), ('todo_add', 1), ('relogin', 1))
+PASSWORD = 'load-test-pass'
+QUESTIONS = (
+    "How do I improve my free throw percentage?",
+    "Compare LeBron and Jordan in the playoffs",
+    "What is a good 3-day shooting workout?",
+    "Як покращити кидок з місця?",
+    "Explain the pick and roll coverage options",
+)
+
+
+class QueryCounter:
+    """WSGI wrapper recording DB queries per request, grouped by X-Load-Label."""
+
+    def __init__(self, application):
+        self.application = application
+        self.lock = threading.Lock()
+        self.queries = defaultdict(list)
+
+    def __call__(self, environ, start_response):
+        from django.db import connection
+
+        count = [0]
+
+        def counter(execute, sql, params, many, context):
+            count[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            # Responses here are not streamed, so the body is built inside the wrapper
+            response = list(self.application(environ, start_response))
+        with self.lock:
+            self.queries[environ.get('HTTP_X_LOAD_LABEL', 'other')].append(count[0])
+        return response
+
+
+class SimUser:
+    """One browser: its own cookie jar, a new connection per request."""
+
+    def __init__(self, host, port, username, stats):
+        self.host, self.port = host, port
+        self.username = username
+        self.cookies = {}
+        self.stats = stats
+
+    def request(self, label, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        headers['X-Load-Label'] = label
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        if method == 'POST' and 'csrftoken' in self.cookies:
+            headers['X-CSRFToken'] = self.cookies['csrftoken']
+
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            payload = response.read()
+            status = response.status
+            for header in response.headers.get_all('Set-Cookie') or ():
+                for name, morsel in SimpleCookie(header).items():
+                    self.cookies[name] = morsel.value
+        except OSError:
+            payload, status = b'', 0
+        finally:
+            conn.close()
+        self.stats.record(label, time.perf_counter() - start, status)
+        return status, payload
+
+    def login(self):
+        self.request('login_page', 'GET', '/login/')
+        body = urlencode({'username': self.username, 'password': PASSWORD})
+        status, _ = self.request('login', 'POST', '/login/', body,
+                                 {'Content-Type': 'application/x-www-form-urlencoded'})
+        return status == 302
+
+    def chat(self, rng):
+        body = json.dumps({'message': rng.choice(QUESTIONS)})
+        self.request('chat', 'POST', '/chat/', body, {'Content-Type': 'application/json'})
+
+    def todo_list(self):
+        self.request('todo_list', 'GET', f'/todo/?date={date.today().isoformat()}')
+
+    def todo_add(self, rng):
+        body = urlencode({'title': f'Shooting drill #{rng.randint(1, 999)}', 'date': date.today().isoformat()})
+        self.request('todo_add', 'POST', '/todo/', body,
+                     {'Content-Type': 'application/x-www-form-urlencoded'})
+
+    def relogin(self):
+        self.request('logout', 'GET', '/logout/')
+        self.login()
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, label, seconds, status):
+        with self.lock:
+            self.samples[label].append(seconds)
+            if status == 0 or status >= 400:
+                self.errors[label] += 1
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_user(user, deadline, think_time, seed):
+    rng = random.Random(seed)
+    names = [name for name, _ in SCENARIOS]
+    weights = [weight for _, weight in SCENARIOS]
+    user.login()
+    while time.monotonic() < deadline:
+        scenario = rng.choices(names, weights)[0]
+        if scenario == 'chat':
+            user.chat(rng)
+        elif scenario == 'todo_list':
+            user.todo_list()
+        elif scenario == 'todo_add':
+            user.todo_add(rng)
+        else:
+            user.relogin()
+        if think_time:
+            time.sleep(rng.uniform(0, 2 * think_time))
+
+
+def build_report(args, elapsed, stats, queries, upstream):
+    endpoints = {}
+    total = errors = 0
+    for label, samples in sorted(stats.samples.items()):
+        ordered = sorted(samples)
+        counts = queries.get(label, [])
+        total += len(samples)
+        errors += stats.errors[label]
+        endpoints[label] = {
+            'requests': len(samples),
+            'errors': stats.errors[label],
+            'rps': round(len(samples) / elapsed, 2),
+            'mean_ms': round(statistics.fmean(ordered) * 1000, 2),
+            'p50_ms': round(percentile(ordered, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(ordered, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(ordered, 0.99) * 1000, 2),
+            'db_queries_mean': round(statistics.fmean(counts), 2) if counts else None,
+            'db_queries_max': max(counts) if counts else None,
+        }
+    chat_turns = len(stats.samples.get('chat', ()))
+    return {
+        'config': {
+            'users': args.users,
+            'duration_s': args.duration,
+            'think_time_s': args.think_time,
+            'upstream_latency_s': args.latency,
+            'upstream_error_rate': args.error_rate,
+            'seed': args.seed,
+        },
+        'elapsed_s': round(elapsed, 2),
+        'totals': {
+            'requests': total,
+            'errors': errors,
+            'rps': round(total / elapsed, 2),
+        },
+        'endpoints': endpoints,
+        'upstream': {
+            **upstream,
+            'chat_turns': chat_turns,
+            'calls_per_turn': round(upstream['calls'] / chat_turns, 3) if chat_turns else None,
+        },
+    }
+
+
+def print_report(report):
+    print("=" * 78)
+    print(f"LOAD TEST ({report['config']['users']} users, {report['elapsed_s']} s, "
+          f"{report['totals']['rps']} req/s, {report['totals']['errors']} errors)")
+    print("=" * 78)
+    print(f"{'endpoint':<12}{'reqs':>7}{'err':>6}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'queries':>9}")
+    for label, row in report['endpoints'].items():
+        queries = '-' if row['db_queries_mean'] is None else f"{row['db_queries_mean']:.1f}"
+        print(f"{label:<12}{row['requests']:>7}{row['errors']:>6}{row['rps']:>8}"
+              f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{queries:>9}")
+    upstream = report['upstream']
+    print(f"Upstream: {upstream['calls']} calls, {upstream['errors']} injected errors, "
+          f"{upstream['calls_per_turn']} calls per chat turn")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds of load')
+    parser.add_argument('--think-time', type=float, default=0.0, help='mean pause between actions')
+    parser.add_argument('--latency', type=float, default=0.3, help='fake LLM mean latency')
+    parser.add_argument('--jitter', type=float, default=0.1)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fake LLM 500 rate')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='load_test.json')
+    args = parser.parse_args()
+
+    config = fake_openai.StubConfig(args.latency, args.jitter, args.error_rate, seed=args.seed)
+    stub, base_url = fake_openai.start_in_thread(config)
+
+    # Never let a load test reach the real API
+    os.environ['OPENAI_BASE_URL'] = base_url
+    os.environ.setdefault('OPENAI_API_KEY', 'load-test')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+    from django.test.runner import DiscoverRunner
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    # Threads need a real file; an in-memory test database is per-connection
+    db_dir = tempfile.mkdtemp(prefix='bb-load-')
+    settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = os.path.join(db_dir, 'load.sqlite3')
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    server = None
+    try:
+        # One hash shared by every account keeps setup fast; logins still pay full cost
+        password = make_password(PASSWORD)
+        User.objects.bulk_create([
+            User(username=f'load{i}', password=password) for i in range(args.users)
+        ])
+
+        app = QueryCounter(get_wsgi_application())
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler, allow_reuse_address=True)
+        server.daemon_threads = True
+        server.set_app(app)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+
+        stats = Stats()
+        deadline = time.monotonic() + args.duration
+        threads = [
+            threading.Thread(
+                target=run_user,
+                args=(SimUser('127.0.0.1', port, f'load{i}', stats), deadline, args.think_time, args.seed + i),
+            )
+            for i in range(args.users)
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        report = build_report(args, elapsed, stats, app.queries, config.snapshot())
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+        print_report(report)
+        print(f"Results written to {args.output}")
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        stub.shutdown()
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
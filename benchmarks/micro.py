@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+"""Microbenchmarks for core.algorithms with JSON baselines and a regression gate
+
+    python benchmarks/micro.py run [--scale 0.1] [--filter chat] [--output micro.json]
+    python benchmarks/micro.py compare baseline.json micro.json [--threshold 0.10]
+
+`run` times every hot function on generated fixtures (long Cyrillic chat
+histories, 100k-player pools, a million-line stat file at --scale 1) and
+records ops/sec plus peak traced allocation per op. `compare` exits with
+status 1 when any benchmark got slower, or allocates more, than the
+threshold allows - suitable as a CI gate against a stored baseline.
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import fixtures
+from core.algorithms import (
+    BulkDataParser, ChatContextManager, DataParser, EloRatingEngine, GameAnalyzer,
+    PlayerComparator, PlayerStats, ResponseFilter, RetrievalContextManager,
+    TeamStatsAggregator,
+)
+
+BENCHMARKS = {}
+
+
+def bench(name, items=1, heavy=False):
+    """
+    Register a benchmark. The decorated function builds fixtures for a scale
+    and returns the zero-argument callable that is timed; `items` is how many
+    units (lines, players...) one call processes, for throughput figures.
+    """
+    def register(setup):
+        BENCHMARKS[name] = {'setup': setup, 'items': items, 'heavy': heavy}
+        return setup
+    return register
+
+
+def scaled(count, scale, minimum=1):
+    return max(minimum, int(count * scale))
+
+
+# --- chat ------------------------------------------------------------------
+
+@bench('chat.add_message')
+def bench_chat_add(scale):
+    manager = ChatContextManager()
+    messages = fixtures.cyrillic_messages(512)
+    state = {'i': 0}
+
+    def op():
+        role, content = messages[state['i'] & 511]
+        state['i'] += 1
+        manager.add_message(role, content)
+    return op
+
+
+@bench('chat.get_context_for_api')
+def bench_chat_context(scale):
+    manager = ChatContextManager()
+    for role, content in fixtures.cyrillic_messages(200):
+        manager.add_message(role, content)
+    return manager.get_context_for_api
+
+
+@bench('chat.get_context_for_api[long]')
+def bench_chat_context_long(scale):
+    # A wide window over a long history, as with a raised CHAT_MAX_MESSAGES
+    manager = ChatContextManager(max_messages=500, max_tokens=100_000)
+    for role, content in fixtures.cyrillic_messages(2000):
+        manager.add_message(role, content)
+    return manager.get_context_for_api
+
+
+@bench('chat.conversation_summary')
+def bench_chat_summary(scale):
+    manager = ChatContextManager(max_messages=200)
+    for role, content in fixtures.cyrillic_messages(200):
+        manager.add_message(role, content)
+    return manager.get_conversation_summary
+
+
+@bench('chat.retrieval_context')
+def bench_retrieval_context(scale):
+    manager = RetrievalContextManager(max_indexed_turns=scaled(5000, scale, 100))
+    manager.load_history(fixtures.cyrillic_messages(scaled(5000, scale, 100)))
+    query = 'Як покращити штрафний кидок у плей-офф?'
+    return lambda: manager.get_context_for_api(query)
+
+
+@bench('filter.filter_response')
+def bench_filter(scale):
+    reply = fixtures.cyrillic_messages(2, min_words=200, max_words=400)[1][1]
+    reply = reply.replace('. ', '.\n\n\n\n')
+    question = 'Порівняй тренування кидка у NBA та Euroleague'
+    return lambda: ResponseFilter.filter_response(reply, question)
+
+
+# --- players and games -----------------------------------------------------
+
+@bench('players.rank_players', items=100_000, heavy=True)
+def bench_rank(scale):
+    players = [PlayerStats(p) for p in fixtures.player_pool(scaled(100_000, scale))]
+    BENCHMARKS['players.rank_players']['items'] = len(players)
+    return lambda: PlayerComparator.rank_players(players, by='ppg')
+
+
+@bench('players.compare_players')
+def bench_compare(scale):
+    players = [PlayerStats(p) for p in fixtures.player_pool(1024)]
+    state = {'i': 0}
+
+    def op():
+        i = state['i'] = (state['i'] + 1) & 1023
+        return PlayerComparator.compare_players(players[i], players[i ^ 1])
+    return op
+
+
+@bench('games.calculate_team_stats')
+def bench_team_stats(scale):
+    team = {'players': fixtures.player_pool(15), 'games_played': 82}
+    return lambda: GameAnalyzer.calculate_team_stats(team)
+
+
+@bench('games.predict_winner')
+def bench_predict(scale):
+    team1 = {'team_ppg': 112.4}
+    team2 = {'team_ppg': 108.9}
+    return lambda: GameAnalyzer.predict_winner(team1, team2)
+
+
+# --- parsing and aggregation -----------------------------------------------
+
+def _stat_file(scale):
+    count = scaled(1_000_000, scale)
+    return fixtures.stat_file(count), count
+
+
+@bench('parser.legacy_file', items=1_000_000, heavy=True)
+def bench_legacy_parser(scale):
+    path, count = _stat_file(scale)
+    BENCHMARKS['parser.legacy_file']['items'] = count
+
+    def op():
+        parsed = 0
+        with open(path, encoding='utf-8') as fh, redirect_stdout(io.StringIO()):
+            for line in fh:
+                if ':' in line:
+                    result = DataParser.parse_player_string(line)
+                else:
+                    result = DataParser.parse_game_score(line)
+                parsed += result is not None
+        return parsed
+    return op
+
+
+@bench('parser.bulk_file', items=1_000_000, heavy=True)
+def bench_bulk_parser(scale):
+    path, count = _stat_file(scale)
+    BENCHMARKS['parser.bulk_file']['items'] = count
+
+    def op():
+        parser = BulkDataParser()
+        with open(path, 'rb') as fh:
+            for _ in parser.parse_lines(fh):
+                pass
+        return parser.get_summary()
+    return op
+
+
+def _games(count):
+    parser = BulkDataParser(kind='score')
+    lines = (line for line in fixtures.stat_lines(count * 2, broken_every=0) if ':' not in line)
+    return [record['data'] for record in parser.parse_lines(lines) if record['ok']]
+
+
+@bench('teams.aggregator_feed', items=10_000)
+def bench_aggregator(scale):
+    games = _games(10_000)
+    BENCHMARKS['teams.aggregator_feed']['items'] = len(games)
+    return lambda: TeamStatsAggregator().feed(games)
+
+
+@bench('teams.elo_feed', items=10_000)
+def bench_elo(scale):
+    games = _games(10_000)
+    BENCHMARKS['teams.elo_feed']['items'] = len(games)
+    return lambda: EloRatingEngine().feed(games)
+
+
+# --- harness ---------------------------------------------------------------
+
+def calibrate(op, min_time):
+    """Smallest loop count in the 1, 2, 5, 10... series taking at least min_time."""
+    base = 1
+    while True:
+        for number in (base, base * 2, base * 5):
+            start = time.perf_counter()
+            for _ in range(number):
+                op()
+            if time.perf_counter() - start >= min_time or number >= 10 ** 7:
+                return number
+        base *= 10
+
+
+def time_op(op, repeats, min_time):
+    op()  # warm-up: caches, lazy imports, first-touch allocations
+    number = calibrate(op, min_time)
+    per_op = []
+    gc_was_enabled = gc.isenabled()
+    try:
+        for _ in range(repeats):
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            for _ in range(number):
+                op()
+            per_op.append((time.perf_counter() - start) / number)
+            gc.enable()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return number, per_op
+
+
+def measure_allocations(op):
+    """Peak traced bytes above the starting point during one call."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        op()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - before)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(__file__), timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(args):
+    pattern = re.compile(args.filter) if args.filter else None
+    results = {}
+    for name, spec in BENCHMARKS.items():
+        if pattern and not pattern.search(name):
+            continue
+        op = spec['setup'](args.scale)
+        repeats = args.heavy_repeats if spec['heavy'] else args.repeats
+        number, per_op = time_op(op, repeats, 0 if spec['heavy'] else args.min_time)
+        # Best-of-N is the least noisy figure on a shared machine (as in timeit);
+        # median and spread are kept to judge how trustworthy a run was
+        best, median = min(per_op), statistics.median(per_op)
+        result = {
+            'ops_per_sec': round(1 / best, 3),
+            'median_s': median,
+            'min_s': best,
+            'stdev_s': statistics.stdev(per_op) if len(per_op) > 1 else 0.0,
+            'loops': number,
+            'repeats': repeats,
+            'items_per_op': spec['items'],
+            'items_per_sec': round(spec['items'] / best, 1),
+        }
+        if not args.no_alloc:
+            result['alloc_peak_bytes'] = measure_allocations(op)
+        results[name] = result
+        alloc = f"{result.get('alloc_peak_bytes', 0) / 1024:>10,.1f} KiB" if not args.no_alloc else ''
+        print(f"{name:<34}{result['ops_per_sec']:>14,.1f} ops/s"
+              f"{result['items_per_sec']:>16,.0f} items/s{alloc}", flush=True)
+
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'scale': args.scale,
+        },
+        'benchmarks': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+def compare(args):
+    with open(args.baseline, encoding='utf-8') as fh:
+        baseline = json.load(fh)
+    with open(args.current, encoding='utf-8') as fh:
+        current = json.load(fh)
+
+    for key in ('python', 'machine', 'scale'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"warning: {key} differs ({baseline['meta'].get(key)} vs {current['meta'].get(key)})")
+
+    alloc_threshold = args.alloc_threshold if args.alloc_threshold is not None else args.threshold
+    regressions = 0
+    print(f"{'benchmark':<34}{'baseline':>14}{'current':>14}{'change':>9}  alloc")
+    for name, old in sorted(baseline['benchmarks'].items()):
+        new = current['benchmarks'].get(name)
+        if new is None:
+            print(f"{name:<34}{'missing from current run':>37}")
+            continue
+        change = new['ops_per_sec'] / old['ops_per_sec'] - 1
+        status = ''
+        if change < -args.threshold:
+            status = 'SLOWER'
+            regressions += 1
+
+        alloc = ''
+        old_alloc, new_alloc = old.get('alloc_peak_bytes'), new.get('alloc_peak_bytes')
+        if old_alloc is not None and new_alloc is not None:
+            alloc_change = (new_alloc - old_alloc) / max(old_alloc, 1)
+            alloc = f"{alloc_change:+.0%}"
+            # Tiny absolute numbers jitter by a few objects; ignore sub-KiB growth
+            if alloc_change > alloc_threshold and new_alloc - old_alloc > 1024:
+                status = f"{status} MORE-ALLOC".strip()
+                regressions += 1
+
+        print(f"{name:<34}{old['ops_per_sec']:>14,.1f}{new['ops_per_sec']:>14,.1f}"
+              f"{change:>+9.1%}  {alloc:<6} {status}")
+
+    for name in sorted(set(current['benchmarks']) - set(baseline['benchmarks'])):
+        print(f"{name:<34}{'new (no baseline)':>37}")
+
+    if regressions:
+        print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print("No regressions")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='time all benchmarks and save JSON')
+    run_parser.add_argument('--scale', type=float, default=1.0,
+                            help='fixture size factor (0.1 for a quick pass)')
+    run_parser.add_argument('--filter', help='regex on benchmark names')
+    run_parser.add_argument('--repeats', type=int, default=7)
+    run_parser.add_argument('--heavy-repeats', type=int, default=3)
+    run_parser.add_argument('--min-time', type=float, default=0.2,
+                            help='seconds per repeat for quick benchmarks')
+    run_parser.add_argument('--no-alloc', action='store_true', help='skip tracemalloc pass')
+    run_parser.add_argument('--output', default='micro.json')
+
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='allowed ops/sec drop (0.10 = 10%%)')
+    compare_parser.add_argument('--alloc-threshold', type=float,
+                                help='allowed allocation growth (defaults to --threshold)')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        return run(args)
+    return compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""Bytes on the wire for first and repeat page loads
+
+Collects static files into a temporary STATIC_ROOT, then fetches each
+page and every /static/ asset it references through the full middleware
+stack, with and without Accept-Encoding: gzip. A repeat load re-downloads
+the HTML plus any asset the browser may not keep (no far-future
+Cache-Control). Runs against a throwaway test database.
+Usage: python benchmarks/page_weight.py [chat_messages]   (default 40)
+"""
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings, setup_test_environment
+
+from core.models import ChatMessage, Todo
+from core.chat import convert_markdown_to_html
+
+PAGES = ['/', '/chat/', '/todo/', '/calories/']
+ASSET_RE = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+ANSWER = (
+    "**Free throws** come down to routine:\n\n"
+    "1. Square your feet to the rim\n"
+    "2. Keep the elbow under the ball\n"
+    "3. Follow through and hold it\n\n"
+    "Shoot 50 a day and track your percentage."
+)
+
+
+def body_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def is_cached(response):
+    # Only far-future responses are reused without a request
+    return 'immutable' in response.get('Cache-Control', '')
+
+
+def measure(client, url, encoding):
+    headers = {'HTTP_ACCEPT_ENCODING': encoding} if encoding else {}
+    page = client.get(url, **headers)
+    assert page.status_code == 200, (url, page.status_code)
+    html = body_size(page)
+    first = repeat = html
+    # Asset links come from an uncompressed copy of the same page
+    for asset in sorted(set(ASSET_RE.findall(client.get(url).content.decode()))):
+        response = client.get(asset, **headers)
+        size = body_size(response) if response.status_code == 200 else 0
+        first += size
+        if not is_cached(response):
+            repeat += size
+    return html, first, repeat
+
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        with tempfile.TemporaryDirectory() as static_root, override_settings(STATIC_ROOT=static_root):
+            call_command('collectstatic', interactive=False, verbosity=0)
+
+            user = User.objects.create_user('weight-bench', password='x')
+            answer_html = convert_markdown_to_html(ANSWER)
+            ChatMessage.objects.bulk_create([
+                ChatMessage(
+                    user=user, seq=n + 1,
+                    role='user' if n % 2 == 0 else 'assistant',
+                    raw_content='How do I fix my free throw?' if n % 2 == 0 else ANSWER,
+                    content='How do I fix my free throw?' if n % 2 == 0 else answer_html,
+                )
+                for n in range(messages)
+            ])
+            Todo.objects.bulk_create([Todo(user=user, title=f'Drill {n}') for n in range(10)])
+
+            client = Client()
+            client.force_login(user)
+            print("=" * 72)
+            print(f"PAGE WEIGHT ({messages} chat messages)")
+            print("=" * 72)
+            print(f"{'page':12} {'encoding':9} {'html':>9} {'first load':>12} {'repeat load':>12}")
+            for url in PAGES:
+                for encoding in ('', 'gzip'):
+                    html, first, repeat = measure(client, url, encoding)
+                    print(f"{url:12} {encoding or 'identity':9} {html:9d} {first:12d} {repeat:12d}")
+            print("=" * 72)
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""Throughput benchmark: DataParser (per line) vs BulkDataParser (streaming)
+
+Usage: python benchmarks/parser_throughput.py [lines]
+"""
+import io
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.algorithms import DataParser, BulkDataParser
+
+NAMES = ['LeBron James', 'Stephen Curry', 'Kevin Durant', 'Luka Doncic', 'Nikola Jokic']
+TEAMS = ['Lakers', 'Celtics', 'Warriors', 'Bulls', 'Heat']
+
+
+def generate_lines(count, seed=42):
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        if i % 2:
+            lines.append(
+                f"{rng.choice(NAMES)}: {rng.uniform(5, 35):.1f} PPG, "
+                f"{rng.uniform(1, 15):.1f} RPG, {rng.uniform(1, 12):.1f} APG"
+            )
+        else:
+            lines.append(
+                f"{rng.choice(TEAMS)} {rng.randint(80, 130)} - "
+                f"{rng.randint(80, 130)} {rng.choice(TEAMS)}"
+            )
+        if i % 100 == 0:
+            lines[-1] = "broken line without stats"
+    return lines
+
+
+def bench_legacy(lines):
+    parsed = 0
+    # legacy parser prints its errors; keep them out of the timing output
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for line in lines:
+            if ':' in line:
+                result = DataParser.parse_player_string(line)
+            else:
+                result = DataParser.parse_game_score(line)
+            if result:
+                parsed += 1
+        elapsed = time.perf_counter() - start
+    return elapsed, parsed
+
+
+def bench_bulk(lines, serialize):
+    payload = io.BytesIO('\n'.join(lines).encode('utf-8'))
+    parser = BulkDataParser(kind='auto')
+    stream = parser.to_jsonl(payload) if serialize else parser.parse_lines(payload)
+    start = time.perf_counter()
+    for _ in stream:
+        pass
+    elapsed = time.perf_counter() - start
+    return elapsed, parser.lines_parsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    lines = generate_lines(count)
+
+    print("=" * 60)
+    print(f"PARSER THROUGHPUT ({count} lines)")
+    print("=" * 60)
+
+    legacy_time, legacy_parsed = bench_legacy(lines)
+    print(f"DataParser (per line, no output):  {count / legacy_time:>12,.0f} lines/s  ({legacy_parsed} parsed)")
+
+    bulk_time, bulk_parsed = bench_bulk(lines, serialize=False)
+    print(f"BulkDataParser (parse only):       {count / bulk_time:>12,.0f} lines/s  ({bulk_parsed} parsed)")
+
+    bulk_time, bulk_parsed = bench_bulk(lines, serialize=True)
+    print(f"BulkDataParser (parse + JSONL):    {count / bulk_time:>12,.0f} lines/s  ({bulk_parsed} parsed)")
+
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
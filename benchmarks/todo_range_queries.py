@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""Query plans and timing for the todo range endpoint on a large table
+
+Runs against a throwaway test database, never against db.sqlite3.
+Usage: python benchmarks/todo_range_queries.py [rows]
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count, Q
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.test.runner import DiscoverRunner
+
+from core.models import Todo
+
+USERS = 50
+START = date(2026, 3, 1)
+END = date(2026, 3, 31)
+
+
+def populate(rows):
+    rng = random.Random(7)
+    users = User.objects.bulk_create([User(username=f'bench{i}') for i in range(USERS)])
+    batch = []
+    for i in range(rows):
+        batch.append(Todo(
+            user=users[i % USERS],
+            title=f'Drill {i}',
+            date=START + timedelta(days=rng.randint(-365, 365)),
+            completed=rng.random() < 0.4,
+        ))
+        if len(batch) == 10_000:
+            Todo.objects.bulk_create(batch)
+            batch = []
+    Todo.objects.bulk_create(batch)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE' if connection.vendor == 'sqlite' else 'ANALYZE core_todo')
+    return users[0]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        user = populate(rows)
+        in_range = Todo.objects.filter(user=user, date__range=(START, END))
+
+        print("=" * 60)
+        print(f"TODO RANGE QUERIES ({rows} rows, {USERS} users)")
+        print("=" * 60)
+        print("Per-day aggregate plan:")
+        print(in_range.order_by('date').values('date').annotate(
+            total=Count('id'), completed=Count('id', filter=Q(completed=True))
+        ).explain())
+        print("Todo list plan:")
+        print(in_range.order_by('date', 'created_at').values('id', 'title').explain())
+        print("-" * 60)
+
+        client = Client()
+        client.force_login(user)
+        url = f'/todo/range/?start={START}&end={END}'
+        client.get(url)
+
+        with CaptureQueriesContext(connection) as ctx:
+            t0 = time.perf_counter()
+            client.get(url)
+            range_time = time.perf_counter() - t0
+        print(f"Range endpoint:      {range_time * 1000:8.2f} ms, {len(ctx)} queries")
+
+        with CaptureQueriesContext(connection) as ctx:
+            t0 = time.perf_counter()
+            day = START
+            while day <= END:
+                list(Todo.objects.filter(user=user, date=day).order_by('-created_at'))
+                day += timedelta(days=1)
+            daily_time = time.perf_counter() - t0
+        print(f"Day-by-day lookups:  {daily_time * 1000:8.2f} ms, {len(ctx)} queries "
+              f"(plus one page render per day)")
+        print("=" * 60)
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,22 +7,27 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
 django.setup()
 
+from core.analytics import chat_stats, update_chat_rollups
 from core.models import ChatMessage
 
 print("\n" + "="*60)
 print("CHAT MESSAGES IN DATABASE:")
 print("="*60)
 
-messages = ChatMessage.objects.all().order_by('-created_at')[:20]
+# Newest first by primary key: one index walk, no sort over the table
+messages = ChatMessage.objects.prefetch_related('user').order_by('-id')[:20]
 if messages:
     for msg in messages:
-        content = msg.content[:80].replace('\n', ' ')
-        print(f"[{msg.created_at}] Session: {msg.session_id[:12]}...")
+        content = msg.raw_content[:80].replace('\n', ' ')
+        username = msg.user.username if msg.user else '-'
+        print(f"[{msg.created_at}] User: {username} #{msg.seq}")
         print(f"  Role: {msg.role:10} | Content: {content}")
         print()
 else:
     print("No messages found")
 
+update_chat_rollups()
+totals = chat_stats(days=366)["totals"]
 print("="*60)
-print(f"Total messages: {ChatMessage.objects.count()}")
+print(f"Messages in the last year: {totals['messages']} (from rollups)")
 print("="*60 + "\n")
@@ -3,18 +3,77 @@
 =================================
 1. Оптимізація чату - управління контекстом
 2. Обробка баскетбольних даних - парсинг та аналітика
+3. Потоковий парсинг великих файлів
+4. Інкрементальна аналітика команд
+5. Рейтинги Elo та симуляція сезону
+6. Добова норма калорій - одна людина та пакетний розрахунок
 """
 
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Iterable, Iterator
 from collections import deque
+from collections.abc import Mapping
+from itertools import islice
+import csv
+import heapq
+import io
+import json
+import math
+import numbers
 import re
+import sys
+import time
 
 
 # ============================================================================
 # 1️⃣ ОПТИМІЗАЦІЯ ЧАТУ - УПРАВЛІННЯ КОНТЕКСТОМ
 # ============================================================================
 
+# Приблизна вага порожнього контексту (об'єкт + deque), запису без тексту
+# (об'єкт зі слотами + числа) та одного терміну в BM25 індексі -
+# для обліку пам'яті контекстів
+CONTEXT_OVERHEAD_BYTES = 1100
+RECORD_OVERHEAD_BYTES = 80
+POSTING_BYTES = 120
+
+
+class ChatRecord(Mapping):
+    """
+    Компактний запис повідомлення в історії
+    - __slots__ замість dict, час - epoch int, токени пораховані один раз
+    - сам є Mapping {'role', 'content'}, тож іде в API без копіювання
+    - тільки для читання: записи спільні для історії та payload
+    """
+    __slots__ = ('role', 'content', 'timestamp', 'tokens', 'turn')
+
+    def __init__(self, role: str, content: str, timestamp: Optional[int] = None, turn: int = 0):
+        self.role = role
+        self.content = content
+        self.timestamp = int(time.time()) if timestamp is None else timestamp
+        # Приблизний підрахунок токенів (1 токен ≈ 4 символи)
+        self.tokens = len(content) // 4
+        self.turn = turn
+
+    def __getitem__(self, key: str) -> str:
+        if key == 'role':
+            return self.role
+        if key == 'content':
+            return self.content
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(('role', 'content'))
+
+    def __len__(self) -> int:
+        return 2
+
+    def __repr__(self) -> str:
+        return f"ChatRecord({self.role!r}, {self.content[:30]!r}, turn={self.turn})"
+
+    @property
+    def memory_bytes(self) -> int:
+        return RECORD_OVERHEAD_BYTES + sys.getsizeof(self.content)
+
+
 class ChatContextManager:
     """
     Управління контекстом розмови для AI чату
@@ -27,48 +86,54 @@ class ChatContextManager:
         self.max_messages = max_messages
         self.max_tokens = max_tokens
         self.conversation_history = deque(maxlen=max_messages)
+        self.history_bytes = 0
         
     def add_message(self, role: str, content: str):
         """Додає повідомлення до історії"""
-        message = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now()
-        }
-        self.conversation_history.append(message)
+        history = self.conversation_history
+        size = RECORD_OVERHEAD_BYTES + sys.getsizeof(content)
+        if len(history) == self.max_messages:
+            # deque сам відкине найстаріший запис - знімаємо його з обліку
+            size -= history[0].memory_bytes
+        history.append(ChatRecord(role, content))
+        self.history_bytes += size
+
+    def load_history(self, messages: Iterable[tuple]):
+        """Відновлює контекст з бази: пари (role, content) у хронологічному порядку"""
+        for role, content in messages:
+            self.add_message(role, content)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Приблизний розмір контексту в пам'яті"""
+        return CONTEXT_OVERHEAD_BYTES + self.history_bytes
     
-    def get_context_for_api(self) -> List[Dict[str, str]]:
+    def get_context_for_api(self) -> List[Mapping]:
         """
         Повертає контекст для OpenAI API
         Обрізає старі повідомлення якщо перевищено ліміт токенів
+        Записи віддаються як є, без копій
         """
         messages = []
         total_tokens = 0
         
         # Проходимо з кінця (найновіші повідомлення важливіші)
-        for msg in reversed(self.conversation_history):
-            # Приблизний підрахунок токенів (1 токен ≈ 4 символи)
-            msg_tokens = len(msg["content"]) // 4
-            
-            if total_tokens + msg_tokens > self.max_tokens:
+        for record in reversed(self.conversation_history):
+            if total_tokens + record.tokens > self.max_tokens:
                 break
-                
-            messages.insert(0, {
-                "role": msg["role"],
-                "content": msg["content"]
-            })
-            total_tokens += msg_tokens
+            messages.append(record)
+            total_tokens += record.tokens
         
+        messages.reverse()
         return messages
     
     def clear_old_messages(self, hours: int = 24):
         """Видаляє повідомлення старші за вказану кількість годин"""
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        self.conversation_history = deque(
-            [msg for msg in self.conversation_history 
-             if msg["timestamp"] > cutoff_time],
-            maxlen=self.max_messages
-        )
+        cutoff = time.time() - hours * 3600
+        history = self.conversation_history
+        # Історія хронологічна - достатньо зрізати голову
+        while history and history[0].timestamp <= cutoff:
+            self.history_bytes -= history.popleft().memory_bytes
     
     def get_conversation_summary(self) -> str:
         """Створює короткий саммарі розмови"""
@@ -97,8 +162,8 @@ class ChatContextManager:
         }
         
         topics = set()
-        for msg in self.conversation_history:
-            content_lower = msg["content"].lower()
+        for record in self.conversation_history:
+            content_lower = record.content.lower()
             for keyword, topic in basketball_keywords.items():
                 if keyword in content_lower:
                     topics.add(topic)
@@ -106,6 +171,183 @@ class ChatContextManager:
         return list(topics)[:3]  # Топ-3 теми
 
 
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Найчастіші службові слова, які лише розмивають оцінку релевантності
+STOPWORDS = frozenset(
+    'the a an and or of to in on for is are was it i you me my how what do does '
+    'this that with be can як що це і й та в у на до з за чи мені я ти не а'.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Токени для пошуку: нижній регістр, без стоп-слів та одиночних символів"""
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Інкрементальний BM25 індекс у пам'яті
+    - add/remove документа - O(довжини документа)
+    - search рахує оцінку лише для документів зі спільними термінами
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[Any, int]] = {}
+        self.doc_terms: Dict[Any, Dict[str, int]] = {}
+        self.doc_lengths: Dict[Any, int] = {}
+        self.total_length = 0
+        self.term_entries = 0  # (термін, документ) пар - для оцінки пам'яті
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: Any, text: str):
+        """Додає (або замінює) документ"""
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+
+        tokens = tokenize(text)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self.doc_terms[doc_id] = counts
+        self.doc_lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+        self.term_entries += len(counts)
+
+    def remove(self, doc_id: Any):
+        counts = self.doc_terms.pop(doc_id, None)
+        if counts is None:
+            return
+        for term in counts:
+            docs = self.postings[term]
+            del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        self.term_entries -= len(counts)
+
+    def search(self, query: str, top_k: int = 3, exclude: Iterable[Any] = ()) -> List[tuple]:
+        """Повертає до top_k пар (doc_id, score) з найбільшою оцінкою"""
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return []
+
+        exclude = set(exclude)
+        avg_length = self.total_length / n_docs or 1.0
+        k1, b = self.k1, self.b
+        scores: Dict[Any, float] = {}
+
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                if doc_id in exclude:
+                    continue
+                norm = k1 * (1 - b + b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+class RetrievalContextManager(ChatContextManager):
+    """
+    Контекст = релевантні минулі репліки + кілька останніх повідомлень
+    - кожна пара питання/відповідь індексується у BM25 (без мережі)
+    - останні recent_messages повідомлень мають пріоритет у бюджеті токенів
+    - решта бюджету віддається найрелевантнішим старим парам
+    """
+
+    def __init__(self, max_messages: int = 10, max_tokens: int = 3000,
+                 recent_messages: int = 4, top_k: int = 3, max_indexed_turns: int = 500):
+        super().__init__(max_messages=max_messages, max_tokens=max_tokens)
+        self.recent_messages = recent_messages
+        self.top_k = top_k
+        self.max_indexed_turns = max_indexed_turns
+        self.index = BM25Index()
+        # номер пари -> [запис питання, запис відповіді або None]
+        self.turns: Dict[int, list] = {}
+        self.turn_order = deque()
+        self.current_turn = 0
+        self.turn_bytes = 0
+
+    def add_message(self, role: str, content: str):
+        """Додає повідомлення і оновлює індекс, коли пара завершена"""
+        super().add_message(role, content)
+        record = self.conversation_history[-1]
+
+        if role == "user":
+            self.current_turn += 1
+            self.turns[self.current_turn] = [record, None]
+            self.turn_order.append(self.current_turn)
+            self.turn_bytes += record.memory_bytes
+            if len(self.turn_order) > self.max_indexed_turns:
+                self._drop_turn(self.turn_order.popleft())
+        elif self.current_turn in self.turns:
+            turn = self.turns[self.current_turn]
+            turn[1] = record
+            self.turn_bytes += record.memory_bytes
+            self.index.add(self.current_turn, f"{turn[0].content} {content}")
+
+        record.turn = self.current_turn
+
+    def _drop_turn(self, turn_id: int):
+        for record in self.turns.pop(turn_id, ()):
+            if record is not None:
+                self.turn_bytes -= record.memory_bytes
+        self.index.remove(turn_id)
+
+    @property
+    def memory_bytes(self) -> int:
+        # Останні записи лічаться і в історії, і в парах - оцінка трохи завищена
+        return (CONTEXT_OVERHEAD_BYTES + self.history_bytes + self.turn_bytes
+                + self.index.term_entries * POSTING_BYTES)
+
+    def get_context_for_api(self, query: Optional[str] = None) -> List[Mapping]:
+        history = self.conversation_history
+        if query is None:
+            query = next((r.content for r in reversed(history) if r.role == "user"), "")
+
+        # Останні повідомлення - від найновішого, поки вміщаються в бюджет
+        recent = []
+        total_tokens = 0
+        for record in islice(reversed(history), self.recent_messages):
+            if total_tokens + record.tokens > self.max_tokens:
+                break
+            recent.append(record)
+            total_tokens += record.tokens
+        recent.reverse()
+
+        # Відповідь без свого питання лише витрачає токени
+        if len(recent) > 1 and recent[0].role == "assistant":
+            total_tokens -= recent.pop(0).tokens
+
+        # Старі пари, що найкраще відповідають питанню
+        recent_turns = {record.turn for record in recent}
+        retrieved = []
+        for turn_id, _score in self.index.search(query, self.top_k, exclude=recent_turns):
+            question, answer = self.turns[turn_id]
+            turn_tokens = question.tokens + answer.tokens
+            if total_tokens + turn_tokens > self.max_tokens:
+                continue
+            retrieved.append(turn_id)
+            total_tokens += turn_tokens
+
+        messages = []
+        for turn_id in sorted(retrieved):
+            messages.extend(self.turns[turn_id])
+        messages.extend(recent)
+        return messages
+
+
 class ResponseFilter:
     """
     Фільтрація та валідація відповідей AI
@@ -163,6 +405,86 @@ class ResponseFilter:
         return response
 
 
+class ChatRouter:
+    """
+    Локальний вибір маршруту для репліки (без звернень до мережі)
+    - ознаки: довжина, ключові слова ResponseFilter, стан розмови
+    - маршрут -> модель, глибина контексту, max_tokens з таблиці routes
+    - routes: {'small_talk': {...}, 'quick': {...}, 'detailed': {...}}
+    """
+
+    # Репліки лише з цих слів - привітання та подяки, відповідь коротка
+    ACKNOWLEDGEMENTS = frozenset(
+        'hi hello hey yo thanks thank you thx ty ok okay cool bye great nice good '
+        'morning evening night got it sure yes yep no nope awesome perfect much lot a so very '
+        'привіт вітаю дякую спасибі ок добре бувай круто чудово так ні зрозуміло '
+        'дуже тобі вам ранок вечір доброго добрий'.split()
+    )
+    # Питальні слова: коротке питання отримує звичайний маршрут
+    QUESTION_WORDS = frozenset(
+        'what how who whom whose when where which why can could should would will '
+        'do does did is are was were am '
+        'що як хто коли де який яка яке які чи скільки навіщо куди звідки чому'.split()
+    )
+    # Ознаки запиту на розгорнуту відповідь, лише з початку слова:
+    # англійські - цілими словами, українські - основою з будь-яким закінченням
+    DETAIL_MARKER_RE = re.compile(
+        r'\b(?:(?P<en>plans?|programs?|schedules?|compare|comparison|explain|explanation|why|'
+        r'strateg(?:y|ies)|analy[sz]e|analysis|step by step|detailed|workouts?)\b'
+        r'|(?P<uk>план|програм|розклад|порівня|поясни|чому|стратег|аналіз|'
+        r'детальн|покроково|тренуван)\w*)',
+        re.UNICODE
+    )
+    LONG_MESSAGE_WORDS = 40
+    SHORT_MESSAGE_WORDS = 6
+
+    def __init__(self, routes: Dict[str, Dict[str, Any]], default: str = 'quick'):
+        self.routes = routes
+        self.default = default
+
+    @classmethod
+    def detail_markers(cls, text: str) -> List[str]:
+        """Знайдені ознаки розгорнутої відповіді, без повторів, у порядку появи"""
+        found = []
+        for match in cls.DETAIL_MARKER_RE.finditer(text):
+            marker = match.group('en') or match.group('uk')
+            if marker not in found:
+                found.append(marker)
+        return found
+
+    def classify(self, message: str, history_length: int = 0) -> tuple:
+        """Повертає (маршрут, причини)"""
+        text = message.lower()
+        words = TOKEN_RE.findall(text)
+        reasons = []
+
+        if len(words) >= self.LONG_MESSAGE_WORDS:
+            reasons.append('long')
+        if text.count('?') > 1 or message.count('\n') > 1:
+            reasons.append('multi_part')
+        reasons.extend(f'marker:{m}' for m in self.detail_markers(text))
+        if reasons:
+            return 'detailed', reasons
+
+        if len(words) <= self.SHORT_MESSAGE_WORDS:
+            # Лише привітання та подяки; будь-яке питання - звичайний маршрут
+            if words and '?' not in text and all(word in self.ACKNOWLEDGEMENTS for word in words):
+                return 'small_talk', ['greeting']
+            if '?' in text or (words and words[0] in self.QUESTION_WORDS):
+                return self.default, ['question']
+            if history_length:
+                return self.default, ['follow_up']
+
+        return self.default, ['default']
+
+    def route(self, message: str, history_length: int = 0) -> Dict[str, Any]:
+        """Рішення для однієї репліки: маршрут, параметри з таблиці та причини"""
+        name, reasons = self.classify(message, history_length)
+        if name not in self.routes:
+            name = self.default
+        return {'route': name, **self.routes[name], 'reasons': reasons}
+
+
 # ============================================================================
 # 2️⃣ ОБРОБКА БАСКЕТБОЛЬНИХ ДАНИХ
 # ============================================================================
@@ -403,4 +725,750 @@ class DataParser:
         except Exception as e:
             print(f"Помилка парсингу рахунку: {e}")
         
-        return None
\ No newline at end of file
+        return None
+
+# ============================================================================
+# 3️⃣ ПОТОКОВИЙ ПАРСИНГ ВЕЛИКИХ ФАЙЛІВ
+# ============================================================================
+
+# Патерни компілюються один раз при імпорті модуля
+PLAYER_STAT_RE = re.compile(r'(\d+(?:\.\d+)?|\.\d+)\s*(PPG|RPG|APG)\b')
+GAME_SCORE_RE = re.compile(
+    r'^(?P<team1>\S.*?)\s+(?P<score1>\d+)\s*[-–]\s*(?P<score2>\d+)\s+(?P<team2>\S.*?)$'
+)
+PLAYER_STAT_KEYS = {'PPG': 'ppg', 'RPG': 'rpg', 'APG': 'apg'}
+# Довші рядки не є статистикою: відкидаємо їх до регулярних виразів
+BULK_MAX_LINE_LENGTH = 1000
+
+
+class BulkDataParser:
+    """
+    Потоковий парсер рядків статистики та рахунків матчів
+    - працює з генераторами, не тримає файл у пам'яті
+    - для кожного рядка повертає запис з даними або з описом помилки
+    - kind: 'player', 'score' або 'auto' (визначається по рядку)
+    - рядки довші за max_line_length символів повертаються як помилки
+    """
+
+    KINDS = ('player', 'score', 'auto')
+
+    def __init__(self, kind: str = 'auto', encoding: str = 'utf-8',
+                 max_line_length: int = BULK_MAX_LINE_LENGTH):
+        if kind not in self.KINDS:
+            raise ValueError(f"Невідомий тип даних: {kind}")
+        self.kind = kind
+        self.encoding = encoding
+        self.max_line_length = max_line_length
+        self.lines_total = 0
+        self.lines_parsed = 0
+        self.lines_failed = 0
+
+    @staticmethod
+    def parse_player_line(line: str) -> Dict[str, Any]:
+        """Парсить "LeBron James: 25.7 PPG, 7.8 RPG, 10.2 APG" без винятків"""
+        name, sep, stats = line.partition(':')
+        if not sep or ':' in stats:
+            raise ValueError("очікується рівно один роздільник ':'")
+
+        name = name.strip()
+        if not name:
+            raise ValueError("порожнє ім'я гравця")
+
+        data = {'name': name}
+        for value, stat in PLAYER_STAT_RE.findall(stats):
+            data[PLAYER_STAT_KEYS[stat]] = float(value)
+        if len(data) == 1:
+            raise ValueError("не знайдено PPG/RPG/APG")
+
+        return data
+
+    @staticmethod
+    def parse_score_line(line: str) -> Dict[str, Any]:
+        """Парсить "Golden State Warriors 110 - 98 Boston Celtics" """
+        match = GAME_SCORE_RE.match(line)
+        if not match:
+            raise ValueError("очікується формат 'Команда 1 105 - 98 Команда 2'")
+
+        team1, team2 = match.group('team1'), match.group('team2')
+        score1, score2 = int(match.group('score1')), int(match.group('score2'))
+
+        return {
+            'team1': team1,
+            'score1': score1,
+            'team2': team2,
+            'score2': score2,
+            'winner': team1 if score1 > score2 else team2,
+            'margin': abs(score1 - score2)
+        }
+
+    def parse_lines(self, source: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Генератор записів по одному на кожен непорожній рядок
+        {'line': 3, 'ok': True, 'type': 'player', 'data': {...}}
+        {'line': 4, 'ok': False, 'error': '...', 'raw': '...'}
+        """
+        parse_player = self.parse_player_line
+        parse_score = self.parse_score_line
+        encoding = self.encoding
+        max_length = self.max_line_length
+
+        for line_no, line in enumerate(source, 1):
+            # Файли та тіло запиту віддають байти, списки - рядки
+            if isinstance(line, bytes):
+                line = line.decode(encoding, errors='replace')
+            line = line.strip()
+            if not line:
+                continue
+            self.lines_total += 1
+
+            kind = self.kind
+            if kind == 'auto':
+                kind = 'player' if ':' in line else 'score'
+
+            try:
+                if len(line) > max_length:
+                    raise ValueError(f"рядок довший за {max_length} символів")
+                data = parse_player(line) if kind == 'player' else parse_score(line)
+            except ValueError as e:
+                self.lines_failed += 1
+                yield {'line': line_no, 'ok': False, 'type': kind,
+                       'error': str(e), 'raw': line[:200]}
+                continue
+
+            self.lines_parsed += 1
+            yield {'line': line_no, 'ok': True, 'type': kind, 'data': data}
+
+    def get_summary(self) -> Dict[str, int]:
+        """Підсумок після проходу генератора"""
+        return {
+            'lines': self.lines_total,
+            'parsed': self.lines_parsed,
+            'errors': self.lines_failed
+        }
+
+    def to_jsonl(self, source: Iterable[Any], batch_size: int = 500) -> Iterator[str]:
+        """
+        Серіалізує записи у JSONL, останній рядок - підсумок
+        Рядки групуються по batch_size, щоб не писати у сокет по одному
+        """
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+        batch = []
+        for record in self.parse_lines(source):
+            batch.append(dumps(record))
+            if len(batch) >= batch_size:
+                batch.append('')
+                yield '\n'.join(batch)
+                batch = []
+        batch.append(dumps({'summary': self.get_summary()}))
+        batch.append('')
+        yield '\n'.join(batch)
+
+
+# ============================================================================
+# 4️⃣ ІНКРЕМЕНТАЛЬНА АНАЛІТИКА КОМАНД
+# ============================================================================
+
+class RollingWindow:
+    """
+    Ковзне вікно фіксованого розміру з поточними сумами
+    Додавання гри - O(1): віднімаємо найстаріший запис, додаємо новий
+    """
+
+    __slots__ = ('size', 'items', 'sums')
+
+    def __init__(self, size: int, width: int):
+        if size < 1:
+            raise ValueError(f"розмір вікна має бути не менше 1, отримано {size}")
+        self.size = size
+        self.items = deque()
+        self.sums = [0] * width
+
+    def push(self, values: tuple):
+        """Додає запис, витісняючи найстаріший якщо вікно заповнене"""
+        sums = self.sums
+        if len(self.items) == self.size:
+            old = self.items.popleft()
+            for i, value in enumerate(old):
+                sums[i] -= value
+        self.items.append(values)
+        for i, value in enumerate(values):
+            sums[i] += value
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class TeamStatsAggregator:
+    """
+    Статистика команд з потоку результатів матчів
+    - накопичувальні суми за сезон
+    - ковзні вікна (останні 5/10 ігор)
+    - зріз по будь-якій команді без повторного проходу історії
+
+    Формат гри - як у DataParser.parse_game_score:
+    {'team1': 'Lakers', 'score1': 105, 'team2': 'Celtics', 'score2': 98}
+    Необов'язково: 'rebounds1', 'assists1', 'rebounds2', 'assists2'
+    """
+
+    # Порядок полів у записі однієї гри
+    FIELDS = ('points_for', 'points_against', 'rebounds', 'assists', 'win')
+
+    def __init__(self, windows: tuple = (5, 10)):
+        if any(size < 1 for size in windows):
+            raise ValueError(f"розміри вікон мають бути не менше 1: {windows}")
+        self.windows = tuple(sorted(windows))
+        self.teams: Dict[str, Dict[str, Any]] = {}
+        self.games_processed = 0
+
+    def _get_team(self, name: str) -> Dict[str, Any]:
+        team = self.teams.get(name)
+        if team is None:
+            width = len(self.FIELDS)
+            team = {
+                'games': 0,
+                'totals': [0] * width,
+                'windows': {size: RollingWindow(size, width) for size in self.windows}
+            }
+            self.teams[name] = team
+        return team
+
+    def record_team_game(self, name: str, points_for: int, points_against: int,
+                         rebounds: int = 0, assists: int = 0):
+        """Оновлює суми та вікна однієї команди за одну гру"""
+        values = (points_for, points_against, rebounds, assists,
+                  1 if points_for > points_against else 0)
+
+        team = self._get_team(name)
+        team['games'] += 1
+        totals = team['totals']
+        for i, value in enumerate(values):
+            totals[i] += value
+        for window in team['windows'].values():
+            window.push(values)
+
+    def add_game(self, game: Dict[str, Any]):
+        """Додає результат матчу для обох команд"""
+        score1, score2 = game['score1'], game['score2']
+        self.record_team_game(game['team1'], score1, score2,
+                              game.get('rebounds1', 0), game.get('assists1', 0))
+        self.record_team_game(game['team2'], score2, score1,
+                              game.get('rebounds2', 0), game.get('assists2', 0))
+        self.games_processed += 1
+
+    def feed(self, games: Iterable[Optional[Dict[str, Any]]]) -> int:
+        """Обробляє потік ігор (None пропускаються), повертає кількість доданих"""
+        added = 0
+        for game in games:
+            if game:
+                self.add_game(game)
+                added += 1
+        return added
+
+    def _averages(self, sums: List[int], games: int) -> Dict[str, Any]:
+        if not games:
+            return {'games': 0, 'wins': 0, 'team_ppg': 0, 'opp_ppg': 0,
+                    'team_rpg': 0, 'team_apg': 0, 'point_diff': 0}
+        points_for, points_against, rebounds, assists, wins = sums
+        return {
+            'games': games,
+            'wins': wins,
+            'team_ppg': round(points_for / games, 1),
+            'opp_ppg': round(points_against / games, 1),
+            'team_rpg': round(rebounds / games, 1),
+            'team_apg': round(assists / games, 1),
+            'point_diff': round((points_for - points_against) / games, 1)
+        }
+
+    def get_team_snapshot(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Поточна статистика команди
+        Ключі team_ppg/team_rpg/team_apg сумісні з GameAnalyzer.predict_winner
+        """
+        team = self.teams.get(name)
+        if team is None:
+            return None
+
+        snapshot = self._averages(team['totals'], team['games'])
+        snapshot['team'] = name
+        snapshot['losses'] = snapshot['games'] - snapshot['wins']
+        snapshot['win_pct'] = round(snapshot['wins'] / snapshot['games'], 3)
+        for size, window in team['windows'].items():
+            snapshot[f'last_{size}'] = self._averages(window.sums, len(window))
+        return snapshot
+
+    def get_all_snapshots(self) -> List[Dict[str, Any]]:
+        """Зрізи всіх команд, відсортовані за відсотком перемог"""
+        snapshots = [self.get_team_snapshot(name) for name in self.teams]
+        return sorted(snapshots, key=lambda s: (s['win_pct'], s['point_diff']), reverse=True)
+
+
+# ============================================================================
+# 5️⃣ РЕЙТИНГИ ELO ТА СИМУЛЯЦІЯ СЕЗОНУ
+# ============================================================================
+
+class EloRatingEngine:
+    """
+    Рейтинг Elo, що оновлюється інкрементально з потоку матчів
+    - поточні рейтинги зберігаються у таблиці (команда -> індекс -> рейтинг)
+    - predict рахує тисячі пар за один виклик (NumPy)
+    - k_factor масштабується на різницю в рахунку (margin of victory)
+    """
+
+    def __init__(self, k_factor: float = 20.0, initial_rating: float = 1500.0,
+                 home_advantage: float = 0.0, use_margin: bool = True):
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+        self.home_advantage = home_advantage
+        self.use_margin = use_margin
+        self.team_index: Dict[str, int] = {}
+        self.teams: List[str] = []
+        self.ratings: List[float] = []
+        self.games_processed = 0
+
+    def _get_index(self, name: str) -> int:
+        index = self.team_index.get(name)
+        if index is None:
+            index = len(self.teams)
+            self.team_index[name] = index
+            self.teams.append(name)
+            self.ratings.append(self.initial_rating)
+        return index
+
+    @staticmethod
+    def expected_score(rating1: float, rating2: float) -> float:
+        """Ймовірність перемоги першої команди"""
+        return 1.0 / (1.0 + 10 ** ((rating2 - rating1) / 400.0))
+
+    def process_game(self, game: Dict[str, Any]):
+        """
+        Оновлює рейтинги за одну гру (team1 вважається господарем)
+        Формат - як у DataParser.parse_game_score
+        """
+        i1 = self._get_index(game['team1'])
+        i2 = self._get_index(game['team2'])
+        score1, score2 = game['score1'], game['score2']
+
+        rating1 = self.ratings[i1] + self.home_advantage
+        rating2 = self.ratings[i2]
+        expected = self.expected_score(rating1, rating2)
+
+        if score1 > score2:
+            actual = 1.0
+        elif score1 < score2:
+            actual = 0.0
+        else:
+            actual = 0.5
+
+        k = self.k_factor
+        if self.use_margin and score1 != score2:
+            # Множник як у FiveThirtyEight: більша перемога - більший зсув,
+            # але перемога фаворита важить менше
+            winner_diff = rating1 - rating2 if actual == 1.0 else rating2 - rating1
+            k *= math.log(abs(score1 - score2) + 1) * 2.2 / (winner_diff * 0.001 + 2.2)
+
+        delta = k * (actual - expected)
+        self.ratings[i1] += delta
+        self.ratings[i2] -= delta
+        self.games_processed += 1
+
+    def feed(self, games: Iterable[Optional[Dict[str, Any]]]) -> int:
+        """Обробляє потік ігор (None пропускаються), повертає кількість доданих"""
+        added = 0
+        for game in games:
+            if game:
+                self.process_game(game)
+                added += 1
+        return added
+
+    def get_rating(self, name: str) -> float:
+        index = self.team_index.get(name)
+        return self.ratings[index] if index is not None else self.initial_rating
+
+    def get_ratings_table(self) -> List[Dict[str, Any]]:
+        """Таблиця рейтингів, відсортована за спаданням"""
+        table = sorted(zip(self.teams, self.ratings), key=lambda x: x[1], reverse=True)
+        return [
+            {'rank': i, 'team': team, 'rating': round(rating, 1)}
+            for i, (team, rating) in enumerate(table, 1)
+        ]
+
+    def win_probabilities(self, matchups: List[tuple]):
+        """
+        Масив ймовірностей перемоги team1 для списку пар (team1, team2)
+        Невідомі команди отримують початковий рейтинг
+        """
+        import numpy as np
+
+        table = np.append(np.asarray(self.ratings, dtype=np.float64), self.initial_rating)
+        unknown = len(self.ratings)
+        get = self.team_index.get
+        idx1 = np.fromiter((get(t1, unknown) for t1, _ in matchups), dtype=np.intp, count=len(matchups))
+        idx2 = np.fromiter((get(t2, unknown) for _, t2 in matchups), dtype=np.intp, count=len(matchups))
+
+        diff = table[idx2] - (table[idx1] + self.home_advantage)
+        return 1.0 / (1.0 + np.power(10.0, diff / 400.0))
+
+    def predict(self, matchups: List[tuple]) -> List[Dict[str, Any]]:
+        """
+        Прогноз для багатьох пар одним викликом
+        Формат відповіді близький до GameAnalyzer.predict_winner
+        """
+        probabilities = self.win_probabilities(matchups)
+
+        results = []
+        for (team1, team2), p in zip(matchups, probabilities.tolist()):
+            if p > 0.5:
+                winner, probability = team1, p
+            elif p < 0.5:
+                winner, probability = team2, 1.0 - p
+            else:
+                winner, probability = 'Рівні шанси', 0.5
+            results.append({
+                'team1': team1,
+                'team2': team2,
+                'predicted_winner': winner,
+                'probability': round(probability * 100, 1),
+                'team1_win_probability': round(p, 4)
+            })
+        return results
+
+
+def _simulate_season_chunk(probabilities, home_idx, away_idx, base_wins,
+                           n_simulations: int, top_n: int, seed) -> Dict[str, Any]:
+    """
+    Симулює n_simulations сезонів (окрема функція - щоб передавати у процеси)
+    Повертає суми, які потім об'єднуються між частинами
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    n_teams = len(base_wins)
+    n_games = len(probabilities)
+
+    # Матриці "гра -> команда": результат сезону рахується одним множенням
+    home_onehot = np.zeros((n_games, n_teams), dtype=np.float32)
+    away_onehot = np.zeros((n_games, n_teams), dtype=np.float32)
+    home_onehot[np.arange(n_games), home_idx] = 1.0
+    away_onehot[np.arange(n_games), away_idx] = 1.0
+
+    home_wins = (rng.random((n_simulations, n_games)) < probabilities).astype(np.float32)
+    wins = home_wins @ home_onehot + (1.0 - home_wins) @ away_onehot + base_wins
+
+    # Випадковий тай-брейк, щоб рівні команди не ділилися за індексом
+    order = np.lexsort((rng.random(wins.shape), -wins), axis=1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(n_teams), axis=1)
+
+    return {
+        'simulations': n_simulations,
+        'wins_sum': wins.sum(axis=0, dtype=np.float64),
+        'first_place': np.bincount(order[:, 0], minlength=n_teams),
+        'top_n': (ranks < top_n).sum(axis=0),
+    }
+
+
+class SeasonSimulator:
+    """
+    Monte Carlo симуляція решти сезону на основі рейтингів Elo
+    - рейтинги фіксуються на старті (без оновлення всередині симуляції)
+    - усі симуляції рахуються векторно у NumPy частинами по chunk_size
+    - workers > 1 розподіляє частини між процесами
+    """
+
+    def __init__(self, engine: EloRatingEngine, chunk_size: int = 2000):
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size має бути не менше 1, отримано {chunk_size}")
+        self.engine = engine
+        self.chunk_size = chunk_size
+
+    def simulate(self, schedule: List[tuple], n_simulations: int = 10000,
+                 current_wins: Optional[Dict[str, int]] = None, top_n: int = 8,
+                 seed: Optional[int] = None, workers: int = 1) -> Dict[str, Any]:
+        """
+        schedule: список пар (team1, team2) ще не зіграних матчів
+        current_wins: вже набрані перемоги {'Lakers': 20, ...}
+        Повертає ймовірності місць для кожної команди
+        Без команд (порожній розклад і current_wins) - порожня таблиця
+        Некоректні n_simulations / top_n - ValueError
+        """
+        import numpy as np
+
+        if not isinstance(n_simulations, numbers.Integral) or n_simulations < 1:
+            raise ValueError(f"n_simulations має бути цілим числом не менше 1, отримано {n_simulations!r}")
+        if top_n < 1:
+            raise ValueError(f"top_n має бути не менше 1, отримано {top_n}")
+
+        current_wins = current_wins or {}
+        teams = list(dict.fromkeys(
+            [t for pair in schedule for t in pair] + list(current_wins)
+        ))
+        if not teams:
+            return {'simulations': 0, 'games_remaining': 0, 'standings': []}
+        index = {team: i for i, team in enumerate(teams)}
+
+        probabilities = self.engine.win_probabilities(schedule)
+        home_idx = np.fromiter((index[t1] for t1, _ in schedule), dtype=np.intp, count=len(schedule))
+        away_idx = np.fromiter((index[t2] for _, t2 in schedule), dtype=np.intp, count=len(schedule))
+        base_wins = np.array([current_wins.get(t, 0) for t in teams], dtype=np.float32)
+
+        sizes = [self.chunk_size] * (n_simulations // self.chunk_size)
+        if n_simulations % self.chunk_size:
+            sizes.append(n_simulations % self.chunk_size)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        jobs = [
+            (probabilities, home_idx, away_idx, base_wins, size, top_n, s)
+            for size, s in zip(sizes, seeds)
+        ]
+
+        if workers > 1 and len(jobs) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(_simulate_season_chunk, *zip(*jobs)))
+        else:
+            parts = [_simulate_season_chunk(*job) for job in jobs]
+
+        total = sum(p['simulations'] for p in parts)
+        wins_sum = sum(p['wins_sum'] for p in parts)
+        first_place = sum(p['first_place'] for p in parts)
+        top = sum(p['top_n'] for p in parts)
+
+        standings = [
+            {
+                'team': team,
+                'rating': round(self.engine.get_rating(team), 1),
+                'mean_wins': round(float(wins_sum[i]) / total, 1),
+                'first_place_pct': round(100.0 * int(first_place[i]) / total, 1),
+                f'top_{top_n}_pct': round(100.0 * int(top[i]) / total, 1),
+            }
+            for i, team in enumerate(teams)
+        ]
+        standings.sort(key=lambda s: s['mean_wins'], reverse=True)
+
+        return {
+            'simulations': total,
+            'games_remaining': len(schedule),
+            'standings': standings
+        }
+
+
+# ============================================================================
+# 6️⃣ ДОБОВА НОРМА КАЛОРІЙ (HARRIS-BENEDICT)
+# ============================================================================
+
+# BMR = base + weight_k * вага(кг) + height_k * зріст(см) - age_k * вік(роки)
+HARRIS_BENEDICT = {
+    'male': (88.36, 13.4, 4.8, 5.7),
+    'female': (447.6, 9.2, 3.1, 4.3),
+}
+GENDER_ALIASES = {'male': 'male', 'm': 'male', 'female': 'female', 'f': 'female'}
+ACTIVITY_LEVELS = {
+    'low': 1.2,
+    'light': 1.375,
+    'medium': 1.55,
+    'high': 1.725,
+    'very_high': 1.9,
+}
+# Допустимі межі значень: (мінімум, максимум) включно
+CALORIE_LIMITS = {
+    'age': (5, 120),
+    'height': (80, 260),
+    'weight': (15, 350),
+    'activity': (1.0, 2.5),
+}
+
+
+def _to_number(value) -> float:
+    """Число з рядка/числа або NaN, якщо значення немає чи воно не число"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip().replace(',', '.'))
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+def _activity_factor(value) -> float:
+    """Коефіцієнт активності: число або назва рівня ('medium')"""
+    if isinstance(value, str):
+        level = ACTIVITY_LEVELS.get(value.strip().lower())
+        if level is not None:
+            return level
+    return _to_number(value)
+
+
+def validate_calorie_input(gender, age, height, weight, activity) -> tuple:
+    """
+    Перевіряє та нормалізує дані однієї людини
+    Повертає (gender, age, height, weight, activity), інакше ValueError
+    """
+    gender_key = GENDER_ALIASES.get(str(gender or '').strip().lower())
+    if gender_key is None:
+        raise ValueError("gender: очікується 'male' або 'female'")
+
+    values = {
+        'age': _to_number(age),
+        'height': _to_number(height),
+        'weight': _to_number(weight),
+        'activity': _activity_factor(activity),
+    }
+    for field, value in values.items():
+        low, high = CALORIE_LIMITS[field]
+        if math.isnan(value):
+            raise ValueError(f"{field}: очікується число")
+        if not low <= value <= high:
+            raise ValueError(f"{field}: значення поза межами {low}-{high}")
+
+    return gender_key, values['age'], values['height'], values['weight'], values['activity']
+
+
+def daily_calories(gender: str, age: float, height: float, weight: float, activity: float) -> int:
+    """Добова норма (ккал) для однієї людини, дані вже перевірені"""
+    base, weight_k, height_k, age_k = HARRIS_BENEDICT[gender]
+    bmr = base + weight_k * weight + height_k * height - age_k * age
+    return round(bmr * activity)
+
+
+class CalorieBatchCalculator:
+    """
+    Пакетний розрахунок норм калорій для складу команди або табору
+    - рядки читаються з генератора та обробляються частинами по chunk_size
+    - перевірка меж та формула рахуються векторно (numpy) для всієї частини
+    - для кожного рядка повертає результат або опис помилки, порядок зберігається
+    - в пам'яті одночасно лише одна частина, тож розмір вхідних даних не важливий
+    """
+
+    GENDERS = ('male', 'female')
+    FIELDS = ('age', 'height', 'weight', 'activity')
+
+    def __init__(self, chunk_size: int = 5000, max_rows: Optional[int] = None):
+        self.chunk_size = chunk_size
+        self.max_rows = max_rows
+        self.rows_total = 0
+        self.rows_ok = 0
+        self.rows_failed = 0
+        self.truncated = False
+
+    def compute(self, rows: Iterable[Mapping]) -> Iterator[Dict[str, Any]]:
+        """
+        Генератор записів по одному на кожен рядок
+        {'row': 1, 'ok': True, 'id': ..., 'name': ..., 'bmr': 1780.4, 'calories': 2759}
+        {'row': 2, 'ok': False, 'id': ..., 'name': ..., 'error': '...'}
+        """
+        rows = iter(rows)
+        row_no = 0
+        while True:
+            limit = self.chunk_size
+            if self.max_rows is not None:
+                limit = min(limit, self.max_rows - row_no)
+            chunk = list(islice(rows, limit))
+            if not chunk:
+                if self.max_rows is not None and row_no >= self.max_rows and next(rows, None) is not None:
+                    self.truncated = True
+                    yield {'row': row_no + 1, 'ok': False,
+                           'error': f"перевищено ліміт {self.max_rows} рядків, решту пропущено"}
+                return
+            yield from self._compute_chunk(chunk, row_no)
+            row_no += len(chunk)
+
+    def _compute_chunk(self, chunk: List[Any], offset: int) -> Iterator[Dict[str, Any]]:
+        import numpy as np
+
+        size = len(chunk)
+        gender_index = {g: i for i, g in enumerate(self.GENDERS)}
+        # Рядки, що не є об'єктами, лишаються з -1 та NaN і відсіюються маскою
+        genders = np.full(size, -1, dtype=np.intp)
+        columns = {field: np.full(size, np.nan) for field in self.FIELDS}
+        for i, row in enumerate(chunk):
+            if not isinstance(row, Mapping):
+                continue
+            gender = GENDER_ALIASES.get(str(row.get('gender') or '').strip().lower())
+            genders[i] = gender_index[gender] if gender else -1
+            columns['age'][i] = _to_number(row.get('age'))
+            columns['height'][i] = _to_number(row.get('height'))
+            columns['weight'][i] = _to_number(row.get('weight'))
+            columns['activity'][i] = _activity_factor(row.get('activity'))
+
+        # NaN не проходить жодного порівняння, тож відсіюється тут же
+        valid = genders >= 0
+        for field, values in columns.items():
+            low, high = CALORIE_LIMITS[field]
+            valid &= (values >= low) & (values <= high)
+
+        coefs = np.array([HARRIS_BENEDICT[g] for g in self.GENDERS])[np.where(valid, genders, 0)]
+        bmr = (coefs[:, 0] + coefs[:, 1] * columns['weight']
+               + coefs[:, 2] * columns['height'] - coefs[:, 3] * columns['age'])
+        calories = np.rint(bmr * columns['activity'])
+
+        ok_count = int(valid.sum())
+        self.rows_total += size
+        self.rows_ok += ok_count
+        self.rows_failed += size - ok_count
+
+        valid, bmr, calories = valid.tolist(), bmr.tolist(), calories.tolist()
+        for i, row in enumerate(chunk):
+            record = {'row': offset + i + 1}
+            if isinstance(row, Mapping):
+                record['id'] = row.get('id')
+                record['name'] = row.get('name')
+            if valid[i]:
+                record['ok'] = True
+                record['bmr'] = round(bmr[i], 1)
+                record['calories'] = int(calories[i])
+            else:
+                record['ok'] = False
+                record['error'] = self._row_error(row)
+            yield record
+
+    @staticmethod
+    def _row_error(row) -> str:
+        """Текст помилки для рядка, що не пройшов векторну перевірку"""
+        if not isinstance(row, Mapping):
+            return "очікується об'єкт з полями gender, age, height, weight, activity"
+        try:
+            validate_calorie_input(row.get('gender'), row.get('age'), row.get('height'),
+                                   row.get('weight'), row.get('activity'))
+        except ValueError as e:
+            return str(e)
+        return "некоректні дані"
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Підсумок після проходу генератора"""
+        return {
+            'rows': self.rows_total,
+            'ok': self.rows_ok,
+            'errors': self.rows_failed,
+            'truncated': self.truncated
+        }
+
+    def to_jsonl(self, rows: Iterable[Mapping], batch_size: int = 500) -> Iterator[str]:
+        """JSONL по запису на рядок, останній рядок - підсумок"""
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+        batch = []
+        for record in self.compute(rows):
+            batch.append(dumps(record))
+            if len(batch) >= batch_size:
+                batch.append('')
+                yield '\n'.join(batch)
+                batch = []
+        batch.append(dumps({'summary': self.get_summary()}))
+        batch.append('')
+        yield '\n'.join(batch)
+
+    def to_csv(self, rows: Iterable[Mapping], batch_size: int = 500) -> Iterator[str]:
+        """CSV з заголовком: row,id,name,bmr,calories,error (без рядка підсумку)"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(('row', 'id', 'name', 'bmr', 'calories', 'error'))
+        pending = 0
+        for record in self.compute(rows):
+            writer.writerow((record['row'], record.get('id'), record.get('name'),
+                             record.get('bmr'), record.get('calories'), record.get('error')))
+            pending += 1
+            if pending >= batch_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        yield buffer.getvalue()
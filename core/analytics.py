@@ -0,0 +1,267 @@
+"""
+Chat analytics rollups, maintained incrementally.
+
+ChatMessage rows are folded into hourly, daily and per-user daily counter
+tables in id order. ChatRollupState remembers the last id folded in, so
+every run only reads messages added since the previous one and dashboards
+read O(days) rollup rows instead of scanning the message table.
+
+With the chat tables on their own databases (core.routers) each one is
+folded under its own high-water mark, since ids are per database; the
+rollup tables themselves stay on "default" with auth_user.
+
+Rollups count messages as they were written: deleting history later
+(reset_chat_context) does not subtract from them. Messages newer than
+ROLLUP_SETTLE_SECONDS are left for the next run so that a transaction
+holding a lower id that commits late is not skipped over.
+"""
+import datetime
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from .models import ChatDailyStats, ChatHourlyStats, ChatMessage, ChatRollupState, ChatUserDailyStats
+from .routers import chat_databases
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_NAME = "chat"
+ROLLUP_BATCH_SIZE = 5000
+ROLLUP_SETTLE_SECONDS = 60
+COUNTER_FIELDS = ("messages", "questions", "replies", "reply_chars")
+STATS_MAX_DAYS = 366
+
+
+def _new_counters():
+    return dict.fromkeys(COUNTER_FIELDS, 0)
+
+
+def _count(counters, role, reply_chars):
+    counters["messages"] += 1
+    if role == "user":
+        counters["questions"] += 1
+    else:
+        counters["replies"] += 1
+        counters["reply_chars"] += reply_chars
+
+
+def _apply(model, key_fields, deltas):
+    """
+    Add counter deltas to rollup rows keyed by key_fields, creating missing
+    rows. Callers hold the rollup lock, so read-modify-write is safe; the
+    new totals go out as one INSERT ... ON CONFLICT DO UPDATE.
+    Returns the keys whose rows were created.
+    """
+    if not deltas:
+        return set()
+    lookup = {f"{field}__in": {key[i] for key in deltas} for i, field in enumerate(key_fields)}
+    counter_fields = sorted({field for counters in deltas.values() for field in counters})
+    existing = {
+        tuple(row[:len(key_fields)]): row[len(key_fields):]
+        for row in model.objects.filter(**lookup).values_list(*key_fields, *counter_fields)
+    }
+    rows = []
+    for key, counters in deltas.items():
+        current = existing.get(key, (0,) * len(counter_fields))
+        totals = {field: value + counters.get(field, 0) for field, value in zip(counter_fields, current)}
+        rows.append(model(**dict(zip(key_fields, key)), **totals))
+    model.objects.bulk_create(
+        rows, update_conflicts=True,
+        unique_fields=[model._meta.get_field(field).name for field in key_fields],
+        update_fields=counter_fields,
+    )
+    return {key for key in deltas if key not in existing}
+
+
+def _hour_runs(hours):
+    """Sorted hours -> [(first, last)] runs of consecutive hours."""
+    runs = []
+    for hour in sorted(hours):
+        if runs and hour - runs[-1][1] <= datetime.timedelta(hours=1):
+            runs[-1][1] = hour
+        else:
+            runs.append([hour, hour])
+    return runs
+
+
+def _rollup_name(using):
+    # The default database keeps the name it had before chat could move
+    return ROLLUP_NAME if using == "default" else f"{ROLLUP_NAME}:{using}"
+
+
+def _fold_batch(state, using, now, batch_size, settle_seconds):
+    """Fold the next batch after the high-water mark; returns rows folded."""
+    cutoff = now - datetime.timedelta(seconds=settle_seconds)
+    rows = list(
+        ChatMessage.objects.using(using)
+        .filter(id__gt=state.last_message_id)
+        .order_by("id")
+        .annotate(raw_length=Length("raw_content"), html_length=Length("content"))
+        .values_list("id", "user_id", "role", "created_at", "raw_length", "html_length")[:batch_size]
+    )
+    for position, row in enumerate(rows):
+        if row[3] > cutoff:
+            rows = rows[:position]
+            break
+    if not rows:
+        return 0
+
+    hourly = defaultdict(_new_counters)
+    daily = defaultdict(_new_counters)
+    per_user = defaultdict(_new_counters)
+    user_hours = set()
+    for _, user_id, role, created_at, raw_length, html_length in rows:
+        local = timezone.localtime(created_at)
+        hour = local.replace(minute=0, second=0, microsecond=0)
+        day = local.date()
+        # Messages saved before raw_content existed only have the HTML copy
+        reply_chars = raw_length or html_length or 0
+        _count(hourly[(hour,)], role, reply_chars)
+        _count(daily[(day,)], role, reply_chars)
+        if user_id is not None:
+            _count(per_user[(user_id, day)], role, reply_chars)
+            user_hours.add((user_id, hour))
+
+    # A user is new to an hour unless they wrote in it before this batch.
+    # Batch hours are merged into contiguous runs, usually just one, and
+    # each run is a single range read on the created_at index
+    first_id = rows[0][0]
+    seen = set()
+    one_hour = datetime.timedelta(hours=1)
+    for run_start, run_end in _hour_runs({hour for _, hour in user_hours}):
+        earlier = ChatMessage.objects.using(using).filter(
+            created_at__gte=run_start, created_at__lt=run_end + one_hour, id__lt=first_id,
+        ).exclude(user_id=None).values_list("user_id", "created_at")
+        for user_id, created_at in earlier.iterator(chunk_size=ROLLUP_BATCH_SIZE):
+            local = timezone.localtime(created_at)
+            seen.add((user_id, local.replace(minute=0, second=0, microsecond=0)))
+    for user_id, hour in user_hours - seen:
+        counters = hourly[(hour,)]
+        counters["active_users"] = counters.get("active_users", 0) + 1
+
+    # Per-user rows are created on a user's first message of the day, which
+    # is exactly when the daily active-user count goes up
+    for _, day in _apply(ChatUserDailyStats, ("user_id", "day"), per_user):
+        daily[(day,)]["active_users"] = daily[(day,)].get("active_users", 0) + 1
+    _apply(ChatHourlyStats, ("hour",), hourly)
+    _apply(ChatDailyStats, ("day",), daily)
+
+    state.last_message_id = rows[-1][0]
+    state.updated_at = now
+    state.save(update_fields=["last_message_id", "updated_at"])
+    return len(rows)
+
+
+def _fold_database(using, max_rows, batch_size, now, settle_seconds):
+    """Fold one chat database, one transaction per batch; returns (processed, last id, caught up)."""
+    name = _rollup_name(using)
+    processed = 0
+    last_id = 0
+    while max_rows is None or processed < max_rows:
+        size = batch_size if max_rows is None else min(batch_size, max_rows - processed)
+        with transaction.atomic():
+            # Write first, then read: the UPDATE takes the write lock, so a
+            # concurrent run waits here instead of double counting
+            if not ChatRollupState.objects.filter(name=name).update(updated_at=now):
+                ChatRollupState.objects.get_or_create(name=name)
+            state = ChatRollupState.objects.select_for_update().get(name=name)
+            folded = _fold_batch(state, using, now, size, settle_seconds)
+        processed += folded
+        last_id = state.last_message_id
+        if folded < size:
+            return processed, last_id, True
+    return processed, last_id, False
+
+
+def update_chat_rollups(max_rows=None, batch_size=ROLLUP_BATCH_SIZE, now=None,
+                        settle_seconds=ROLLUP_SETTLE_SECONDS):
+    """
+    Fold new chat messages into the rollup tables, one transaction per
+    batch. Stops after max_rows messages (None: until caught up).
+    Returns {"processed": n, "last_message_id": id, "caught_up": bool};
+    with several chat databases last_message_id is the highest of their marks.
+    """
+    now = now or timezone.now()
+    processed = 0
+    caught_up = True
+    last_id = 0
+    for using in chat_databases():
+        remaining = None if max_rows is None else max_rows - processed
+        if remaining == 0:
+            caught_up = False
+            break
+        folded, database_last_id, database_caught_up = _fold_database(
+            using, remaining, batch_size, now, settle_seconds
+        )
+        processed += folded
+        last_id = max(last_id, database_last_id)
+        caught_up = caught_up and database_caught_up
+    if processed:
+        logger.info(f"Chat rollups: folded {processed} messages up to id {last_id}")
+    return {"processed": processed, "last_message_id": last_id, "caught_up": caught_up}
+
+
+def _totals(rows, key):
+    """Serialize rollup rows with the derived average reply length."""
+    result = []
+    for row in rows:
+        result.append({
+            key: row[key].isoformat(),
+            "messages": row["messages"],
+            "questions": row["questions"],
+            "replies": row["replies"],
+            "active_users": row["active_users"],
+            "avg_reply_chars": round(row["reply_chars"] / row["replies"], 1) if row["replies"] else None,
+        })
+    return result
+
+
+def chat_stats(days=30, by="day", top_users=10, today=None):
+    """
+    Dashboard data for the last `days` days from the rollup tables only:
+    per-period totals and the most active users in the window.
+    """
+    if by not in ("day", "hour"):
+        raise ValueError("by must be 'day' or 'hour'")
+    if not 1 <= days <= STATS_MAX_DAYS:
+        raise ValueError(f"days must be between 1 and {STATS_MAX_DAYS}")
+
+    today = today or timezone.localdate()
+    since = today - datetime.timedelta(days=days - 1)
+    values = ("messages", "questions", "replies", "reply_chars", "active_users")
+    if by == "day":
+        periods = _totals(ChatDailyStats.objects.filter(day__gte=since).values("day", *values), "day")
+    else:
+        start = timezone.make_aware(datetime.datetime.combine(since, datetime.time()))
+        periods = _totals(ChatHourlyStats.objects.filter(hour__gte=start).values("hour", *values), "hour")
+
+    users = (
+        ChatUserDailyStats.objects
+        .filter(day__gte=since)
+        .values("user_id", "user__username")
+        .annotate(messages=Sum("messages"), questions=Sum("questions"))
+        .order_by("-messages", "user_id")[:top_users]
+    )
+    last_message_id = ChatRollupState.objects.filter(
+        name__in=[_rollup_name(using) for using in chat_databases()]
+    ).aggregate(last=Max("last_message_id"))["last"]
+    return {
+        "since": since.isoformat(),
+        "by": by,
+        "periods": periods,
+        "totals": {
+            "messages": sum(p["messages"] for p in periods),
+            "questions": sum(p["questions"] for p in periods),
+            "replies": sum(p["replies"] for p in periods),
+        },
+        "top_users": [
+            {"user_id": u["user_id"], "username": u["user__username"],
+             "messages": u["messages"], "questions": u["questions"]}
+            for u in users
+        ],
+        "last_message_id": last_message_id or 0,
+    }
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_delete, post_migrate
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from .caching import player_data_deployed
+        from .chat_state import delete_user_chat
+        from .search import ensure_search_triggers
+
+        post_migrate.connect(ensure_search_triggers, sender=self)
+        post_migrate.connect(player_data_deployed, sender=self)
+        post_delete.connect(delete_user_chat, sender=settings.AUTH_USER_MODEL)
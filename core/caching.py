@@ -0,0 +1,96 @@
+"""
+Server-side result cache and HTTP validators for pure GET endpoints.
+
+Results are stored under a versioned key: namespace, data version and a
+hash of the normalized parameters. Invalidation bumps the version, so old
+entries are never read again and simply expire.
+
+The version lives in the default cache next to the results, so a bump
+reaches every worker only when that cache is shared (settings.SHARED_CACHE).
+On the per-process LocMemCache each worker keeps its own results and
+version; invalidation then only reaches the process that sent it, and the
+worker restart of a deploy is what clears the others.
+
+The player endpoints compute from code (DataParser and the comparison
+data), so their data changes with a deploy: player_data_changed is sent
+after every migrate and by `manage.py invalidate_player_cache`.
+"""
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.dispatch import Signal, receiver
+from django.views.decorators.http import condition
+
+RESULT_CACHE_TIMEOUT = 60 * 60  # server-side result lifetime in seconds
+HTTP_MAX_AGE = 300  # Cache-Control max-age for browsers and the CDN
+
+PLAYERS_NAMESPACE = "players"
+
+# Send this whenever the player data behind compare/parse endpoints changes
+player_data_changed = Signal()
+
+
+def _version_key(namespace):
+    return f"{namespace}:version"
+
+
+def get_data_version(namespace):
+    """Current data version (a unix timestamp), created on first use."""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time()), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(namespace):
+    """Drop every cached result of the namespace by bumping its version."""
+    version = max(int(time.time()), get_data_version(namespace) + 1)
+    cache.set(_version_key(namespace), version, None)
+
+
+@receiver(player_data_changed)
+def invalidate_player_data(sender=None, **kwargs):
+    invalidate(PLAYERS_NAMESPACE)
+
+
+def player_data_deployed(sender, **kwargs):
+    """post_migrate receiver: a deploy may change what the player endpoints return."""
+    player_data_changed.send(sender=sender)
+
+
+def make_key(namespace, params):
+    """Cache key from the data version and normalized parameters."""
+    normalized = json.dumps(params, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    return f"{namespace}:{get_data_version(namespace)}:{digest}"
+
+
+def get_or_compute(namespace, params, compute):
+    """Return the cached result for params, computing and storing it on a miss."""
+    key = make_key(namespace, params)
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, RESULT_CACHE_TIMEOUT)
+    return result
+
+
+def conditional(namespace, get_params):
+    """
+    ETag/Last-Modified support for a view whose response depends only on
+    get_params(request) and the namespace data version. Matching requests
+    get a 304 without running the view.
+    """
+    def etag_func(request, *args, **kwargs):
+        key = make_key(namespace, get_params(request))
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def last_modified_func(request, *args, **kwargs):
+        return datetime.fromtimestamp(get_data_version(namespace), tz=timezone.utc)
+
+    return condition(etag_func=etag_func, last_modified_func=last_modified_func)
@@ -0,0 +1,52 @@
+"""
+Chat helpers shared by the chat view and the batch jobs that talk to the
+model (`manage.py generate_faq`): the system prompt, the request timeout
+and how a model reply becomes the text and HTML a ChatMessage stores.
+"""
+import html
+import re
+
+API_TIMEOUT = 30  # API request timeout in seconds
+
+CHAT_SYSTEM_PROMPT = """You are a basketball AI coach and expert.
+Answer questions about:
+- NBA, Euroleague and other leagues
+- Player statistics (PPG, RPG, APG)
+- Game analysis and team strategies
+- Basketball history and rules
+- Training and fitness advice for basketball players
+
+Be helpful, concise, and encouraging."""
+
+
+def convert_markdown_to_html(text):
+    """Convert markdown-style formatting to HTML."""
+    if not text:
+        return text
+    
+    # Escape any HTML first to prevent injection
+    text = html.escape(text)
+    
+    # Convert markdown headers to styled divs
+    text = re.sub(r'^### (.+)$', r'<div style="font-size: 18px; font-weight: 700; color: #1f2937; margin: 16px 0 8px 0;">\1</div>', text, flags=re.MULTILINE)
+    text = re.sub(r'^## (.+)$', r'<div style="font-size: 20px; font-weight: 700; color: #1f2937; margin: 20px 0 12px 0;">\1</div>', text, flags=re.MULTILINE)
+    text = re.sub(r'^# (.+)$', r'<div style="font-size: 24px; font-weight: 700; color: #1f2937; margin: 24px 0 16px 0;">\1</div>', text, flags=re.MULTILINE)
+    
+    # Convert bold (**text**)
+    text = re.sub(r'\*\*(.+?)\*\*', r'<strong style="font-weight: 600; color: #111827;">\1</strong>', text)
+    
+    # Convert bullet points (- text)
+    text = re.sub(r'^- (.+)$', r'<div style="margin-left: 20px; margin-bottom: 8px; display: flex; gap: 8px;"><span style="color: #3b82f6; font-weight: bold;">•</span><span>\1</span></div>', text, flags=re.MULTILINE)
+    
+    # Add line breaks back (they got escaped)
+    text = text.replace('\n', '<br>')
+    
+    return text
+
+
+def prepare_reply(reply):
+    """Model output as the (plain text, HTML) pair a chat message stores."""
+    reply = html.unescape(reply)
+    reply = reply.replace('\\u000A', '\n')
+    # Convert markdown to HTML for better display
+    return reply, convert_markdown_to_html(reply)
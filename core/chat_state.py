@@ -0,0 +1,168 @@
+"""
+Per-process chat state: turn ordering and the in-memory context budget
+
+Concurrent POSTs from one user (double clicks, two tabs) must not interleave
+their questions and answers, neither in the in-memory context manager nor
+in the stored history. Within a process turns are serialized per user with
+KeyedLock; across processes every message carries a per-user sequence
+number handed out by a single-row counter update.
+
+ContextRegistry holds each user's context manager under a process-wide
+memory cap, evicting the least recently used ones; an evicted context is
+rebuilt from the stored history on that user's next turn.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
+
+from .models import ChatMessage, ChatTurnCounter
+from .routers import chat_db_for_user
+
+logger = logging.getLogger(__name__)
+
+
+class KeyedLock:
+    """
+    One lock per key, created on first use and discarded once nobody holds
+    or waits for it, so idle users cost nothing.
+    """
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._locks = {}  # key -> [lock, holders + waiters]
+
+    @contextmanager
+    def hold(self, key, timeout=-1):
+        """Hold the lock for `key`; raises TimeoutError after `timeout` seconds."""
+        with self._mutex:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+
+        acquired = entry[0].acquire(timeout=timeout)
+        try:
+            if not acquired:
+                raise TimeoutError(f"Timed out waiting for lock {key!r}")
+            yield
+        finally:
+            if acquired:
+                entry[0].release()
+            with self._mutex:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+    def __len__(self):
+        with self._mutex:
+            return len(self._locks)
+
+
+class ContextRegistry:
+    """
+    user_id -> chat context manager, least recently used first. Sizes come
+    from each manager's memory_bytes estimate and are re-measured by
+    update() after a turn, so the running total costs O(1) per turn.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._managers = OrderedDict()
+        self._sizes = {}
+        self.total_bytes = 0
+        self.evictions = 0
+
+    def __contains__(self, user_id):
+        return user_id in self._managers
+
+    def __len__(self):
+        return len(self._managers)
+
+    def __getitem__(self, user_id):
+        with self._lock:
+            self._managers.move_to_end(user_id)
+            return self._managers[user_id]
+
+    def __setitem__(self, user_id, manager):
+        with self._lock:
+            self._managers[user_id] = manager
+            self._managers.move_to_end(user_id)
+        self.update(user_id)
+
+    def pop(self, user_id, default=None):
+        with self._lock:
+            self.total_bytes -= self._sizes.pop(user_id, 0)
+            return self._managers.pop(user_id, default)
+
+    def update(self, user_id):
+        """Re-measure one user's context, then evict others while over the cap."""
+        evicted = 0
+        with self._lock:
+            manager = self._managers.get(user_id)
+            if manager is None:
+                return
+            size = manager.memory_bytes
+            self.total_bytes += size - self._sizes.get(user_id, 0)
+            self._sizes[user_id] = size
+            # The user being served is never evicted, even if alone over the cap
+            while self.total_bytes > self.max_bytes and len(self._managers) > 1:
+                oldest, _ = self._managers.popitem(last=False)
+                if oldest == user_id:
+                    self._managers[user_id] = manager
+                    continue
+                self.total_bytes -= self._sizes.pop(oldest, 0)
+                evicted += 1
+            self.evictions += evicted
+        if evicted:
+            logger.info(f"Evicted {evicted} chat contexts: {self.get_stats()}")
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "users": len(self._managers),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+def reserve_turn_seq(user_id, count=2):
+    """
+    Reserve `count` consecutive ChatMessage.seq values for a user and return
+    the first. The increment is one UPDATE, which the database serializes,
+    so workers in different processes always get disjoint ranges.
+    """
+    # The counter sits next to the user's messages (core.routers)
+    using = chat_db_for_user(user_id)
+    counters = ChatTurnCounter.objects.using(using).filter(user_id=user_id)
+    # Write first, then read: on SQLite a read-then-write transaction can
+    # fail with "database is locked" instead of waiting
+    with transaction.atomic(using=using):
+        if counters.update(last_seq=F('last_seq') + count):
+            return counters.values_list('last_seq', flat=True).get() - count + 1
+
+    # First turn since the counter was introduced: continue after any numbered history
+    start = ChatMessage.objects.for_user(user_id).aggregate(last=Max('seq'))['last'] or 0
+    try:
+        with transaction.atomic(using=using):
+            ChatTurnCounter.objects.using(using).create(user_id=user_id, last_seq=start + count)
+    except IntegrityError:
+        # Another process created it first; take the next range from it
+        return reserve_turn_seq(user_id, count)
+    return start + 1
+
+
+def delete_user_chat(sender, instance, **kwargs):
+    """
+    post_delete for users. Chat rows may be on another database than
+    auth_user, where no cascade reaches them, so they are deleted here.
+    """
+    using = chat_db_for_user(instance.pk)
+    with transaction.atomic(using=using):
+        ChatMessage.objects.for_user(instance.pk).delete()
+        ChatTurnCounter.objects.using(using).filter(user_id=instance.pk).delete()
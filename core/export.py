@@ -0,0 +1,118 @@
+"""
+Streaming export of a user's chat history and todos.
+
+Rows are read with QuerySet.iterator(chunk_size=...) and serialized into
+~64 KB chunks, optionally gzip-compressed on the fly, so memory use stays
+flat regardless of how much history an account has.
+"""
+import csv
+import io
+import json
+import zlib
+
+from .models import ChatMessage, Todo
+
+EXPORT_CHUNK_SIZE = 2000  # rows fetched per database round trip
+EXPORT_BUFFER_BYTES = 64 * 1024  # approximate size of each yielded chunk
+EXPORT_FORMATS = ("jsonl", "csv")
+EXPORT_KINDS = ("chat", "todos")
+
+CSV_COLUMNS = ["type", "id", "role", "title", "content", "date", "completed", "created_at"]
+
+
+def iter_export_rows(user, kinds=EXPORT_KINDS):
+    """Yield one flat dict per exported object, chat messages first."""
+    if "chat" in kinds:
+        messages = (
+            ChatMessage.objects.for_user(user)
+            .order_by("created_at", "id")
+            .values_list("id", "role", "raw_content", "content", "created_at")
+        )
+        for pk, role, raw_content, content, created_at in messages.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield {
+                "type": "chat",
+                "id": pk,
+                "role": role,
+                "content": raw_content or content,
+                "created_at": created_at.isoformat(),
+            }
+
+    if "todos" in kinds:
+        todos = (
+            Todo.objects.filter(user=user)
+            .order_by("date", "created_at")
+            .values_list("id", "title", "date", "completed", "created_at")
+        )
+        for pk, title, day, completed, created_at in todos.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield {
+                "type": "todo",
+                "id": pk,
+                "title": title,
+                "date": day.isoformat(),
+                "completed": completed,
+                "created_at": created_at.isoformat(),
+            }
+
+
+def _buffered(pieces):
+    """Join small strings into chunks of about EXPORT_BUFFER_BYTES."""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= EXPORT_BUFFER_BYTES:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_jsonl(rows):
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    return _buffered(dumps(row) + "\n" for row in rows)
+
+
+def iter_csv(rows):
+    def lines():
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            # Hand the line over and reuse the same small buffer
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+        yield out.getvalue()
+
+    return _buffered(lines())
+
+
+def iter_gzip(chunks):
+    """gzip-compress a stream of text chunks without buffering the whole file."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(user, fmt="jsonl", kinds=EXPORT_KINDS, compress=False):
+    """Chunks (str, or bytes when compressed) of a complete export file."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    unknown = set(kinds) - set(EXPORT_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown export kinds: {', '.join(sorted(unknown))}")
+
+    rows = iter_export_rows(user, kinds)
+    chunks = iter_jsonl(rows) if fmt == "jsonl" else iter_csv(rows)
+    return iter_gzip(chunks) if compress else chunks
+
+
+def export_filename(user, fmt, compress=False):
+    name = f"basketball-ai-{user.username}.{fmt}"
+    return f"{name}.gz" if compress else name
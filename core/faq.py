@@ -0,0 +1,40 @@
+"""
+Precomputed answers for frequently asked chat questions.
+
+Many chat turns are the same handful of basketball questions. Their answers
+are generated ahead of time by `manage.py generate_faq` and stored in
+FAQEntry with the HTML already rendered; a chat turn whose question
+normalizes to a stored one is answered from there with no upstream call.
+
+Matching is exact on the normalized text (case, punctuation and spacing
+ignored), so one indexed lookup per turn decides it.
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+
+from .models import FAQEntry
+
+FAQ_QUESTION_MAX_LENGTH = FAQEntry._meta.get_field("normalized_question").max_length
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_question(text):
+    """Lookup key for a question: NFKC, casefolded, punctuation and extra spaces removed."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    # "3-second" and "3 second" match
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def find_faq_answer(question):
+    """The FAQEntry answering this question, or None."""
+    if not settings.CHAT_FAQ:
+        return None
+    key = normalize_question(question)
+    if not key or len(key) > FAQ_QUESTION_MAX_LENGTH:
+        return None
+    return FAQEntry.objects.filter(normalized_question=key).only("id", "answer", "answer_html").first()
@@ -0,0 +1,69 @@
+"""
+Lazily constructed OpenAI client
+
+Importing openai pulls in httpx and pydantic, which is most of a worker's
+cold start. Views that never talk to the model (todo, login...) should not
+pay for it, so the module is imported and the client built on first use.
+"""
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide OpenAI client, created on first call (thread-safe)."""
+    global _client
+    client = _client
+    if client is None:
+        with _client_lock:
+            client = _client
+            if client is None:
+                from openai import OpenAI
+
+                client = _client = OpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    base_url=os.getenv("OPENAI_BASE_URL") or None,  # e.g. a local stub for load tests
+                )
+    return client
+
+
+def new_async_client(**options):
+    """
+    A new AsyncOpenAI client for batch jobs. It belongs to the event loop
+    that uses it, so unlike get_client() it is not shared.
+    """
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        base_url=os.getenv("OPENAI_BASE_URL") or None,
+        **options
+    )
+
+
+def _reset_after_fork():
+    # An httpx pool inherited across fork shares sockets with the parent
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def preload():
+    """
+    Warm-up hook for prefork servers (gunicorn --preload, Passenger smart
+    spawning): import the client library once in the parent so every worker
+    shares those pages copy-on-write. The client itself is still built per
+    process, after the fork.
+    """
+    import openai  # noqa: F401
+
+    logger.info("Preloaded openai %s", openai.__version__)
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.analytics import chat_stats, update_chat_rollups
+
+
+class Command(BaseCommand):
+    help = "Fold new chat messages into the analytics rollups and print a summary"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Window to report, ending today")
+        parser.add_argument("--by", choices=["day", "hour"], default="day", help="Period of each row")
+        parser.add_argument("--top", type=int, default=10, help="Number of most active users to list")
+        parser.add_argument("--no-update", action="store_true", help="Report without folding new messages first")
+        parser.add_argument("--json", action="store_true", help="Print the same JSON as /chat/stats/")
+
+    def handle(self, *args, **options):
+        if not options["no_update"]:
+            result = update_chat_rollups()
+            self.stderr.write(f"Folded {result['processed']} new messages (up to id {result['last_message_id']})")
+
+        try:
+            stats = chat_stats(days=options["days"], by=options["by"], top_users=options["top"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(stats, indent=2))
+            return
+
+        key = stats["by"]
+        self.stdout.write(f"{key:20} {'messages':>9} {'questions':>9} {'replies':>8} {'users':>6} {'avg reply':>9}")
+        for period in stats["periods"]:
+            avg = period["avg_reply_chars"]
+            self.stdout.write(
+                f"{period[key]:20} {period['messages']:9d} {period['questions']:9d} "
+                f"{period['replies']:8d} {period['active_users']:6d} {avg if avg is not None else '-':>9}"
+            )
+        totals = stats["totals"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Since {stats['since']}: {totals['messages']} messages, {totals['questions']} questions"
+        ))
+        for user in stats["top_users"]:
+            self.stdout.write(f"  {user['username']:20} {user['messages']:7d} messages")
@@ -0,0 +1,58 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export import EXPORT_FORMATS, EXPORT_KINDS, export_filename, export_stream
+
+
+class Command(BaseCommand):
+    help = "Stream a user's chat history and todos to a JSONL or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+        parser.add_argument("--gzip", action="store_true", help="Compress the output")
+        parser.add_argument(
+            "--include", default=",".join(EXPORT_KINDS),
+            help="Comma-separated list of: " + ", ".join(EXPORT_KINDS)
+        )
+        parser.add_argument(
+            "--output", default=None,
+            help="File path, '-' for stdout (default: basketball-ai-<username>.<format>)"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist")
+
+        fmt = options["format"]
+        compress = options["gzip"]
+        kinds = [k.strip() for k in options["include"].split(",") if k.strip()]
+        try:
+            chunks = export_stream(user, fmt=fmt, kinds=kinds, compress=compress)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        output = options["output"] or export_filename(user, fmt, compress)
+        if output == "-":
+            out = sys.stdout.buffer
+            close = False
+        else:
+            out = open(output, "wb")
+            close = True
+
+        written = 0
+        try:
+            for chunk in chunks:
+                data = chunk if isinstance(chunk, bytes) else chunk.encode("utf-8")
+                out.write(data)
+                written += len(data)
+        finally:
+            if close:
+                out.close()
+
+        if output != "-":
+            self.stdout.write(self.style.SUCCESS(f"Wrote {written} bytes to {output}"))
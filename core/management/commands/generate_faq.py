@@ -0,0 +1,157 @@
+import asyncio
+import random
+import sys
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import llm
+from core.chat import API_TIMEOUT, CHAT_SYSTEM_PROMPT, prepare_reply
+from core.faq import FAQ_QUESTION_MAX_LENGTH, normalize_question
+from core.models import FAQEntry
+
+SAVE_BATCH_SIZE = 50  # answers stored per transaction while generating
+LOOKUP_CHUNK_SIZE = 500
+
+
+def read_questions(lines):
+    """{normalized: question} in file order; blank lines and # comments are skipped."""
+    questions = {}
+    for line in lines:
+        question = line.strip()
+        if not question or question.startswith("#"):
+            continue
+        key = normalize_question(question)
+        if key and key not in questions:
+            questions[key] = question
+    return questions
+
+
+def is_retryable(error):
+    """Connection failures, timeouts, 429 and 5xx are worth another try."""
+    import openai
+
+    if isinstance(error, openai.APIConnectionError):  # includes APITimeoutError
+        return True
+    return isinstance(error, openai.APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+
+async def ask(client, question, model, max_tokens, retries, backoff):
+    """One answer, retried with exponential backoff and full jitter."""
+    options = {"max_tokens": max_tokens} if max_tokens else {}
+    messages = [
+        {"role": "system", "content": CHAT_SYSTEM_PROMPT},
+        {"role": "user", "content": question},
+    ]
+    for attempt in range(retries + 1):
+        try:
+            response = await client.chat.completions.create(
+                model=model, messages=messages, timeout=API_TIMEOUT, **options
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            await asyncio.sleep(random.uniform(0, backoff * 2 ** attempt))
+
+
+def save_answers(answers, model):
+    """Upsert (normalized, question, reply) rows with the HTML rendered once here."""
+    entries = []
+    for key, question, reply in answers:
+        answer, answer_html = prepare_reply(reply)
+        entries.append(FAQEntry(
+            question=question, normalized_question=key,
+            answer=answer, answer_html=answer_html, model=model,
+        ))
+    FAQEntry.objects.bulk_create(
+        entries, update_conflicts=True, unique_fields=["normalized_question"],
+        update_fields=["question", "answer", "answer_html", "model", "updated_at"],
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate answers for a file of questions (one per line) and store them as FAQ entries. "
+        "Questions that already have an entry are skipped, so a rerun retries only the failures."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("questions", help="Text file with one question per line, '-' for stdin")
+        parser.add_argument("--concurrency", type=int, default=8, help="Upstream requests in flight at once")
+        parser.add_argument("--retries", type=int, default=3, help="Retries per question on transient errors")
+        parser.add_argument("--backoff", type=float, default=1.0, help="Base retry delay in seconds, doubled per retry")
+        parser.add_argument("--model", default=settings.CHAT_MODEL)
+        parser.add_argument("--max-tokens", type=int, default=None, help="Answer length limit (default: none)")
+        parser.add_argument("--overwrite", action="store_true", help="Regenerate questions that already have an entry")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1")
+        if options["questions"] == "-":
+            questions = read_questions(sys.stdin)
+        else:
+            try:
+                with open(options["questions"], encoding="utf-8") as fh:
+                    questions = read_questions(fh)
+            except OSError as e:
+                raise CommandError(f"Cannot read {options['questions']}: {e}")
+
+        for key in [key for key in questions if len(key) > FAQ_QUESTION_MAX_LENGTH]:
+            question = questions.pop(key)
+            self.stderr.write(f"Skipping question over {FAQ_QUESTION_MAX_LENGTH} characters: {question[:60]}…")
+
+        existing = 0
+        if not options["overwrite"]:
+            keys = list(questions)
+            for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+                found = FAQEntry.objects.filter(
+                    normalized_question__in=keys[start:start + LOOKUP_CHUNK_SIZE]
+                ).values_list("normalized_question", flat=True)
+                for key in found:
+                    del questions[key]
+                    existing += 1
+
+        stored, failed = asyncio.run(self.generate(questions, options)) if questions else (0, 0)
+        summary = f"Stored {stored} FAQ answers, {failed} failed, {existing} already present"
+        self.stdout.write(self.style.WARNING(summary) if failed else self.style.SUCCESS(summary))
+
+    async def generate(self, questions, options):
+        """Answer every question with at most --concurrency requests in flight; returns (stored, failed)."""
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        # Retries are ours, with jitter; the client's own would multiply them
+        client = llm.new_async_client(max_retries=0)
+        save = sync_to_async(save_answers)
+
+        async def answer(key, question):
+            async with semaphore:
+                try:
+                    reply = await ask(
+                        client, question, options["model"], options["max_tokens"],
+                        options["retries"], options["backoff"],
+                    )
+                except Exception as e:
+                    return key, question, None, e
+                return key, question, reply, None
+
+        stored = failed = 0
+        batch = []
+        try:
+            for pending in asyncio.as_completed([answer(key, question) for key, question in questions.items()]):
+                key, question, reply, error = await pending
+                if error is not None or not reply:
+                    failed += 1
+                    self.stderr.write(f"Failed: {question[:60]} ({error or 'empty answer'})")
+                    continue
+                batch.append((key, question, reply))
+                if len(batch) >= SAVE_BATCH_SIZE:
+                    await save(batch, options["model"])
+                    stored += len(batch)
+                    batch = []
+            if batch:
+                await save(batch, options["model"])
+                stored += len(batch)
+        finally:
+            await client.close()
+        return stored, failed
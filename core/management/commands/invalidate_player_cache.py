@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.caching import player_data_changed
+
+
+class Command(BaseCommand):
+    help = "Drop every cached compare-players and parse-player result"
+
+    def handle(self, *args, **options):
+        player_data_changed.send(sender=self.__class__)
+        if settings.SHARED_CACHE:
+            self.stdout.write(self.style.SUCCESS("Player results invalidated for all workers"))
+        else:
+            # A process-local cache: this process's copy is the only one reached
+            self.stdout.write(self.style.WARNING(
+                "CACHE_BACKEND is process-local; running workers keep their results until restarted"
+            ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.tasks import run_persisted_tasks
+
+
+class Command(BaseCommand):
+    help = "Run background tasks that were persisted to the QueuedTask table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None, help="Maximum number of tasks to run")
+        parser.add_argument("--max-attempts", type=int, default=5, help="Skip tasks that failed this many times")
+
+    def handle(self, *args, **options):
+        done, failed = run_persisted_tasks(limit=options["limit"], max_attempts=options["max_attempts"])
+        self.stdout.write(self.style.SUCCESS(f"Ran {done} queued tasks, {failed} failed"))
@@ -0,0 +1,192 @@
+"""
+Project middleware: authentication with a per-process cache of user
+objects, static file serving and response compression.
+
+CachedAuthenticationMiddleware resolves request.user from a per-process
+cache of user objects, reused only while the session auth hash matches.
+With cache-backed sessions (a shared cache, see settings) this lets
+steady-state authenticated requests resolve request.user without touching
+the database; with database sessions it saves the auth_user query. Entries live for
+AUTH_USER_CACHE_TTL seconds and are dropped on logout and on any save or
+delete of the user (password change, deactivation, last_login update).
+
+StaticFilesMiddleware answers STATIC_URL requests from STATIC_ROOT before
+sessions, auth or CSRF run. Manifest-hashed names are cached by browsers
+for a year; gzip copies written by collectstatic are sent when accepted.
+
+ConditionalGZipMiddleware compresses dynamic HTML/JSON responses only;
+streams and already-compressed types pass through untouched.
+"""
+import copy
+import mimetypes
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import FileResponse, HttpResponseNotModified
+from django.middleware.gzip import GZipMiddleware
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+STATIC_MAX_AGE = 365 * 24 * 60 * 60  # hashed names change whenever content does
+
+# Content types worth compressing on the fly; everything else is binary
+# (images, archives) or already compressed
+GZIP_CONTENT_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+_user_cache = {}  # user id -> (expires_at, user)
+_user_cache_lock = threading.Lock()
+
+
+def _cache_ttl():
+    return getattr(settings, "AUTH_USER_CACHE_TTL", 60)
+
+
+def invalidate_cached_user(user_id):
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+
+@receiver(user_logged_out)
+def _drop_user_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_cached_user(user.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _drop_user_on_change(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+def get_cached_user(request):
+    """
+    Resolve the session user from the process cache when the session auth
+    hash still matches; otherwise fall back to django.contrib.auth.get_user.
+    """
+    if hasattr(request, "_cached_user"):
+        return request._cached_user
+
+    session = request.session
+    try:
+        user_id = User._meta.pk.to_python(session[SESSION_KEY])
+        backend_path = session[BACKEND_SESSION_KEY]
+    except KeyError:
+        user_id = None
+
+    user = None
+    if user_id is not None and backend_path in settings.AUTHENTICATION_BACKENDS:
+        with _user_cache_lock:
+            entry = _user_cache.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            session_hash = session.get(HASH_SESSION_KEY)
+            cached = entry[1]
+            if session_hash and constant_time_compare(session_hash, cached.get_session_auth_hash()):
+                # Each request gets its own copy so per-request state never leaks
+                user = copy.copy(cached)
+
+    if user is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            with _user_cache_lock:
+                _user_cache[user.pk] = (time.monotonic() + _cache_ttl(), copy.copy(user))
+
+    request._cached_user = user
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """Drop-in replacement for AuthenticationMiddleware using get_cached_user."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+
+
+class StaticFilesMiddleware:
+    """Serve collectstatic output with long-lived caching and gzip siblings."""
+
+    def __init__(self, get_response):
+        if not settings.SERVE_STATIC or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = urlsplit(settings.STATIC_URL).path
+        self.root = Path(settings.STATIC_ROOT)
+        # Every name listed in the manifest as a hashed target is immutable
+        self.immutable = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = Path(safe_join(self.root, name))
+        except (SuspiciousFileOperation, ValueError):
+            return None
+        if not path.is_file():
+            # Not collected: let the URLconf (or runserver's handler) decide
+            return None
+
+        compressed = path.with_name(path.name + '.gz')
+        has_compressed = compressed.is_file()
+        send_compressed = has_compressed and 'gzip' in request.headers.get('Accept-Encoding', '')
+        source = compressed if send_compressed else path
+        stat = source.stat()
+
+        if not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+            response = HttpResponseNotModified()
+        else:
+            content_type, _ = mimetypes.guess_type(path.name)
+            response = FileResponse(
+                source.open('rb'),
+                content_type=content_type or 'application/octet-stream',
+            )
+            response['Last-Modified'] = http_date(stat.st_mtime)
+            if send_compressed:
+                response['Content-Encoding'] = 'gzip'
+        if has_compressed:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        if name in self.immutable:
+            response['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE}, immutable'
+        else:
+            # Unhashed names may change in place; revalidate via Last-Modified
+            response['Cache-Control'] = 'public, no-cache'
+        return response
+
+
+class ConditionalGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware limited to text responses. Streaming responses are left
+    alone: the stock middleware flushes after every chunk, which for
+    line-by-line JSONL costs more bytes than it saves.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or not response.get('Content-Type', '').startswith(GZIP_CONTENT_TYPES):
+            return response
+        return super().process_response(request, response)
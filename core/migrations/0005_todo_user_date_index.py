@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_todo_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['user', 'date', 'created_at', 'completed'], name='core_todo_user_date_idx'),
+        ),
+    ]
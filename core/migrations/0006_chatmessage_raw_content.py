@@ -0,0 +1,44 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:58
+
+import html
+import re
+
+from django.db import migrations, models
+
+
+def strip_html(text):
+    text = re.sub(r'<br\s*/?>', '\n', text)
+    text = re.sub(r'<[^>]+>', '', text)
+    return html.unescape(text)
+
+
+def backfill_raw_content(apps, schema_editor):
+    ChatMessage = apps.get_model('core', 'ChatMessage')
+    messages = ChatMessage.objects.using(schema_editor.connection.alias)
+    batch = []
+    for message in messages.only('id', 'role', 'content').iterator(chunk_size=2000):
+        message.raw_content = message.content if message.role == 'user' else strip_html(message.content)
+        batch.append(message)
+        if len(batch) == 2000:
+            messages.bulk_update(batch, ['raw_content'])
+            batch = []
+    if batch:
+        messages.bulk_update(batch, ['raw_content'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_todo_user_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='raw_content',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(
+            backfill_raw_content, migrations.RunPython.noop, hints={'model_name': 'chatmessage'}
+        ),
+    ]
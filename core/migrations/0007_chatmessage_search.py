@@ -0,0 +1,66 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:58
+
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS core_chatmessage_fts USING fts5(
+        raw_content, user_key, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS core_chatmessage_fts_insert
+    AFTER INSERT ON core_chatmessage BEGIN
+        INSERT INTO core_chatmessage_fts(rowid, raw_content, user_key)
+        VALUES (new.id, new.raw_content, 'u' || COALESCE(new.user_id, 0));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_chatmessage_fts_delete
+    AFTER DELETE ON core_chatmessage BEGIN
+        DELETE FROM core_chatmessage_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_chatmessage_fts_update
+    AFTER UPDATE OF raw_content, user_id ON core_chatmessage BEGIN
+        UPDATE core_chatmessage_fts
+        SET raw_content = new.raw_content, user_key = 'u' || COALESCE(new.user_id, 0)
+        WHERE rowid = old.id;
+    END""",
+    """INSERT INTO core_chatmessage_fts(rowid, raw_content, user_key)
+    SELECT id, raw_content, 'u' || COALESCE(user_id, 0) FROM core_chatmessage""",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS core_chatmessage_fts_insert",
+    "DROP TRIGGER IF EXISTS core_chatmessage_fts_delete",
+    "DROP TRIGGER IF EXISTS core_chatmessage_fts_update",
+    "DROP TABLE IF EXISTS core_chatmessage_fts",
+]
+
+# Must match the expression used by core.search so the planner picks the index
+POSTGRES_FORWARD = [
+    """CREATE INDEX IF NOT EXISTS core_chatmessage_tsv_idx ON core_chatmessage
+    USING GIN (to_tsvector('simple', raw_content))""",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS core_chatmessage_tsv_idx",
+]
+
+
+def run(statements_by_vendor):
+    def apply(apps, schema_editor):
+        statements = statements_by_vendor.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_chatmessage_raw_content'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+            hints={'model_name': 'chatmessage'},
+        ),
+    ]
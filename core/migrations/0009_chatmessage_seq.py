@@ -0,0 +1,69 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def number_existing_messages(apps, schema_editor):
+    """Number each user's history in created_at order and start their counters after it."""
+    ChatMessage = apps.get_model('core', 'ChatMessage')
+    ChatTurnCounter = apps.get_model('core', 'ChatTurnCounter')
+    db_alias = schema_editor.connection.alias
+
+    counters = []
+    batch = []
+    user_id = None
+    seq = 0
+    messages = (
+        ChatMessage.objects.using(db_alias).filter(user__isnull=False)
+        .order_by('user_id', 'created_at', 'id')
+        .only('id', 'user_id')
+    )
+    for message in messages.iterator(chunk_size=2000):
+        if message.user_id != user_id:
+            if user_id is not None:
+                counters.append(ChatTurnCounter(user_id=user_id, last_seq=seq))
+            user_id, seq = message.user_id, 0
+        seq += 1
+        message.seq = seq
+        batch.append(message)
+        if len(batch) == 2000:
+            ChatMessage.objects.using(db_alias).bulk_update(batch, ['seq'])
+            batch = []
+    if batch:
+        ChatMessage.objects.using(db_alias).bulk_update(batch, ['seq'])
+    if user_id is not None:
+        counters.append(ChatTurnCounter(user_id=user_id, last_seq=seq))
+    ChatTurnCounter.objects.using(db_alias).bulk_create(counters, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0008_queuedtask'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatTurnCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='chat_turn_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_seq', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='seq',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(
+            number_existing_messages, migrations.RunPython.noop, hints={'model_name': 'chatmessage'}
+        ),
+        migrations.AddConstraint(
+            model_name='chatmessage',
+            constraint=models.UniqueConstraint(condition=models.Q(('seq__isnull', False)), fields=('user', 'seq'), name='core_chatmessage_user_seq_uniq'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_admin_date_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('messages', models.PositiveIntegerField(default=0)),
+                ('questions', models.PositiveIntegerField(default=0)),
+                ('replies', models.PositiveIntegerField(default=0)),
+                ('reply_chars', models.PositiveBigIntegerField(default=0)),
+                ('day', models.DateField(unique=True)),
+                ('active_users', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChatHourlyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('messages', models.PositiveIntegerField(default=0)),
+                ('questions', models.PositiveIntegerField(default=0)),
+                ('replies', models.PositiveIntegerField(default=0)),
+                ('reply_chars', models.PositiveBigIntegerField(default=0)),
+                ('hour', models.DateTimeField(unique=True)),
+                ('active_users', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['hour'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChatRollupState',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_message_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChatUserDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('messages', models.PositiveIntegerField(default=0)),
+                ('questions', models.PositiveIntegerField(default=0)),
+                ('replies', models.PositiveIntegerField(default=0)),
+                ('reply_chars', models.PositiveBigIntegerField(default=0)),
+                ('day', models.DateField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['day'],
+                'indexes': [models.Index(fields=['day', 'user'], name='core_chatuserdaily_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='core_chatuserdailystats_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:20
+
+from django.db import migrations
+
+# Case-insensitive and only for users that gave an email, so accounts
+# created without one (createsuperuser, admin) keep working
+FORWARD = [
+    """CREATE UNIQUE INDEX IF NOT EXISTS core_auth_user_email_uniq
+    ON auth_user (lower(email)) WHERE email <> ''""",
+]
+
+REVERSE = [
+    "DROP INDEX IF EXISTS core_auth_user_email_uniq",
+]
+
+SUPPORTED_VENDORS = ('sqlite', 'postgresql')
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor not in SUPPORTED_VENDORS:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT lower(email) FROM auth_user WHERE email <> '' "
+            "GROUP BY lower(email) HAVING COUNT(*) > 1"
+        )
+        duplicates = [row[0] for row in cursor.fetchmany(5)]
+    if duplicates:
+        raise RuntimeError(
+            f"auth_user has duplicate emails ({', '.join(duplicates)}, ...); "
+            "resolve them before applying this migration"
+        )
+    for statement in FORWARD:
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in SUPPORTED_VENDORS:
+        for statement in REVERSE:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0011_chat_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_chat_database_router'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FAQEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question', models.TextField()),
+                ('normalized_question', models.CharField(max_length=300, unique=True)),
+                ('answer', models.TextField()),
+                ('answer_html', models.TextField()),
+                ('model', models.CharField(blank=True, default='', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'FAQ entry',
+                'verbose_name_plural': 'FAQ entries',
+                'ordering': ['normalized_question'],
+            },
+        ),
+    ]
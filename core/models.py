@@ -2,6 +2,8 @@ from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
 
+from .routers import chat_db_for_user
+
 class Todo(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='todos', null=True, blank=True)
     title = models.CharField(max_length=255)
@@ -14,6 +16,28 @@ class Todo(models.Model):
     
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Covers day and range lookups in date/created_at order;
+            # completed is included so per-day counts never touch the table
+            models.Index(fields=['user', 'date', 'created_at', 'completed'], name='core_todo_user_date_idx'),
+            # Admin date drill-down across all users
+            models.Index(fields=['date'], name='core_todo_date_idx'),
+        ]
+
+
+class ChatMessageQuerySet(models.QuerySet):
+    def for_user(self, user):
+        """One user's messages (user or id), on the database that holds them."""
+        user_id = getattr(user, 'pk', user)
+        return self.using(chat_db_for_user(user_id)).filter(user_id=user_id)
+
+    def create(self, **kwargs):
+        # QuerySet.create() saves on the queryset's database, which is the
+        # first chat database unless .using() picked one; let the router
+        # place the new row by its user instead
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True, using=self._db)
+        return obj
 
 
 class ChatMessage(models.Model):
@@ -23,16 +47,167 @@ class ChatMessage(models.Model):
         ('assistant', 'Assistant'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_messages', null=True, blank=True)
+    # May live on another database than auth_user (core.routers): no
+    # constraint, and core.chat_state.delete_user_chat replaces the cascade
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False,
+        related_name='chat_messages', null=True, blank=True
+    )
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Plain text before markdown -> HTML conversion; used for search
+    raw_content = models.TextField(blank=True, default='')
+    # Python-side default; imports and bulk_create may pass their own time
+    created_at = models.DateTimeField(default=timezone.now)
+    # Per-user turn order (question n, answer n + 1); see core.chat_state
+    seq = models.PositiveIntegerField(null=True, blank=True)
+
+    objects = ChatMessageQuerySet.as_manager()
     
     class Meta:
         ordering = ['created_at']
         indexes = [
             models.Index(fields=['user', 'created_at']),
+            # Admin date drill-down across all users
+            models.Index(fields=['created_at'], name='core_chatmessage_created_idx'),
+        ]
+        constraints = [
+            # Partial, so SQLite adds it as an index instead of rebuilding
+            # the table (which would drop the search triggers)
+            models.UniqueConstraint(
+                fields=['user', 'seq'], condition=models.Q(seq__isnull=False),
+                name='core_chatmessage_user_seq_uniq'
+            ),
         ]
     
     def __str__(self):
         return f"{self.role}: {self.content[:50]}"
+
+
+class ChatTurnCounter(models.Model):
+    """Last ChatMessage.seq handed out to a user"""
+    # Stored next to the user's messages, see ChatMessage.user
+    user = models.OneToOneField(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, primary_key=True, related_name='chat_turn_counter'
+    )
+    last_seq = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.last_seq}"
+
+
+class QueuedTask(models.Model):
+    """Background task persisted when the in-process queue is full or stopping"""
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.name} (#{self.id})"
+
+
+class ChatUsage(models.Model):
+    """Tokens and latency of one model call, written off the request path by core.tasks"""
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='chat_usage')
+    route = models.CharField(max_length=30, blank=True, default='')
+    model = models.CharField(max_length=100)
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    completion_tokens = models.PositiveIntegerField(null=True, blank=True)
+    latency_ms = models.PositiveIntegerField()
+    # Time of the call, not of the (possibly delayed) insert
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.user_id} {self.model} ({self.prompt_tokens}+{self.completion_tokens})"
+
+
+class ChatRollupState(models.Model):
+    """High-water mark of a rollup: every ChatMessage up to last_message_id is counted"""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_message_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_message_id}"
+
+
+class ChatStatsBase(models.Model):
+    """Counters shared by the chat rollup tables; see core.analytics"""
+    messages = models.PositiveIntegerField(default=0)
+    questions = models.PositiveIntegerField(default=0)
+    replies = models.PositiveIntegerField(default=0)
+    # Sum of reply lengths in characters; average = reply_chars / replies
+    reply_chars = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class ChatHourlyStats(ChatStatsBase):
+    hour = models.DateTimeField(unique=True)
+    active_users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['hour']
+
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H}:00 ({self.messages})"
+
+
+class ChatDailyStats(ChatStatsBase):
+    day = models.DateField(unique=True)
+    active_users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['day']
+
+    def __str__(self):
+        return f"{self.day} ({self.messages})"
+
+
+class ChatUserDailyStats(ChatStatsBase):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_daily_stats')
+    day = models.DateField()
+
+    class Meta:
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='core_chatuserdailystats_uniq'),
+        ]
+        indexes = [
+            # Per-day leaderboards and active-user counts
+            models.Index(fields=['day', 'user'], name='core_chatuserdaily_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.day} ({self.messages})"
+
+
+class FAQEntry(models.Model):
+    """Stored answer to a frequent chat question; see core.faq"""
+    question = models.TextField()
+    # core.faq.normalize_question(question): chat questions are matched on it
+    normalized_question = models.CharField(max_length=300, unique=True)
+    answer = models.TextField()
+    # core.chat.convert_markdown_to_html(answer), so a hit needs no rendering
+    answer_html = models.TextField()
+    model = models.CharField(max_length=100, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['normalized_question']
+        verbose_name = 'FAQ entry'
+        verbose_name_plural = 'FAQ entries'
+
+    def __str__(self):
+        return self.question[:80]
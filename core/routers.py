@@ -0,0 +1,93 @@
+"""
+Database routing for the chat tables.
+
+Chat writes are the busiest in the app, and on SQLite every write takes the
+one database-wide lock, so a chat insert makes logins, sessions and todo
+saves wait. CHAT_DATABASES (see settings) moves the tables in CHAT_MODELS
+to their own database, or splits them over several by user id; everything
+else stays on "default".
+
+A user's chat rows always live on chat_db_for_user(user_id). Saves find it
+from the instance, but queries carry no user, so code reading or deleting
+chat rows goes through ChatMessage.objects.for_user() or .using(). Without
+a hint the router answers with the first chat database, which is the only
+one unless the tables are sharded.
+
+Chat rows reference auth_user without a database constraint and are
+removed by a signal when a user is deleted, because neither a foreign key
+nor a cascading delete can cross databases. Rollups (core.analytics) stay
+on "default" next to auth_user, which their queries join.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+CHAT_APP = "core"
+CHAT_MODELS = frozenset({"chatmessage", "chatturncounter"})
+
+
+def chat_databases():
+    """Aliases holding chat tables, in shard order."""
+    return settings.CHAT_DATABASES or ["default"]
+
+
+def chat_db_for_user(user_id):
+    """Alias holding this user's chat rows; messages without a user go to the first."""
+    aliases = chat_databases()
+    if user_id is None or len(aliases) == 1:
+        return aliases[0]
+    # Ids are dense, so modulo spreads users evenly and never changes
+    return aliases[int(user_id) % len(aliases)]
+
+
+def is_chat_model(model):
+    """True for a chat model class or instance."""
+    return model._meta.app_label == CHAT_APP and model._meta.model_name in CHAT_MODELS
+
+
+def _user_id(instance):
+    if instance is None:
+        return None
+    if is_chat_model(instance):
+        return instance.user_id
+    # Related managers and FK assignment pass the user itself, possibly as
+    # request.user's lazy wrapper, hence _meta rather than type()
+    if instance._meta.label == settings.AUTH_USER_MODEL:
+        return instance.pk
+    return None
+
+
+class ChatDatabaseRouter:
+    """Sends CHAT_MODELS to the chat databases; other models are left to the default."""
+
+    def _db_for(self, model, hints):
+        if not settings.CHAT_DATABASES:
+            return None
+        instance = hints.get("instance")
+        if is_chat_model(model):
+            return chat_db_for_user(_user_id(instance))
+        if instance is not None and is_chat_model(instance):
+            # message.user: Django would otherwise look on the message's database
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Chat rows point at users on another database by id only
+        if settings.CHAT_DATABASES and (is_chat_model(obj1) or is_chat_model(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not settings.CHAT_DATABASES:
+            return None
+        is_chat = app_label == CHAT_APP and model_name in CHAT_MODELS
+        if db in settings.CHAT_DATABASES:
+            # Operations without a model name (RunPython, RunSQL) only run
+            # here when they say which chat model they touch via hints
+            return is_chat
+        return False if is_chat else None
@@ -0,0 +1,174 @@
+"""
+Full-text search over a user's chat history.
+
+SQLite uses the core_chatmessage_fts FTS5 table and PostgreSQL a GIN index
+on to_tsvector('simple', raw_content); both are created and kept in sync by
+migration 0007. Other backends fall back to icontains. Queries run on the
+chat database holding the user's messages (core.routers).
+"""
+import html
+import re
+from datetime import timezone as dt_timezone
+
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ChatMessage
+from .routers import chat_db_for_user
+
+SEARCH_MAX_PER_PAGE = 50
+SNIPPET_WORDS = 16
+
+# Private-use markers survive escaping and are swapped for <mark> afterwards
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _highlight(snippet):
+    """HTML-escape a snippet and turn the match markers into <mark> tags."""
+    escaped = html.escape(snippet)
+    return escaped.replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+def _fts5_query(terms, user_id):
+    """
+    Quote every term so user input can never break FTS5 syntax; the last
+    term is a prefix match so results appear while the user is typing.
+    """
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return f'user_key:"u{user_id}" AND {{raw_content}}: ({" ".join(quoted)})'
+
+
+def _search_sqlite(connection, user, terms, limit, offset):
+    sql = """
+        SELECT m.id, m.role, m.created_at,
+               snippet(core_chatmessage_fts, 0, %s, %s, '…', %s)
+        FROM core_chatmessage_fts
+        JOIN core_chatmessage m ON m.id = core_chatmessage_fts.rowid
+        WHERE core_chatmessage_fts MATCH %s
+        ORDER BY bm25(core_chatmessage_fts)
+        LIMIT %s OFFSET %s
+    """
+    params = [_MARK_START, _MARK_END, SNIPPET_WORDS, _fts5_query(terms, user.id), limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _search_postgres(connection, user, terms, limit, offset):
+    sql = """
+        SELECT id, role, created_at,
+               ts_headline('simple', raw_content, query,
+                           %s)
+        FROM core_chatmessage, to_tsquery('simple', %s) query
+        WHERE user_id = %s AND to_tsvector('simple', raw_content) @@ query
+        ORDER BY ts_rank(to_tsvector('simple', raw_content), query) DESC
+        LIMIT %s OFFSET %s
+    """
+    options = f"StartSel={_MARK_START}, StopSel={_MARK_END}, MaxWords={SNIPPET_WORDS}, MinWords=5"
+    tsquery = " & ".join(terms[:-1] + [terms[-1] + ":*"])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [options, tsquery, user.id, limit, offset])
+        return cursor.fetchall()
+
+
+def _search_fallback(connection, user, terms, limit, offset):
+    queryset = ChatMessage.objects.for_user(user)
+    for term in terms:
+        queryset = queryset.filter(raw_content__icontains=term)
+    rows = queryset.order_by("-created_at").values_list("id", "role", "created_at", "raw_content")
+    return [
+        (pk, role, created_at, content[:SNIPPET_WORDS * 8])
+        for pk, role, created_at, content in rows[offset:offset + limit]
+    ]
+
+
+# Same triggers as migration 0007. SQLite drops triggers when Django rebuilds
+# a table during a migration, so they are re-created after every migrate.
+SQLITE_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS core_chatmessage_fts_insert
+    AFTER INSERT ON core_chatmessage BEGIN
+        INSERT INTO core_chatmessage_fts(rowid, raw_content, user_key)
+        VALUES (new.id, new.raw_content, 'u' || COALESCE(new.user_id, 0));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_chatmessage_fts_delete
+    AFTER DELETE ON core_chatmessage BEGIN
+        DELETE FROM core_chatmessage_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_chatmessage_fts_update
+    AFTER UPDATE OF raw_content, user_id ON core_chatmessage BEGIN
+        UPDATE core_chatmessage_fts
+        SET raw_content = new.raw_content, user_key = 'u' || COALESCE(new.user_id, 0)
+        WHERE rowid = old.id;
+    END""",
+]
+
+
+def ensure_search_triggers(using="default", **kwargs):
+    """post_migrate hook: restore the FTS sync triggers if a migration dropped them."""
+    conn = connections[using]
+    if conn.vendor != "sqlite":
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'core_chatmessage_fts'"
+        )
+        if cursor.fetchone() is None:
+            return
+        for statement in SQLITE_TRIGGERS:
+            cursor.execute(statement)
+
+
+def fts_available(connection):
+    """True when the SQLite FTS5 table from migration 0007 exists."""
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'core_chatmessage_fts'"
+        )
+        return cursor.fetchone() is not None
+
+
+def search_chat_messages(user, query, page=1, per_page=20):
+    """
+    Ranked, highlighted search results for one page.
+    Returns {"results": [...], "has_next": bool}. One extra row is fetched
+    instead of running COUNT(*) over the matches.
+    """
+    terms = _WORD_RE.findall(query.lower())
+    if not terms:
+        return {"results": [], "has_next": False}
+
+    per_page = max(1, min(per_page, SEARCH_MAX_PER_PAGE))
+    offset = (max(page, 1) - 1) * per_page
+
+    connection = connections[chat_db_for_user(user.id)]
+    if connection.vendor == "postgresql":
+        search = _search_postgres
+    elif fts_available(connection):
+        search = _search_sqlite
+    else:
+        search = _search_fallback
+
+    rows = search(connection, user, terms, per_page + 1, offset)
+
+    results = []
+    for pk, role, created_at, snippet in rows[:per_page]:
+        # Raw SQL skips the model field converters on SQLite
+        if isinstance(created_at, str):
+            created_at = parse_datetime(created_at)
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at, dt_timezone.utc)
+        results.append({
+            "id": pk,
+            "role": role,
+            "created_at": created_at.isoformat(),
+            "snippet": _highlight(snippet),
+        })
+
+    return {"results": results, "has_next": len(rows) > per_page}
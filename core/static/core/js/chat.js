@@ -1,100 +1,94 @@
+// chat.js — chat page behaviour (core/templates/core/chat.html)
+
 document.addEventListener("DOMContentLoaded", () => {
-    const el = document.getElementById("ai-text");
-    if (!el) return;
+    const form = document.getElementById("chatForm");
+    if (!form) return;
 
-    const text = el.dataset.text;
-    let i = 0;
+    const input = document.getElementById("messageInput");
+    const sendBtn = document.getElementById("sendBtn");
+    const indicator = document.getElementById("typingIndicator");
+    const csrfToken = form.querySelector("[name=csrfmiddlewaretoken]").value;
 
-    function type() {
-        if (i < text.length) {
-            // ✅ ЗМІНЕНО: Використовуємо innerHTML замість textContent
-            // Перевіряємо чи це початок <br> тегу
-            if (text.substr(i, 4) === '<br>') {
-                el.innerHTML += '<br>';
-                i += 4; // Пропускаємо всі 4 символи <br>
-            } else {
-                el.innerHTML += text.charAt(i);
-                i++;
-            }
-            setTimeout(type, 25); // швидкість друку
+    // Auto-scroll to bottom
+    function scrollToBottom() {
+        const container = document.getElementById("chatScroll");
+        if (container) {
+            setTimeout(() => {
+                container.scrollTop = container.scrollHeight;
+            }, 100);
         }
     }
 
-    type();
-});
+    // Submit form
+    form.addEventListener("submit", function(e) {
+        e.preventDefault();
+
+        const message = input.value.trim();
+        if (!message) return;
+
+        // Get the form data
+        const formData = new FormData(form);
 
-// chat.js
+        // Disable button and input
+        sendBtn.disabled = true;
+        sendBtn.textContent = "Sending...";
+        input.disabled = true;
 
-async function sendMessage() {
-    const input = document.getElementById("chat-input");
-    const message = input.value.trim();
-    
-    if (!message) return;
-    
-    // Показуємо повідомлення користувача
-    addMessageToChat("user", message);
-    input.value = "";
-    
-    try {
-        const response = await fetch("/chat/", {
+        // Show typing indicator
+        indicator.style.display = "flex";
+        scrollToBottom();
+
+        // Submit via fetch and append the new messages in place
+        fetch(form.action, {
             method: "POST",
+            body: formData,
             headers: {
-                "Content-Type": "application/json",
-                "X-CSRFToken": getCookie("csrftoken")
-            },
-            body: JSON.stringify({ message: message })
+                "X-Requested-With": "XMLHttpRequest"
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            const welcome = document.getElementById("welcomeMessage");
+            if (welcome && data.html) welcome.remove();
+
+            if (data.html) {
+                indicator.insertAdjacentHTML("beforebegin", data.html);
+            }
+            if (data.error) {
+                const errorBox = document.createElement("div");
+                errorBox.className = "chat-error";
+                errorBox.innerHTML = "<strong>⚠️ Error:</strong> ";
+                errorBox.appendChild(document.createTextNode(data.error));
+                indicator.insertAdjacentElement("beforebegin", errorBox);
+            }
+        })
+        .catch(err => {
+            console.error("Chat error:", err);
+        })
+        .finally(() => {
+            sendBtn.disabled = false;
+            sendBtn.textContent = "Send";
+            input.disabled = false;
+            input.value = "";
+            input.focus();
+            indicator.style.display = "none";
+            scrollToBottom();
         });
-        
-        const data = await response.json();
-        
-        // Логуємо контекст (для дебагу)
-        console.log("Контекст розмови:", data.context_summary);
-        console.log("Релевантність:", data.is_relevant);
-        console.log("Впевненість:", data.confidence);
-        
-        // Показуємо попередження якщо не про баскетбол
-        if (!data.is_relevant) {
-            addMessageToChat("system", "⚠️ Схоже, це питання не про баскетбол");
-        }
-        
-        // Показуємо контекст (опціонально)
-        if (data.context_summary && data.context_summary !== "Нова розмова") {
-            console.log("Ми обговорювали:", data.context_summary);
-        }
-        
-        // Показуємо відповідь AI
-        addMessageToChat("assistant", data.response);
-        
-    } catch (error) {
-        console.error("Помилка:", error);
-        addMessageToChat("system", "Помилка відправки повідомлення");
-    }
-}
+    });
 
-// ✅ ОНОВЛЕНА ФУНКЦІЯ - тепер підтримує HTML
-function addMessageToChat(role, text) {
-    const chatBox = document.getElementById("chat-box");
-    const messageDiv = document.createElement("div");
-    messageDiv.className = `message ${role}`;
-    
-    // ✅ ЗМІНЕНО: Використовуємо innerHTML для підтримки <br>
-    messageDiv.innerHTML = text;
-    
-    chatBox.appendChild(messageDiv);
-    chatBox.scrollTop = chatBox.scrollHeight;
-}
+    // Clear chat
+    document.getElementById("clearChatBtn").addEventListener("click", () => {
+        if (!confirm("Clear conversation history? This action cannot be undone.")) return;
 
-function getCookie(name) {
-    let cookieValue = null;
-    if (document.cookie && document.cookie !== '') {
-        const cookies = document.cookie.split(';');
-        for (let i = 0; i < cookies.length; i++) {
-            const cookie = cookies[i].trim();
-            if (cookie.substring(0, name.length + 1) === (name + '=')) {
-                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
-                break;
-            }
-        }
-    }
-    return cookieValue;
-}
\ No newline at end of file
+        fetch(form.dataset.resetUrl, {
+            method: "POST",
+            headers: {"X-CSRFToken": csrfToken},
+            body: new FormData()
+        }).then(() => {
+            setTimeout(() => location.reload(), 500);
+        });
+    });
+
+    // Scroll on load
+    window.addEventListener("load", scrollToBottom);
+});
@@ -0,0 +1,54 @@
+"""
+Static files storage: manifest-hashed names plus pre-compressed copies.
+
+collectstatic writes every file under a content-hashed name
+(style.css -> style.3f2a9c1b7e4d.css), so the hashed URLs can be cached
+forever, and stores a gzip sibling (style.3f2a9c1b7e4d.css.gz) for text
+assets that StaticFilesMiddleware hands to clients sending
+Accept-Encoding: gzip. Nothing is compressed per request.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.json', '.map', '.svg', '.txt', '.xml', '.html', '.ico'}
+MIN_COMPRESS_SIZE = 256  # bytes; smaller files gain nothing after headers
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        # Originals are served too (admin, unhashed references), so compress both
+        names = set(self.hashed_files) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if self._compress(name):
+                yield name, f'{name}.gz', True
+
+    def _compress(self, name):
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS or not self.exists(name):
+            return False
+        with self.open(name) as source:
+            content = source.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return False
+        # mtime=0 keeps the output byte-identical between deploys
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) >= len(content):
+            return False
+        gz_name = f'{name}.gz'
+        if self.exists(gz_name):
+            self.delete(gz_name)
+        self._save(gz_name, ContentFile(compressed))
+        return True
+
+    def stored_name(self, name):
+        # No manifest yet (fresh checkout, test runs): keep the plain name
+        # instead of failing every {% static %} tag
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
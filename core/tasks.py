@@ -0,0 +1,222 @@
+"""
+In-process background tasks for work that must not delay the response.
+
+Tasks run on a small pool of daemon threads fed by a bounded queue. When
+the queue is full, or when the process shuts down with work still queued,
+tasks are written to the QueuedTask table instead of being dropped;
+`manage.py run_queued_tasks` executes them later.
+
+TASK_RUNNER_WORKERS = 0 runs every task inline (useful for tests and
+one-off scripts).
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(func):
+    """Register a function so it can be queued by name and persisted."""
+    name = f"{func.__module__}.{func.__name__}"
+    _registry[name] = func
+    func.task_name = name
+    return func
+
+
+def run_task(name, args, kwargs):
+    """Execute a registered task by name (used by workers and the DB queue)."""
+    func = _registry.get(name)
+    if func is None:
+        raise LookupError(f"Unknown task: {name}")
+    return func(*args, **kwargs)
+
+
+class TaskRunner:
+    """Bounded thread pool with a durable overflow queue and stats."""
+
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.threads = []
+        self.lock = threading.Lock()
+        self.accepting = True
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "persisted": 0,
+            "latency_total_ms": 0.0,
+            "latency_max_ms": 0.0,
+        }
+
+    def _start(self):
+        with self.lock:
+            if self.threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"task-worker-{i}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def _record(self, key, latency_ms=None):
+        with self.lock:
+            self.stats[key] += 1
+            if latency_ms is not None:
+                self.stats["latency_total_ms"] += latency_ms
+                self.stats["latency_max_ms"] = max(self.stats["latency_max_ms"], latency_ms)
+
+    def _execute(self, name, args, kwargs, enqueued_at):
+        try:
+            run_task(name, args, kwargs)
+        except Exception as e:
+            self._record("failed")
+            logger.error(f"Task {name} failed: {e}", exc_info=True)
+            return
+        latency_ms = (time.monotonic() - enqueued_at) * 1000
+        self._record("completed", latency_ms)
+        logger.info(f"Task {name} done in {latency_ms:.1f} ms (queue depth {self.queue.qsize()})")
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            close_old_connections()
+            try:
+                self._execute(*item)
+            finally:
+                # Worker threads own their DB connections; don't leak them
+                connections.close_all()
+                self.queue.task_done()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue a registered task. Arguments must be JSON-serializable."""
+        name = func.task_name
+        self._record("submitted")
+
+        if self.workers <= 0:
+            self._execute(name, args, kwargs, time.monotonic())
+            return
+
+        if self.accepting:
+            self._start()
+            try:
+                self.queue.put_nowait((name, args, kwargs, time.monotonic()))
+                return
+            except queue.Full:
+                logger.warning(f"Task queue full, persisting {name}")
+
+        self._persist(name, args, kwargs)
+
+    def _persist(self, name, args, kwargs):
+        from .models import QueuedTask
+
+        QueuedTask.objects.create(name=name, args=list(args), kwargs=kwargs)
+        self._record("persisted")
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        stats["queue_depth"] = self.queue.qsize()
+        done = stats["completed"]
+        stats["latency_avg_ms"] = round(stats["latency_total_ms"] / done, 1) if done else 0.0
+        return stats
+
+    def shutdown(self, timeout=None):
+        """
+        Stop accepting work, let workers finish what they have for up to
+        `timeout` seconds, then persist anything still queued.
+        """
+        if timeout is None:
+            timeout = getattr(settings, "TASK_SHUTDOWN_TIMEOUT", 10)
+        self.accepting = False
+        deadline = time.monotonic() + timeout
+
+        leftovers = []
+        for _ in self.threads:
+            try:
+                self.queue.put(None, timeout=max(deadline - time.monotonic(), 0))
+            except queue.Full:
+                break
+        for thread in self.threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                leftovers.append(item)
+
+        for name, args, kwargs, _ in leftovers:
+            try:
+                self._persist(name, args, kwargs)
+            except Exception as e:
+                logger.error(f"Could not persist task {name} on shutdown: {e}")
+
+        logger.info(f"Task runner stopped: {self.get_stats()}")
+
+
+runner = TaskRunner(
+    workers=getattr(settings, "TASK_RUNNER_WORKERS", 2),
+    queue_size=getattr(settings, "TASK_QUEUE_SIZE", 200),
+)
+atexit.register(runner.shutdown)
+
+
+def submit(func, *args, **kwargs):
+    runner.submit(func, *args, **kwargs)
+
+
+def run_persisted_tasks(limit=None, max_attempts=5):
+    """Execute tasks from the QueuedTask table; returns (done, failed)."""
+    from .models import QueuedTask
+
+    done = failed = 0
+    pending = QueuedTask.objects.filter(attempts__lt=max_attempts).order_by("id")
+    if limit:
+        pending = pending[:limit]
+
+    for queued in pending.iterator(chunk_size=100):
+        try:
+            run_task(queued.name, queued.args, queued.kwargs)
+        except Exception as e:
+            failed += 1
+            queued.attempts += 1
+            queued.last_error = str(e)[:1000]
+            queued.save(update_fields=["attempts", "last_error"])
+            logger.error(f"Queued task {queued.id} ({queued.name}) failed: {e}")
+        else:
+            done += 1
+            queued.delete()
+    return done, failed
+
+
+# ============ CHAT POST-REPLY TASKS ============
+
+@task
+def record_chat_usage(user_id, model, prompt_tokens, completion_tokens, latency_ms, route=None, created_at=None):
+    """Store the token counts and latency of one model call (created_at is ISO-8601)."""
+    from .models import ChatUsage
+
+    ChatUsage.objects.create(
+        user_id=user_id, route=route or '', model=model,
+        prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+        latency_ms=round(latency_ms),
+        created_at=parse_datetime(created_at) if created_at else timezone.now(),
+    )
+    logger.info(
+        f"Chat usage: user={user_id} route={route} model={model} prompt_tokens={prompt_tokens} "
+        f"completion_tokens={completion_tokens} latency_ms={latency_ms:.0f}"
+    )
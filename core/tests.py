@@ -1,3 +1,1271 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+import warnings
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth import HASH_SESSION_KEY
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from . import llm, middleware, tasks, views
+from .admin import estimate_table_rows
+from .algorithms import (
+    BM25Index, BulkDataParser, ChatRouter, EloRatingEngine, RetrievalContextManager, RollingWindow, SeasonSimulator,
+    TeamStatsAggregator,
+)
+from .analytics import chat_stats, update_chat_rollups
+from .caching import PLAYERS_NAMESPACE, get_or_compute, player_data_changed
+from .chat import prepare_reply
+from .chat_state import ContextRegistry, KeyedLock, reserve_turn_seq
+from . import export
+from .faq import find_faq_answer, normalize_question
+from .models import (
+    ChatDailyStats, ChatHourlyStats, ChatMessage, ChatRollupState, ChatUsage, ChatUserDailyStats, FAQEntry,
+    QueuedTask, Todo,
+)
+from .routers import ChatDatabaseRouter, chat_db_for_user
+from .search import fts_available, search_chat_messages
+from .throttle import SlidingWindowThrottle, client_ip
+
+
+class ChatRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ChatRouter(settings.CHAT_ROUTES)
+
+    def assertRoute(self, message, route, history_length=0):
+        name, reasons = self.router.classify(message, history_length)
+        self.assertEqual(name, route, f"{message!r} -> {name} {reasons}")
+
+    def test_greetings_and_acknowledgements_are_small_talk(self):
+        for message in ("hi", "Hello!", "ok thanks", "thank you so much", "Привіт!", "Дякую!"):
+            with self.subTest(message=message):
+                self.assertRoute(message, "small_talk")
+                self.assertRoute(message, "small_talk", history_length=4)
+
+    def test_short_questions_are_quick(self):
+        for message in (
+            "How do I improve free throws?",
+            "Who won in 2016?",
+            "tell me about Jokic",
+            "hi, how do I shoot?",
+            "ok?",
+            "Як покращити кидок",
+        ):
+            with self.subTest(message=message):
+                self.assertRoute(message, "quick")
+
+    def test_short_follow_up_is_quick(self):
+        self.assertRoute("and his assists", "quick", history_length=2)
+
+    def test_detail_markers_are_detailed(self):
+        for message in (
+            "Make me a weekly plan",
+            "Compare LeBron and Jordan",
+            "Explain the triangle offense",
+            "Склади детальний план тренувань",
+            "Порівняй Карі та Неша",
+        ):
+            with self.subTest(message=message):
+                self.assertRoute(message, "detailed")
+
+    def test_markers_match_on_word_boundaries(self):
+        for message in ("planet basketball", "supplant the starter", "unexplained"):
+            with self.subTest(message=message):
+                self.assertEqual(self.router.detail_markers(message), [])
+        self.assertEqual(self.router.detail_markers("plans and workouts, plans"), ["plans", "workouts"])
+
+    def test_long_and_multi_part_messages_are_detailed(self):
+        self.assertRoute(" ".join(["shot"] * ChatRouter.LONG_MESSAGE_WORDS), "detailed")
+        self.assertRoute("Who is taller? Who is faster?", "detailed")
+
+    def test_route_uses_the_routes_table(self):
+        decision = self.router.route("hi")
+        self.assertEqual(decision["route"], "small_talk")
+        self.assertEqual(decision["max_tokens"], settings.CHAT_ROUTES["small_talk"]["max_tokens"])
+        self.assertEqual(decision["context_messages"], settings.CHAT_ROUTES["small_talk"]["context_messages"])
+        self.assertEqual(self.router.route("How do I improve free throws?")["route"], "quick")
+
+    def test_unknown_route_falls_back_to_default(self):
+        router = ChatRouter({"quick": {"model": "m", "context_messages": 6, "max_tokens": 500}})
+        self.assertEqual(router.route("hi")["route"], "quick")
+
+
+class CaloriesBatchTests(TestCase):
+    ROW = {"gender": "male", "age": 25, "height": 190, "weight": 90, "activity": "high"}
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("coach", password="x"))
+
+    def post_rows(self, rows, **extra):
+        response = self.client.post("/calories/batch/", json.dumps(rows), content_type="application/json", **extra)
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_each_row_gets_a_result_or_an_error(self):
+        # Rows that are not objects must not leave uninitialized values in the arrays
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            records = self.post_rows([self.ROW, {**self.ROW, "age": 500}, "not a row", {**self.ROW, "gender": "x"}])
+        self.assertEqual([r.get("ok") for r in records[:-1]], [True, False, False, False])
+        self.assertGreater(records[0]["calories"], 0)
+        self.assertIn("error", records[1])
+        self.assertEqual(records[-1]["summary"], {"rows": 4, "ok": 1, "errors": 3, "truncated": False})
+
+    @override_settings(CALORIE_BATCH_MAX_ROWS=2)
+    def test_rows_past_the_limit_are_reported_once(self):
+        records = self.post_rows([self.ROW] * 5)
+        self.assertEqual([r.get("ok") for r in records[:-1]], [True, True, False])
+        self.assertEqual(records[2]["row"], 3)
+        self.assertTrue(records[-1]["summary"]["truncated"])
+
+    def test_jsonl_body_streams(self):
+        body = "\n".join([json.dumps(self.ROW), "{broken", json.dumps(self.ROW)])
+        response = self.client.post("/calories/batch/", body, content_type="application/x-ndjson")
+        records = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([r.get("ok") for r in records[:-1]], [True, False, True])
+
+    def test_invalid_json_and_unsupported_types_are_rejected(self):
+        response = self.client.post("/calories/batch/", "[", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/calories/batch/", json.dumps({"rows": 1}), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/calories/batch/", "x", content_type="text/plain")
+        self.assertEqual(response.status_code, 415)
+
+    @override_settings(CALORIE_BATCH_MAX_JSON_BYTES=100)
+    def test_json_over_the_byte_cap_is_refused(self):
+        body = json.dumps([self.ROW] * 5)
+        response = self.client.post("/calories/batch/", body, content_type="application/json")
+        self.assertEqual(response.status_code, 413)
+        upload = SimpleUploadedFile("roster.json", body.encode(), content_type="application/json")
+        response = self.client.post("/calories/batch/", {"file": upload})
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("JSONL", response.json()["error"])
+        # The same rows as JSONL stream past the cap
+        upload = SimpleUploadedFile("roster.jsonl", "\n".join(json.dumps(self.ROW) for _ in range(5)).encode())
+        response = self.client.post("/calories/batch/", {"file": upload})
+        self.assertEqual(response.status_code, 200)
+
+
+class EstimateTableRowsTests(TestCase):
+    def test_sqlite_estimate_ignores_partial_indexes(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("sqlite_stat1 is SQLite only")
+        user = User.objects.create_user("coach")
+        # Only numbered messages are in the partial (user, seq) unique index
+        ChatMessage.objects.bulk_create(
+            [ChatMessage(user=user, role="user", content="q", raw_content="q") for _ in range(30)]
+            + [ChatMessage(user=user, role="user", content="q", raw_content="q", seq=n) for n in range(5)]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+            # Put the partial index's row first, where LIMIT 1 alone would find it
+            cursor.execute("SELECT tbl, idx, stat FROM sqlite_stat1 WHERE tbl = 'core_chatmessage' "
+                           "ORDER BY idx != 'core_chatmessage_user_seq_uniq'")
+            stats = cursor.fetchall()
+            self.assertEqual(stats[0][1], "core_chatmessage_user_seq_uniq")
+            self.assertEqual(stats[0][2].split()[0], "5")
+            cursor.execute("DELETE FROM sqlite_stat1 WHERE tbl = 'core_chatmessage'")
+            cursor.executemany("INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES (%s, %s, %s)", stats)
+        self.assertEqual(estimate_table_rows(ChatMessage.objects.all()), 35)
+
+
+class SeasonSimulatorTests(SimpleTestCase):
+    def setUp(self):
+        self.simulator = SeasonSimulator(EloRatingEngine(), chunk_size=50)
+
+    def test_simulates_the_schedule(self):
+        result = self.simulator.simulate([("Lakers", "Celtics")] * 4, n_simulations=120, seed=1)
+        self.assertEqual(result["simulations"], 120)
+        self.assertEqual(result["games_remaining"], 4)
+        self.assertEqual({s["team"] for s in result["standings"]}, {"Lakers", "Celtics"})
+        self.assertAlmostEqual(sum(s["mean_wins"] for s in result["standings"]), 4, places=0)
+
+    def test_empty_schedule(self):
+        self.assertEqual(self.simulator.simulate([], n_simulations=10)["standings"], [])
+        result = self.simulator.simulate([], n_simulations=10, current_wins={"Lakers": 3, "Celtics": 5})
+        self.assertEqual([s["team"] for s in result["standings"]], ["Celtics", "Lakers"])
+        self.assertEqual(result["standings"][0]["first_place_pct"], 100.0)
+
+    def test_invalid_arguments_raise_value_error(self):
+        schedule = [("Lakers", "Celtics")]
+        for kwargs in ({"n_simulations": 0}, {"n_simulations": -5}, {"n_simulations": 2.5}, {"top_n": 0}):
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                self.simulator.simulate(schedule, **kwargs)
+        with self.assertRaises(ValueError):
+            SeasonSimulator(EloRatingEngine(), chunk_size=0)
+
+    def test_window_sizes_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            RollingWindow(0, 3)
+        with self.assertRaises(ValueError):
+            TeamStatsAggregator(windows=(0, 5))
+        window = RollingWindow(2, 1)
+        for value in (1, 2, 3):
+            window.push((value,))
+        self.assertEqual((len(window), window.sums), (2, [5]))
+
+
+class PlayerCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return {"calls": self.calls}
+
+    def test_results_are_cached_until_player_data_changes(self):
+        params = {"view": "parse", "text": "LeBron James: 25.7 PPG"}
+        self.assertEqual(get_or_compute(PLAYERS_NAMESPACE, params, self.compute), {"calls": 1})
+        self.assertEqual(get_or_compute(PLAYERS_NAMESPACE, params, self.compute), {"calls": 1})
+        player_data_changed.send(sender=None)
+        self.assertEqual(get_or_compute(PLAYERS_NAMESPACE, params, self.compute), {"calls": 2})
+
+    def test_command_invalidates(self):
+        params = {"view": "compare", "p1": "A", "p2": "B"}
+        get_or_compute(PLAYERS_NAMESPACE, params, self.compute)
+        call_command("invalidate_player_cache", stdout=open(os.devnull, "w"))
+        self.assertEqual(get_or_compute(PLAYERS_NAMESPACE, params, self.compute), {"calls": 2})
+
+    def test_conditional_get_changes_etag_after_invalidation(self):
+        response = self.client.get("/parse-player/", {"text": "LeBron James: 25.7 PPG, 7.8 RPG, 10.2 APG"})
+        etag = response["ETag"]
+        response = self.client.get("/parse-player/", {"text": "LeBron James: 25.7 PPG, 7.8 RPG, 10.2 APG"},
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        player_data_changed.send(sender=None)
+        response = self.client.get("/parse-player/", {"text": "LeBron James: 25.7 PPG, 7.8 RPG, 10.2 APG"},
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class TodoBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("coach")
+        self.client.force_login(self.user)
+        self.todo = Todo.objects.create(user=self.user, title="Free throws", date="2026-03-02")
+
+    def batch(self, *operations):
+        return self.client.post("/todo/batch/", json.dumps({"operations": list(operations)}),
+                                content_type="application/json")
+
+    def test_applies_operations(self):
+        response = self.batch(
+            {"op": "create", "title": "Layups", "date": "2026-03-03"},
+            {"op": "complete", "id": self.todo.id},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.todo.refresh_from_db()
+        self.assertTrue(self.todo.completed)
+        self.assertTrue(Todo.objects.filter(user=self.user, title="Layups").exists())
+
+    def test_bad_ids_are_rejected(self):
+        for bad_id in (True, False, "1", 1.0, None, 0, -3, 2 ** 63):
+            with self.subTest(id=bad_id):
+                response = self.batch({"op": "delete", "id": bad_id})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["operation"], 0)
+        self.assertTrue(Todo.objects.filter(id=self.todo.id).exists())
+
+    def test_completed_must_be_a_boolean(self):
+        for value in ("false", 0, None):
+            with self.subTest(completed=value):
+                response = self.batch({"op": "complete", "id": self.todo.id, "completed": value})
+                self.assertEqual(response.status_code, 400)
+        self.todo.refresh_from_db()
+        self.assertFalse(self.todo.completed)
+
+    def test_other_users_todos_are_not_found_and_roll_back(self):
+        other = Todo.objects.create(user=User.objects.create_user("rival"), title="x", date="2026-03-02")
+        response = self.batch(
+            {"op": "update", "id": self.todo.id, "title": "Changed"},
+            {"op": "delete", "id": other.id},
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["operation"], 1)
+        self.todo.refresh_from_db()
+        self.assertEqual(self.todo.title, "Free throws")
+
+    def test_update_without_fields_is_rejected(self):
+        response = self.batch({"op": "update", "id": self.todo.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["operation"], 0)
+
+    def test_body_must_be_an_object_with_operations(self):
+        for body in ("[]", "[1]", "1", '"x"', "null", '{"operations": {}}'):
+            with self.subTest(body=body):
+                response = self.client.post("/todo/batch/", body, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["error"], "operations must be a non-empty list")
+        response = self.client.post("/todo/batch/", "{", content_type="application/json")
+        self.assertEqual(response.json()["error"], "Invalid JSON")
+
+    def test_operation_limit(self):
+        from .views import TODO_BATCH_MAX_OPERATIONS
+
+        response = self.batch(*[{"op": "delete", "id": self.todo.id}] * (TODO_BATCH_MAX_OPERATIONS + 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.batch().status_code, 400)
+
+
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+@override_settings(AUTH_THROTTLE_LOGIN_IP=(5, 300), AUTH_THROTTLE_LOGIN_USER=(3, 900),
+                   AUTH_THROTTLE_REGISTER_IP=(2, 3600), AUTH_TRUSTED_PROXIES=0,
+                   PASSWORD_HASHERS=FAST_HASHERS)
+class AuthThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user("coach", password="right-password")
+
+    def login(self, username, password, ip="10.0.0.1"):
+        return self.client.post("/login/", {"username": username, "password": password}, REMOTE_ADDR=ip)
+
+    def test_username_is_locked_after_failed_logins(self):
+        for n in range(3):
+            self.assertEqual(self.login("coach", "wrong", ip=f"10.0.0.{n}").status_code, 200)
+        # Locked for every address, even with the right password
+        response = self.login(" Coach ", "right-password", ip="10.9.9.9")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertNotIn("_auth_user_id", self.client.session)
+
+    def test_ip_is_locked_across_usernames(self):
+        for n in range(5):
+            self.login(f"nobody{n}", "wrong")
+        self.assertEqual(self.login("coach", "right-password").status_code, 429)
+        self.assertEqual(self.login("coach", "right-password", ip="10.0.0.2").status_code, 302)
+
+    def test_successful_login_resets_the_username_count(self):
+        self.login("coach", "wrong")
+        self.login("coach", "wrong")
+        self.assertEqual(self.login("coach", "right-password").status_code, 302)
+        self.client.logout()
+        self.login("coach", "wrong")
+        self.login("coach", "wrong")
+        self.assertEqual(self.login("coach", "right-password").status_code, 302)
+
+    def test_registration_is_limited_per_ip(self):
+        def register(n):
+            return self.client.post("/register/", {
+                "username": f"player{n}", "email": f"p{n}@example.com",
+                "password1": "secret-1", "password2": "secret-1",
+            }, REMOTE_ADDR="10.0.0.7")
+
+        self.assertEqual(register(1).status_code, 302)
+        self.client.logout()
+        self.assertEqual(register(2).status_code, 302)
+        self.client.logout()
+        self.assertEqual(register(3).status_code, 429)
+        self.assertFalse(User.objects.filter(username="player3").exists())
+
+    def test_duplicate_email_is_rejected_case_insensitively(self):
+        User.objects.create_user("first", email="Coach@Example.com")
+        response = self.client.post("/register/", {
+            "username": "second", "email": "coach@example.com",
+            "password1": "secret-1", "password2": "secret-1",
+        })
+        self.assertContains(response, "Email already exists")
+        self.assertFalse(User.objects.filter(username="second").exists())
+
+
+@override_settings(AUTH_THROTTLE_LOGIN_IP=(4, 100))
+class SlidingWindowThrottleTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.throttle = SlidingWindowThrottle("test", "AUTH_THROTTLE_LOGIN_IP")
+
+    def test_limit_and_decay(self):
+        for _ in range(4):
+            self.assertEqual(self.throttle.check("a", now=1000), 0)
+            self.throttle.hit("a", now=1000)
+        self.assertGreater(self.throttle.check("a", now=1050), 0)
+        self.assertEqual(self.throttle.check("b", now=1050), 0)
+        # Half of the previous window still counts: 4 * 0.5 < 4
+        self.assertEqual(self.throttle.check("a", now=1150), 0)
+        self.assertEqual(self.throttle.check("a", now=1300), 0)
+
+    def test_retry_after_is_when_the_count_drops(self):
+        for _ in range(4):
+            self.throttle.hit("a", now=1010)
+        wait = self.throttle.check("a", now=1100)
+        self.assertGreater(wait, 0)
+        self.assertGreater(self.throttle.check("a", now=1100 + wait - 1), 0)
+        self.assertEqual(self.throttle.check("a", now=1100 + wait), 0)
+
+    def test_reset_and_disabled(self):
+        for _ in range(4):
+            self.throttle.hit("a", now=1000)
+        self.throttle.reset("a", now=1000)
+        self.assertEqual(self.throttle.check("a", now=1000), 0)
+        with override_settings(AUTH_THROTTLE_LOGIN_IP=(0, 100)):
+            for _ in range(10):
+                self.throttle.hit("b", now=1000)
+            self.assertEqual(self.throttle.check("b", now=1000), 0)
+
+    def test_client_ip_trusts_only_configured_proxies(self):
+        request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="6.6.6.6, 1.2.3.4")
+        with override_settings(AUTH_TRUSTED_PROXIES=0):
+            self.assertEqual(client_ip(request), "10.0.0.1")
+        with override_settings(AUTH_TRUSTED_PROXIES=1):
+            self.assertEqual(client_ip(request), "1.2.3.4")
+        with override_settings(AUTH_TRUSTED_PROXIES=3):
+            self.assertEqual(client_ip(request), "10.0.0.1")
+
+
+@override_settings(CHAT_DATABASES=["chat_0", "chat_1", "chat_2", "chat_3"])
+class ChatDatabaseRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ChatDatabaseRouter()
+
+    def test_users_are_spread_by_id(self):
+        self.assertEqual([chat_db_for_user(n) for n in range(1, 6)],
+                         ["chat_1", "chat_2", "chat_3", "chat_0", "chat_1"])
+        self.assertEqual(chat_db_for_user(None), "chat_0")
+
+    def test_chat_rows_follow_their_user(self):
+        message = ChatMessage(user_id=6, role="user", content="q")
+        for route in (self.router.db_for_read, self.router.db_for_write):
+            self.assertEqual(route(ChatMessage, instance=message), "chat_2")
+            # Related managers pass the user
+            self.assertEqual(route(ChatMessage, instance=User(pk=7)), "chat_3")
+            # No hint: the first chat database
+            self.assertEqual(route(ChatMessage), "chat_0")
+
+    def test_other_models_stay_on_default(self):
+        message = ChatMessage(user_id=6, role="user", content="q")
+        self.assertIsNone(self.router.db_for_read(Todo))
+        self.assertIsNone(self.router.db_for_write(User, instance=User(pk=6)))
+        # message.user is looked up next to auth_user, not on the chat shard
+        self.assertEqual(self.router.db_for_read(User, instance=message), "default")
+
+    def test_for_user_picks_the_users_database(self):
+        self.assertEqual(ChatMessage.objects.for_user(5).db, "chat_1")
+        self.assertEqual(ChatMessage.objects.for_user(User(pk=8)).db, "chat_0")
+
+    def test_migrations_only_create_chat_tables_on_chat_databases(self):
+        self.assertTrue(self.router.allow_migrate("chat_1", "core", model_name="chatmessage"))
+        self.assertTrue(self.router.allow_migrate("chat_1", "core", model_name="chatturncounter"))
+        self.assertFalse(self.router.allow_migrate("chat_1", "core", model_name="todo"))
+        self.assertFalse(self.router.allow_migrate("chat_1", "auth", model_name="user"))
+        self.assertFalse(self.router.allow_migrate("default", "core", model_name="chatmessage"))
+        self.assertIsNone(self.router.allow_migrate("default", "core", model_name="todo"))
+
+    def test_relations_to_chat_rows_are_allowed(self):
+        self.assertTrue(self.router.allow_relation(ChatMessage(user_id=1), User(pk=1)))
+        self.assertIsNone(self.router.allow_relation(Todo(), User(pk=1)))
+
+    @override_settings(CHAT_DATABASES=[])
+    def test_unsharded_leaves_routing_to_django(self):
+        self.assertIsNone(self.router.db_for_write(ChatMessage, instance=ChatMessage(user_id=3)))
+        self.assertIsNone(self.router.allow_migrate("default", "core", model_name="chatmessage"))
+        self.assertEqual(chat_db_for_user(3), "default")
+
+
+class ChatRollupTests(TestCase):
+    SETTLE = 60
+
+    def setUp(self):
+        self.now = timezone.now().replace(minute=30, second=0, microsecond=0)
+        self.alice = User.objects.create_user("alice")
+        self.bob = User.objects.create_user("bob")
+
+    def add(self, user, minutes_ago, reply="answer"):
+        created = self.now - datetime.timedelta(minutes=minutes_ago)
+        ChatMessage.objects.bulk_create([
+            ChatMessage(user=user, role="user", content="q", raw_content="q", created_at=created),
+            ChatMessage(user=user, role="assistant", content=reply, raw_content=reply, created_at=created),
+        ])
+
+    def fold(self, now=None, **kwargs):
+        return update_chat_rollups(now=now or self.now, settle_seconds=self.SETTLE, **kwargs)
+
+    def snapshot(self):
+        return (
+            list(ChatHourlyStats.objects.order_by("hour").values_list(
+                "hour", "messages", "questions", "replies", "reply_chars", "active_users")),
+            list(ChatDailyStats.objects.order_by("day").values_list(
+                "day", "messages", "questions", "replies", "reply_chars", "active_users")),
+            list(ChatUserDailyStats.objects.order_by("user_id", "day").values_list(
+                "user_id", "day", "messages", "questions")),
+        )
+
+    def test_messages_inside_the_settle_time_wait_for_the_next_run(self):
+        self.add(self.alice, 20)
+        self.add(self.bob, 0)  # newer than SETTLE seconds
+        self.assertEqual(self.fold()["processed"], 2)
+        self.assertEqual(ChatDailyStats.objects.get().messages, 2)
+
+        later = self.now + datetime.timedelta(seconds=self.SETTLE + 1)
+        self.assertEqual(self.fold(now=later)["processed"], 2)
+        daily = ChatDailyStats.objects.get()
+        self.assertEqual((daily.messages, daily.questions, daily.active_users), (4, 2, 2))
+
+    def test_folding_again_changes_nothing(self):
+        self.add(self.alice, 25)
+        self.add(self.alice, 20, reply="a longer answer")
+        self.add(self.bob, 15)
+        self.assertTrue(self.fold()["caught_up"])
+        before = self.snapshot()
+        for _ in range(2):
+            self.assertEqual(self.fold()["processed"], 0)
+        self.assertEqual(self.snapshot(), before)
+        hour = ChatHourlyStats.objects.get()
+        self.assertEqual((hour.messages, hour.active_users, hour.reply_chars), (6, 2, 6 + 15 + 6))
+
+    def test_small_batches_match_one_pass(self):
+        for minutes in (50, 40, 30, 20, 10):
+            self.add(self.alice if minutes % 20 else self.bob, minutes)
+        self.fold()
+        one_pass = self.snapshot()
+        for model in (ChatHourlyStats, ChatDailyStats, ChatUserDailyStats):
+            model.objects.all().delete()
+        ChatRollupState.objects.all().delete()
+
+        result = self.fold(batch_size=3, max_rows=4)
+        self.assertEqual((result["processed"], result["caught_up"]), (4, False))
+        while not self.fold(batch_size=3)["caught_up"]:
+            pass
+        self.assertEqual(self.snapshot(), one_pass)
+
+    def test_stats_read_the_rollups(self):
+        self.add(self.alice, 20)
+        self.add(self.alice, 10)
+        self.add(self.bob, 5)
+        self.fold()
+        stats = chat_stats(days=1, today=timezone.localdate(self.now))
+        self.assertEqual(stats["totals"], {"messages": 6, "questions": 3, "replies": 3})
+        self.assertEqual([u["username"] for u in stats["top_users"]], ["alice", "bob"])
+        self.assertEqual(stats["last_message_id"], ChatMessage.objects.order_by("-id").first().id)
+
+
+class FAQTests(TestCase):
+    QUESTION = "How do I improve my free throws?"
+
+    def setUp(self):
+        answer, answer_html = prepare_reply("**Bend your knees** and follow through.")
+        self.entry = FAQEntry.objects.create(
+            question=self.QUESTION, normalized_question=normalize_question(self.QUESTION),
+            answer=answer, answer_html=answer_html,
+        )
+
+    def test_normalization(self):
+        self.assertEqual(normalize_question("  How do I improve my FREE-THROWS ?? "),
+                         "how do i improve my free throws")
+        self.assertEqual(normalize_question("Ｗhat is a 3‑second violation?"), "what is a 3 second violation")
+        self.assertEqual(normalize_question("?!"), "")
+
+    def test_lookup_ignores_case_punctuation_and_spacing(self):
+        for question in ("how do i improve my free throws", "HOW DO I IMPROVE MY FREE THROWS ??",
+                         "How  do I improve my free-throws!"):
+            with self.subTest(question=question):
+                self.assertEqual(find_faq_answer(question).id, self.entry.id)
+        self.assertIsNone(find_faq_answer("How do I improve my jump shot?"))
+        self.assertIsNone(find_faq_answer("???"))
+        self.assertIsNone(find_faq_answer("x" * 400))
+
+    @override_settings(CHAT_FAQ=False)
+    def test_disabled(self):
+        self.assertIsNone(find_faq_answer(self.QUESTION))
+
+    def test_chat_turn_is_answered_without_the_model(self):
+        user = User.objects.create_user("coach")
+        self.client.force_login(user)
+        with mock.patch.object(llm, "get_client", side_effect=AssertionError("model called")):
+            response = self.client.post("/chat/", json.dumps({"message": "how do I improve my FREE THROWS"}),
+                                        content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["context_info"]["route"], "faq")
+        self.assertIn("<strong", data["html"])
+        # Both sides of the turn are stored, in order
+        stored = list(ChatMessage.objects.for_user(user).order_by("seq").values_list("role", "raw_content"))
+        self.assertEqual(stored, [("user", "how do I improve my FREE THROWS"),
+                                  ("assistant", "**Bend your knees** and follow through.")])
+        self.assertTrue(all(m["id"] for m in data["messages"]))
+
+
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        middleware._user_cache.clear()
+        self.user = User.objects.create_user("coach", password="old-password")
+        self.client.force_login(self.user)
+
+    def user_queries(self, path="/todo/"):
+        """Response and the number of auth_user queries it ran."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        return response, sum('"auth_user"' in query["sql"] for query in queries)
+
+    def test_cached_user_needs_no_auth_user_query(self):
+        response, first = self.user_queries()
+        self.assertEqual((response.status_code, first), (200, 1))
+        response, second = self.user_queries()
+        self.assertEqual((response.status_code, second), (200, 0))
+        self.assertEqual(response.context["user"].pk, self.user.pk)
+
+    def test_password_change_evicts_and_ends_other_sessions(self):
+        self.user_queries()
+        self.user.set_password("new-password")
+        self.user.save()
+        self.assertNotIn(self.user.pk, middleware._user_cache)
+        # The session still carries the old password's hash
+        response, _ = self.user_queries()
+        self.assertEqual(response.status_code, 302)
+
+    def test_logout_evicts(self):
+        self.user_queries()
+        self.assertIn(self.user.pk, middleware._user_cache)
+        self.client.get("/logout/")
+        self.assertNotIn(self.user.pk, middleware._user_cache)
+        response, _ = self.user_queries()
+        self.assertEqual(response.status_code, 302)
+
+    def test_session_hash_mismatch_is_not_served_from_the_cache(self):
+        self.user_queries()
+        session = self.client.session
+        session[HASH_SESSION_KEY] = "0" * 64
+        session.save()
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(queries, 1)
+
+    @override_settings(AUTH_USER_CACHE_TTL=0)
+    def test_zero_ttl_disables_the_cache(self):
+        self.user_queries()
+        _, queries = self.user_queries()
+        self.assertEqual(queries, 1)
+
+    def test_requests_get_their_own_copy(self):
+        self.user_queries()
+        response, _ = self.user_queries()
+        response.context["user"].first_name = "changed"
+        self.assertEqual(middleware._user_cache[self.user.pk][1].first_name, "")
+
+
+task_calls = []
+task_started = threading.Event()
+task_release = threading.Event()
+
+
+@tasks.task
+def collect_task(value):
+    task_calls.append(value)
+
+
+@tasks.task
+def blocking_task(value):
+    task_started.set()
+    task_release.wait(5)
+    task_calls.append(value)
+
+
+class TaskRunnerTests(TestCase):
+    def setUp(self):
+        task_calls.clear()
+        task_started.clear()
+        task_release.clear()
+        self.addCleanup(task_release.set)
+
+    def busy_runner(self, queue_size):
+        """Runner whose only worker is stuck in blocking_task."""
+        runner = tasks.TaskRunner(workers=1, queue_size=queue_size)
+        runner.submit(blocking_task, "first")
+        self.assertTrue(task_started.wait(5))
+        return runner
+
+    def test_submit_runs_the_task_on_a_worker(self):
+        runner = tasks.TaskRunner(workers=1, queue_size=5)
+        runner.submit(collect_task, 1)
+        runner.submit(collect_task, 2)
+        runner.shutdown(timeout=5)
+        self.assertEqual(task_calls, [1, 2])
+        stats = runner.get_stats()
+        self.assertEqual((stats["submitted"], stats["completed"], stats["persisted"]), (2, 2, 0))
+        self.assertFalse(QueuedTask.objects.exists())
+
+    def test_full_queue_persists_instead_of_dropping(self):
+        runner = self.busy_runner(queue_size=1)
+        runner.submit(collect_task, "queued")
+        runner.submit(collect_task, "overflow")
+        queued = QueuedTask.objects.get()
+        self.assertEqual((queued.name, queued.args), (collect_task.task_name, ["overflow"]))
+        self.assertEqual(runner.get_stats()["persisted"], 1)
+
+        task_release.set()
+        runner.shutdown(timeout=5)
+        self.assertEqual(task_calls, ["first", "queued"])
+        self.assertEqual(tasks.run_persisted_tasks(), (1, 0))
+        self.assertEqual(task_calls, ["first", "queued", "overflow"])
+        self.assertFalse(QueuedTask.objects.exists())
+
+    def test_shutdown_persists_work_still_queued(self):
+        runner = self.busy_runner(queue_size=5)
+        runner.submit(collect_task, "a")
+        runner.submit(collect_task, "b")
+        runner.shutdown(timeout=0.2)
+        self.assertEqual(list(QueuedTask.objects.values_list("args", flat=True)), [["a"], ["b"]])
+
+        # Nothing is accepted on the queue after shutdown
+        runner.submit(collect_task, "late")
+        self.assertEqual(QueuedTask.objects.count(), 3)
+        self.assertEqual(tasks.run_persisted_tasks(), (3, 0))
+        self.assertEqual(task_calls, ["a", "b", "late"])
+
+    def test_failed_persisted_task_is_retried_later(self):
+        QueuedTask.objects.create(name="core.tests.missing", args=[], kwargs={})
+        self.assertEqual(tasks.run_persisted_tasks(), (0, 1))
+        queued = QueuedTask.objects.get()
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn("Unknown task", queued.last_error)
+
+    def test_record_chat_usage_stores_a_row(self):
+        user = User.objects.create_user("coach")
+        called_at = timezone.now() - datetime.timedelta(minutes=5)
+        runner = tasks.TaskRunner(workers=0, queue_size=1)
+        runner.submit(tasks.record_chat_usage, user.id, "gpt-4o-mini", 120, 40, 812.6,
+                      route="simple", created_at=called_at.isoformat())
+        usage = ChatUsage.objects.get()
+        self.assertEqual(
+            (usage.user, usage.route, usage.model, usage.prompt_tokens, usage.completion_tokens, usage.latency_ms),
+            (user, "simple", "gpt-4o-mini", 120, 40, 813),
+        )
+        self.assertEqual(usage.created_at, called_at)
+
+
+def fake_completion(model, messages, timeout, **options):
+    """Stand-in for the model: answers by echoing the last message."""
+    question = messages[-1]["content"]
+    return mock.Mock(
+        choices=[mock.Mock(message=mock.Mock(content=f"answer to {question}"))],
+        usage=mock.Mock(prompt_tokens=10, completion_tokens=5),
+    )
+
+
+class KeyedLockTests(SimpleTestCase):
+    def test_other_keys_are_not_blocked(self):
+        locks = KeyedLock()
+        held, release = threading.Event(), threading.Event()
+
+        def hold_first():
+            with locks.hold(1):
+                held.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold_first)
+        thread.start()
+        self.addCleanup(release.set)
+        self.assertTrue(held.wait(5))
+
+        with locks.hold(2, timeout=0.05):
+            self.assertEqual(len(locks), 2)
+        with self.assertRaises(TimeoutError):
+            with locks.hold(1, timeout=0.05):
+                pass
+
+        release.set()
+        thread.join(5)
+        # Idle keys are discarded once nobody holds or waits for them
+        self.assertEqual(len(locks), 0)
+
+
+class ChatTurnOrderingTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("coach")
+        self.other = User.objects.create_user("rival")
+        self.release = threading.Event()
+        self.started = threading.Event()
+        for patcher in (mock.patch.object(llm, "get_client"), mock.patch.object(tasks.runner, "workers", 0)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        llm.get_client.return_value.chat.completions.create.side_effect = self.completion
+        self.addCleanup(self.release.set)
+        for user in (self.user, self.other):
+            self.addCleanup(views.chat_managers.pop, user.id)
+
+    def completion(self, **kwargs):
+        if kwargs["messages"][-1]["content"] == "slow":
+            self.started.set()
+            self.release.wait(5)
+        return fake_completion(**kwargs)
+
+    def post_in_thread(self, user, message):
+        client = Client()
+        client.force_login(user)
+        responses = []
+
+        def post():
+            try:
+                responses.append(client.post("/chat/", json.dumps({"message": message}),
+                                             content_type="application/json"))
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=post)
+        thread.start()
+        return thread, responses
+
+    def stored(self, user):
+        return list(ChatMessage.objects.for_user(user).order_by("seq").values_list("seq", "raw_content"))
+
+    def test_same_user_turns_get_disjoint_increasing_seq_ranges(self):
+        def reserve():
+            try:
+                with views.chat_locks.hold(self.user.id):
+                    starts.append(reserve_turn_seq(self.user.id, 2))
+            finally:
+                connections.close_all()
+
+        starts = []
+        threads = [threading.Thread(target=reserve) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(starts, [1, 3, 5, 7, 9])
+
+    def test_second_turn_waits_for_the_first(self):
+        first, first_responses = self.post_in_thread(self.user, "slow")
+        self.assertTrue(self.started.wait(5))
+        second, second_responses = self.post_in_thread(self.user, "fast")
+        second.join(0.3)
+        self.assertTrue(second.is_alive())
+
+        self.release.set()
+        first.join(5)
+        second.join(5)
+        self.assertEqual([r.status_code for r in first_responses + second_responses], [200, 200])
+        self.assertEqual(self.stored(self.user), [
+            (1, "slow"), (2, "answer to slow"), (3, "fast"), (4, "answer to fast"),
+        ])
+
+    def test_other_users_are_not_blocked(self):
+        slow, _ = self.post_in_thread(self.user, "slow")
+        self.assertTrue(self.started.wait(5))
+        self.client.force_login(self.other)
+        response = self.client.post("/chat/", json.dumps({"message": "fast"}), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(slow.is_alive())
+        self.assertEqual(self.stored(self.other), [(1, "fast"), (2, "answer to fast")])
+
+        self.release.set()
+        slow.join(5)
+        self.assertEqual(self.stored(self.user), [(1, "slow"), (2, "answer to slow")])
+
+
+class ContextRegistryTests(TestCase):
+    def setUp(self):
+        self.registry = ContextRegistry(max_bytes=10 ** 9)
+        for patcher in (mock.patch.object(views, "chat_managers", self.registry),
+                        mock.patch.object(llm, "get_client"), mock.patch.object(tasks.runner, "workers", 0)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.create = llm.get_client.return_value.chat.completions.create
+        self.create.side_effect = fake_completion
+
+    def chat(self, user, message):
+        self.client.force_login(user)
+        response = self.client.post("/chat/", json.dumps({"message": message}), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_least_recently_used_is_evicted_first(self):
+        registry = ContextRegistry(max_bytes=250)
+        for user_id in (1, 2, 3):
+            registry[user_id] = mock.Mock(memory_bytes=100)
+        # 3 pushed the total over the cap; touching 2 leaves 3 as the oldest other entry
+        self.assertEqual(list(registry._managers), [2, 3])
+        registry[2]
+        registry[4] = mock.Mock(memory_bytes=100)
+        self.assertEqual(list(registry._managers), [2, 4])
+        self.assertEqual(registry.get_stats(), {"users": 2, "bytes": 200, "max_bytes": 250, "evictions": 2})
+
+    def test_served_user_is_kept_even_alone_over_the_cap(self):
+        registry = ContextRegistry(max_bytes=50)
+        registry[1] = mock.Mock(memory_bytes=100)
+        self.assertIn(1, registry)
+        registry[2] = mock.Mock(memory_bytes=100)
+        self.assertEqual(list(registry._managers), [2])
+
+    def test_evicted_context_is_rebuilt_from_stored_history(self):
+        coach, rival = User.objects.create_user("coach"), User.objects.create_user("rival")
+        self.chat(coach, "first question")
+        # Room for one user's context only
+        self.registry.max_bytes = self.registry.total_bytes + 100
+        self.chat(rival, "rival question")
+        self.assertNotIn(coach.id, self.registry)
+        self.assertEqual(self.registry.evictions, 1)
+
+        self.chat(coach, "second question")
+        sent = [(m["role"], m["content"]) for m in self.create.call_args.kwargs["messages"][1:]]
+        self.assertEqual(sent, [
+            ("user", "first question"), ("assistant", "answer to first question"), ("user", "second question"),
+        ])
+        self.assertNotIn(rival.id, self.registry)
+
+
+class ChatSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("coach")
+        self.other = User.objects.create_user("rival")
+        self.message = ChatMessage.objects.create(
+            user=self.user, role="user", content="x", raw_content="How do I shoot better free throws?"
+        )
+        ChatMessage.objects.create(user=self.user, role="assistant", content="x", raw_content="Work on your dribbling.")
+        ChatMessage.objects.create(user=self.other, role="user", content="x", raw_content="My free throws are bad")
+
+    def ids(self, query, user=None):
+        return [hit["id"] for hit in search_chat_messages(user or self.user, query)["results"]]
+
+    def test_uses_the_fts_index(self):
+        self.assertTrue(fts_available(connection))
+        hits = search_chat_messages(self.user, "free THROW")["results"]
+        self.assertEqual([hit["id"] for hit in hits], [self.message.id])
+        self.assertIn("<mark>free</mark>", hits[0]["snippet"])
+
+    def test_new_edited_and_deleted_messages(self):
+        self.assertEqual(self.ids("layup"), [])
+        created = ChatMessage.objects.create(user=self.user, role="user", content="x", raw_content="Teach me a layup")
+        self.assertEqual(self.ids("layup"), [created.id])
+
+        self.message.raw_content = "How do I defend a pick and roll?"
+        self.message.save()
+        self.assertEqual(self.ids("free throws"), [])
+        self.assertEqual(self.ids("pick roll"), [self.message.id])
+
+        created.delete()
+        self.assertEqual(self.ids("layup"), [])
+
+    def test_syntax_in_the_query_never_raises(self):
+        for query in ('"free', 'free" OR "', "free AND NOT throws", "throws NEAR(free", "user_key:u1",
+                      "raw_content: free*", "-(", "'; DROP TABLE core_chatmessage; --", "ﬁnal 3‑point"):
+            with self.subTest(query=query):
+                self.assertIsInstance(search_chat_messages(self.user, query)["results"], list)
+        # Quotes and operators are plain text: OR is a word to match, not a union
+        self.assertEqual(self.ids('"free" OR "dribbling"'), [])
+        self.assertEqual(self.ids('"free*" (throws)'), [self.message.id])
+
+    def test_users_only_see_their_own_messages(self):
+        self.assertEqual(len(self.ids("free throws", self.other)), 1)
+        self.assertNotIn(self.message.id, self.ids("free throws", self.other))
+        self.assertEqual(self.ids("dribbling", self.other), [])
+
+        self.client.force_login(self.other)
+        found = self.client.get("/chat/search/", {"q": "how free throws"}).json()
+        self.assertEqual(found["results"], [])
+
+    def test_fallback_matches_the_same_rows(self):
+        with mock.patch("core.search.fts_available", return_value=False):
+            self.assertEqual(self.ids("free throws"), [self.message.id])
+            self.assertEqual(self.ids("dribbling", self.other), [])
+
+
+class RetrievalContextTests(SimpleTestCase):
+    TURNS = [
+        ("How should I fix my free throw routine?", "Same number of dribbles, bend your knees, follow through."),
+        ("Any tips for guarding a taller center?", "Front him and deny the entry pass."),
+        ("What should I eat before a game?", "Carbohydrates three hours before tip-off."),
+        ("How long should I rest between sessions?", "At least one full day after hard practice."),
+        ("Which shoes are good for outdoor courts?", "A durable rubber outsole matters most."),
+    ]
+    QUESTION = "Remind me of that free throw routine"
+
+    def manager(self, **options):
+        manager = RetrievalContextManager(**{"max_messages": 4, "recent_messages": 2, "top_k": 2, **options})
+        for question, answer in self.TURNS:
+            manager.add_message("user", question)
+            manager.add_message("assistant", answer)
+        manager.add_message("user", self.QUESTION)
+        return manager
+
+    def contents(self, messages):
+        return [m["content"] for m in messages]
+
+    def test_relevant_old_turn_beats_recent_unrelated_ones(self):
+        context = self.contents(self.manager().get_context_for_api())
+        # The free throw turn has left the recency window but is retrieved;
+        # the answer that would open the window without its question is dropped
+        self.assertEqual(context, [*self.TURNS[0], self.QUESTION])
+
+    def test_token_budget_is_respected(self):
+        manager = self.manager()
+        full = manager.get_context_for_api()
+        budget = sum(m.tokens for m in full) - 1
+        manager.max_tokens = budget
+        context = manager.get_context_for_api()
+        self.assertLessEqual(sum(m.tokens for m in context), budget)
+        # The current question always has priority over retrieved turns
+        self.assertEqual(self.contents(context), [self.QUESTION])
+
+    def test_recent_message_count_is_respected(self):
+        manager = self.manager(recent_messages=3, top_k=0)
+        self.assertEqual(self.contents(manager.get_context_for_api()), [*self.TURNS[-1], self.QUESTION])
+
+    def test_only_max_indexed_turns_are_searchable(self):
+        manager = self.manager(max_indexed_turns=3)
+        # The current question holds one of the three slots until it is answered
+        self.assertEqual((len(manager.turns), len(manager.index)), (3, 2))
+        self.assertEqual(self.contents(manager.get_context_for_api()), [self.QUESTION])
+
+    def test_index_add_replace_and_remove(self):
+        index = BM25Index()
+        index.add(1, "free throw routine")
+        index.add(2, "defense against a center")
+        index.add(3, "free throw percentage and free throw routine")
+        self.assertEqual([doc for doc, _ in index.search("free throw", top_k=5)], [3, 1])
+        self.assertEqual(index.search("free throw", exclude=[3])[0][0], 1)
+        index.add(3, "zone defense")
+        self.assertEqual([doc for doc, _ in index.search("free throw")], [1])
+        index.remove(1)
+        self.assertEqual(index.search("free throw"), [])
+        self.assertEqual((len(index), index.term_entries), (2, 5))
+
+
+class BulkDataParserTests(TestCase):
+    LINES = [
+        "LeBron James: 25.7 PPG, 7.8 RPG, 10.2 APG",
+        "",
+        "Golden State Warriors 110 - 98 Boston Celtics",
+        "Nikola Jokic: great passer",
+        "Lakers beat Celtics",
+        "Luka Doncic: .5 PPG: 3 APG",
+    ]
+
+    def records(self, body):
+        lines = b"".join(body).decode().splitlines()
+        return [json.loads(line) for line in lines]
+
+    def test_each_line_gets_a_record_or_an_error(self):
+        parser = BulkDataParser()
+        records = list(parser.parse_lines(line.encode() for line in self.LINES))
+        self.assertEqual([(r["line"], r["ok"], r["type"]) for r in records], [
+            (1, True, "player"), (3, True, "score"), (4, False, "player"), (5, False, "score"), (6, False, "player"),
+        ])
+        self.assertEqual(records[0]["data"], {"name": "LeBron James", "ppg": 25.7, "rpg": 7.8, "apg": 10.2})
+        self.assertEqual(records[1]["data"]["winner"], "Golden State Warriors")
+        self.assertEqual(records[2]["raw"], "Nikola Jokic: great passer")
+        self.assertEqual(parser.get_summary(), {"lines": 5, "parsed": 2, "errors": 3})
+
+    def test_jsonl_output_ends_with_the_summary(self):
+        chunks = list(BulkDataParser(kind="score").to_jsonl(self.LINES, batch_size=2))
+        self.assertTrue(all(chunk.endswith("\n") for chunk in chunks))
+        records = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual(len(records), 6)
+        self.assertEqual(records[-1], {"summary": {"lines": 5, "parsed": 1, "errors": 4}})
+
+    def test_long_lines_are_rejected_without_parsing(self):
+        parser = BulkDataParser(max_line_length=50)
+        line = "A" * 40 + " 1 - 2 " + "B" * 40
+        with mock.patch.object(BulkDataParser, "parse_score_line") as parse:
+            (record,) = parser.parse_lines([line])
+        parse.assert_not_called()
+        self.assertFalse(record["ok"])
+        self.assertIn("50", record["error"])
+        # Error records echo at most 200 characters of the line
+        record = next(BulkDataParser().parse_lines(["x" * 5000]))
+        self.assertEqual(len(record["raw"]), 200)
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            BulkDataParser(kind="box_score")
+
+    def test_view_streams_body_and_uploaded_file(self):
+        self.client.force_login(User.objects.create_user("coach"))
+        body = "\n".join(self.LINES).encode()
+
+        response = self.client.post("/bulk-parse/?kind=auto", body, content_type="text/plain")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        records = self.records(response.streaming_content)
+        self.assertEqual(records[-1]["summary"], {"lines": 5, "parsed": 2, "errors": 3})
+
+        upload = SimpleUploadedFile("stats.txt", body)
+        response = self.client.post("/bulk-parse/", {"file": upload})
+        self.assertEqual(self.records(response.streaming_content), records)
+
+        self.assertEqual(self.client.post("/bulk-parse/?kind=box_score", body, content_type="text/plain")
+                         .status_code, 400)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("coach")
+        other = User.objects.create_user("rival")
+        self.messages = [
+            ChatMessage.objects.create(user=self.user, role=role, content=f"<p>{text}</p>", raw_content=text)
+            for role, text in [("user", "Zone or man-to-man?"), ("assistant", 'Man-to-man, "mostly",\nwith help')]
+        ]
+        self.todo = Todo.objects.create(user=self.user, title="Shoot 100 free throws", date=datetime.date(2026, 3, 1))
+        ChatMessage.objects.create(user=other, role="user", content="x", raw_content="secret plan")
+        Todo.objects.create(user=other, title="secret drill", date=datetime.date(2026, 3, 1))
+
+    def expected_rows(self):
+        chat = [{"type": "chat", "id": m.id, "role": m.role, "content": m.raw_content,
+                 "created_at": m.created_at.isoformat()} for m in self.messages]
+        todo = {"type": "todo", "id": self.todo.id, "title": self.todo.title, "date": "2026-03-01",
+                "completed": False, "created_at": self.todo.created_at.isoformat()}
+        return chat + [todo]
+
+    def test_jsonl_has_only_the_users_rows(self):
+        content = "".join(export.export_stream(self.user))
+        self.assertEqual([json.loads(line) for line in content.splitlines()], self.expected_rows())
+
+    def test_csv_matches_jsonl(self):
+        content = "".join(export.export_stream(self.user, fmt="csv"))
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(list(rows[0]), export.CSV_COLUMNS)
+        expected = [{column: str(row.get(column, "")) for column in export.CSV_COLUMNS}
+                    for row in self.expected_rows()]
+        self.assertEqual(rows, expected)
+        self.assertNotIn("secret", content)
+
+    def test_kinds_filter(self):
+        content = "".join(export.export_stream(self.user, kinds=["todos"]))
+        self.assertEqual([json.loads(line)["type"] for line in content.splitlines()], ["todo"])
+        with self.assertRaises(ValueError):
+            export.export_stream(self.user, kinds=["chat", "passwords"])
+        with self.assertRaises(ValueError):
+            export.export_stream(self.user, fmt="xml")
+
+    def test_compressed_output_decompresses_to_the_same_content(self):
+        for fmt in export.EXPORT_FORMATS:
+            with self.subTest(fmt=fmt):
+                plain = "".join(export.export_stream(self.user, fmt=fmt))
+                compressed = b"".join(export.export_stream(self.user, fmt=fmt, compress=True))
+                self.assertEqual(gzip.decompress(compressed).decode(), plain)
+
+    def test_output_is_chunked(self):
+        with mock.patch.object(export, "EXPORT_BUFFER_BYTES", 10):
+            chunks = list(export.export_stream(self.user))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual("".join(chunks), "".join(export.export_stream(self.user)))
+
+    def test_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get("/export/", {"format": "csv", "gzip": "1"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="basketball-ai-coach.csv.gz"')
+        self.assertNotIn("Content-Encoding", response)
+        content = gzip.decompress(b"".join(response.streaming_content)).decode()
+        self.assertEqual(content, "".join(export.export_stream(self.user, fmt="csv")))
+        self.assertEqual(self.client.get("/export/", {"format": "xml"}).status_code, 400)
+
+
+class StaticFilesMiddlewareTests(SimpleTestCase):
+    CSS = b"body { color: #552583; }\n" * 40
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        os.makedirs(os.path.join(root.name, "css"))
+        with open(os.path.join(root.name, "css", "site.abc123.css"), "wb") as f:
+            f.write(self.CSS)
+        with gzip.open(os.path.join(root.name, "css", "site.abc123.css.gz"), "wb") as f:
+            f.write(self.CSS)
+        with open(os.path.join(root.name, "app.js"), "wb") as f:
+            f.write(b"console.log('hi');")
+
+        static_settings = override_settings(STATIC_ROOT=root.name, STATIC_URL="/static/", SERVE_STATIC=True)
+        static_settings.enable()
+        self.addCleanup(static_settings.disable)
+        storage = mock.patch.object(middleware, "staticfiles_storage",
+                                    mock.Mock(hashed_files={"css/site.css": "css/site.abc123.css"}))
+        storage.start()
+        self.addCleanup(storage.stop)
+        self.middleware = middleware.StaticFilesMiddleware(lambda request: HttpResponse("app"))
+        self.factory = RequestFactory()
+
+    def get(self, path, **headers):
+        response = self.middleware(self.factory.get(path, headers=headers))
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b"".join(response.streaming_content) if response.streaming else response.content
+
+    def test_gzip_sibling_is_sent_when_accepted(self):
+        response = self.get("/static/css/site.abc123.css", accept_encoding="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(self.body(response)), self.CSS)
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_plain_file_otherwise(self):
+        response = self.get("/static/css/site.abc123.css")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(self.body(response), self.CSS)
+
+    def test_unhashed_file_without_sibling(self):
+        response = self.get("/static/app.js", accept_encoding="gzip")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertFalse(response.has_header("Vary"))
+        self.assertEqual(response["Cache-Control"], "public, no-cache")
+        self.assertEqual(self.body(response), b"console.log('hi');")
+
+    def test_not_modified(self):
+        response = self.get("/static/app.js", if_modified_since=http_date())
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_requests_fall_through(self):
+        for path in ("/static/missing.css", "/static/../settings.py", "/static/css/", "/todo/"):
+            with self.subTest(path=path):
+                self.assertEqual(self.body(self.get(path)), b"app")
+        response = self.middleware(self.factory.post("/static/app.js"))
+        self.assertEqual(response.content, b"app")
+
+    def test_disabled(self):
+        with override_settings(SERVE_STATIC=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                middleware.StaticFilesMiddleware(lambda request: HttpResponse("app"))
+
+
+class ConditionalGZipMiddlewareTests(SimpleTestCase):
+    TEXT = "<p>pick and roll</p>" * 50
+
+    def process(self, response):
+        request = RequestFactory().get("/", headers={"accept-encoding": "gzip"})
+        return middleware.ConditionalGZipMiddleware(lambda r: response)(request)
+
+    def test_html_is_compressed(self):
+        response = self.process(HttpResponse(self.TEXT))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content).decode(), self.TEXT)
+
+    def test_binary_and_compressed_types_pass_through(self):
+        for content_type in ("application/gzip", "image/png", "application/octet-stream"):
+            with self.subTest(content_type=content_type):
+                response = self.process(HttpResponse(self.TEXT, content_type=content_type))
+                self.assertNotIn("Content-Encoding", response)
+                self.assertEqual(response.content.decode(), self.TEXT)
+
+    def test_already_encoded_response_is_not_compressed_again(self):
+        payload = gzip.compress(self.TEXT.encode())
+        response = HttpResponse(payload, content_type="text/css")
+        response["Content-Encoding"] = "gzip"
+        response = self.process(response)
+        self.assertEqual(response.content, payload)
+
+    def test_streaming_response_passes_through(self):
+        response = self.process(StreamingHttpResponse(iter([self.TEXT]), content_type="application/x-ndjson"))
+        self.assertNotIn("Content-Encoding", response)
+        response = self.process(StreamingHttpResponse(iter([self.TEXT]), content_type="text/csv"))
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(b"".join(response.streaming_content).decode(), self.TEXT)
@@ -0,0 +1,110 @@
+"""
+Sliding-window throttles for the authentication views, kept in the cache.
+
+Each throttle counts events per identifier (client IP, username) in two
+fixed buckets and weights the previous bucket by how much of it still
+overlaps the window, which approximates a true sliding window with two
+cache keys and one atomic increment per event.
+
+Views call check() before any password hashing, so a credential-stuffing
+burst is turned away for the price of two cache reads. With several worker
+processes point CACHE_BACKEND at a shared cache, otherwise each process
+enforces its own limit.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class SlidingWindowThrottle:
+    """
+    At most `limit` events per `window` seconds for each identifier; both
+    come from a (limit, window) setting, read on use so tests can override it.
+    """
+
+    def __init__(self, scope, setting):
+        self.scope = scope
+        self.setting = setting
+
+    @property
+    def limit(self):
+        return getattr(settings, self.setting)[0]
+
+    @property
+    def window(self):
+        return getattr(settings, self.setting)[1]
+
+    def _keys(self, ident, now):
+        digest = hashlib.sha1(str(ident).encode()).hexdigest()
+        bucket = int(now // self.window)
+        prefix = f"throttle:{self.scope}:{digest}"
+        return f"{prefix}:{bucket}", f"{prefix}:{bucket - 1}", bucket
+
+    def check(self, ident, now=None):
+        """
+        Seconds to wait before the next attempt, or 0 if allowed. The wait
+        is how long until the previous bucket has decayed enough.
+        """
+        if not ident or self.limit <= 0:
+            return 0
+        now = time.time() if now is None else now
+        current_key, previous_key, bucket = self._keys(ident, now)
+        counts = cache.get_many([current_key, previous_key])
+        current, previous = counts.get(current_key, 0), counts.get(previous_key, 0)
+        elapsed = now - bucket * self.window
+        if current + previous * (1 - elapsed / self.window) < self.limit:
+            return 0
+        if current >= self.limit or not previous:
+            # Only the next bucket clears it
+            return max(1, math.ceil(self.window - elapsed))
+        # previous * (1 - t / window) drops below limit - current at t
+        clears_at = self.window * (1 - (self.limit - current) / previous)
+        return max(1, math.ceil(clears_at - elapsed))
+
+    def hit(self, ident, now=None):
+        """Record one event for ident."""
+        if not ident:
+            return
+        now = time.time() if now is None else now
+        current_key, _, _ = self._keys(ident, now)
+        # Buckets live two windows so the previous one is there to weight
+        if not cache.add(current_key, 1, timeout=self.window * 2):
+            try:
+                cache.incr(current_key)
+            except ValueError:
+                # Expired between add() and incr()
+                cache.set(current_key, 1, timeout=self.window * 2)
+
+    def reset(self, ident, now=None):
+        """Forget ident's events, e.g. after a successful login."""
+        if not ident:
+            return
+        now = time.time() if now is None else now
+        current_key, previous_key, _ = self._keys(ident, now)
+        cache.delete_many([current_key, previous_key])
+
+
+def client_ip(request):
+    """
+    Client address. Behind AUTH_TRUSTED_PROXIES reverse proxies the last
+    entries of X-Forwarded-For are theirs; anything further left could be
+    forged by the client, so the entry just before them is used.
+    """
+    proxies = settings.AUTH_TRUSTED_PROXIES
+    if proxies:
+        forwarded = [part.strip() for part in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if part.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def normalize_username(username):
+    return username.strip().lower()[:150]
+
+
+login_ip_throttle = SlidingWindowThrottle("login-ip", "AUTH_THROTTLE_LOGIN_IP")
+login_user_throttle = SlidingWindowThrottle("login-user", "AUTH_THROTTLE_LOGIN_USER")
+register_ip_throttle = SlidingWindowThrottle("register-ip", "AUTH_THROTTLE_REGISTER_IP")
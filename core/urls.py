@@ -1,14 +1,21 @@
 from django.urls import path
-from .views import home, chat_view, calories_view, todo_view, compare_players_view, parse_player_view, reset_chat_context, register_view, login_view, logout_view
+from .views import home, chat_view, chat_search_view, chat_stats_view, calories_view, calories_batch_view, todo_view, todo_range_view, todo_batch_view, compare_players_view, parse_player_view, bulk_parse_view, reset_chat_context, export_view, register_view, login_view, logout_view
 
 urlpatterns = [
     path('', home, name='home'),
     path('chat/', chat_view, name='chat'),
+    path('chat/search/', chat_search_view, name='chat_search'),
+    path('chat/stats/', chat_stats_view, name='chat_stats'),
     path('calories/', calories_view, name='calories'),
+    path('calories/batch/', calories_batch_view, name='calories_batch'),
     path("todo/", todo_view, name="todo"),
+    path("todo/range/", todo_range_view, name="todo_range"),
+    path("todo/batch/", todo_batch_view, name="todo_batch"),
     path('compare-players/', compare_players_view, name='compare_players'),
     path('parse-player/', parse_player_view, name='parse_player'),
+    path('bulk-parse/', bulk_parse_view, name='bulk_parse'),
     path('reset-chat/', reset_chat_context, name='reset_chat'),
+    path('export/', export_view, name='export'),
     path('register/', register_view, name='register'),
     path('login/', login_view, name='login'),
     path('logout/', logout_view, name='logout'),
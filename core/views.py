@@ -1,64 +1,226 @@
-import os
-from dotenv import load_dotenv
+from django.conf import settings
 from django.shortcuts import render, redirect
-from django.http import JsonResponse 
+from django.template.loader import render_to_string
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
+from django.views.decorators.cache import cache_control
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+import csv
 import json  
 import logging
-from openai import OpenAI
+import time
 from .models import Todo, ChatMessage
 from datetime import date
-import html
-import re
 
 # Імпорт алгоритмів
-from .algorithms import ChatContextManager, ResponseFilter
-
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
+from .algorithms import ChatContextManager, ChatRouter, RetrievalContextManager, ResponseFilter
+from . import llm, tasks
+from .chat import API_TIMEOUT, CHAT_SYSTEM_PROMPT, prepare_reply
+from .chat_state import ContextRegistry, KeyedLock, reserve_turn_seq
+from .caching import PLAYERS_NAMESPACE, HTTP_MAX_AGE, conditional, get_or_compute
+from .faq import find_faq_answer
+from .throttle import client_ip, login_ip_throttle, login_user_throttle, normalize_username, register_ip_throttle
 
 logger = logging.getLogger(__name__)
 
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY")
-)
-
 # Configuration constants
 CHAT_MAX_MESSAGES = 10  # Number of messages to keep in context
 CHAT_MAX_TOKENS = 3000  # Token limit for context
-API_TIMEOUT = 30  # API request timeout in seconds
+CHAT_TURN_WAIT = API_TIMEOUT + 5  # How long a turn waits for the same user's previous one
+BUSY_MESSAGE = "Your previous message is still being answered, please try again"
+
+# Context managers per user, evicted least recently used first
+# once the process-wide CHAT_CONTEXT_MEMORY_LIMIT is exceeded
+chat_managers = ContextRegistry(max_bytes=settings.CHAT_CONTEXT_MEMORY_LIMIT)
+# Serializes turns per user; different users never wait for each other
+chat_locks = KeyedLock()
+chat_router = ChatRouter(settings.CHAT_ROUTES)
+
+
+def _create_context_manager(user):
+    """Context manager for a user according to CHAT_CONTEXT_STRATEGY."""
+    if settings.CHAT_CONTEXT_STRATEGY != 'retrieval':
+        manager = ChatContextManager(
+            max_messages=CHAT_MAX_MESSAGES,
+            max_tokens=CHAT_MAX_TOKENS
+        )
+        limit = CHAT_MAX_MESSAGES
+    else:
+        manager = RetrievalContextManager(
+            max_messages=CHAT_MAX_MESSAGES,
+            max_tokens=CHAT_MAX_TOKENS,
+            recent_messages=settings.CHAT_RECENT_MESSAGES,
+            top_k=settings.CHAT_RETRIEVAL_TOP_K,
+            max_indexed_turns=settings.CHAT_RETRIEVAL_MAX_TURNS
+        )
+        limit = settings.CHAT_RETRIEVAL_MAX_TURNS * 2
+
+    # Rebuild from the stored history (one query, newest messages only), so a
+    # context evicted under memory pressure comes back intact; the current
+    # message is already saved and is added by the caller
+    history = list(
+        ChatMessage.objects.for_user(user)
+        .order_by('-seq', '-created_at')
+        .values_list('role', 'raw_content')[1:limit + 1]
+    )
+    history.reverse()
+    manager.load_history(history)
+    return manager
+
+
+def _route_turn(user_message, history_length):
+    """Model, context depth and max_tokens for this turn (see CHAT_ROUTES)."""
+    if not settings.CHAT_ROUTING:
+        return {'route': 'default', 'model': settings.CHAT_MODEL,
+                'context_messages': None, 'max_tokens': None, 'reasons': []}
+    return chat_router.route(user_message, history_length)
+
+
+def _chat_turn_response(new_messages, context_info, error):
+    """JSON for one chat turn: only the new messages, rendered with the page partial."""
+    return JsonResponse({
+        "success": error is None,
+        "error": error,
+        "html": "".join(
+            render_to_string("core/partials/chat_message.html", {"msg": msg})
+            for msg in new_messages
+        ),
+        "messages": [
+            {"id": msg.id, "role": msg.role, "created_at": msg.created_at.isoformat()}
+            for msg in new_messages
+        ],
+        "context_info": context_info,
+    }, status=502 if error else 200)
+
+
+def _ask_model(user, context_manager, decision):
+    """Ask the routed model with the user's context; returns (reply, reply_html)."""
+    user_id = user.id
+    # Get conversation history, as deep as the route allows
+    messages = context_manager.get_context_for_api()
+    depth = decision['context_messages']
+    if depth is not None and len(messages) > depth:
+        messages = messages[-depth:]
+        # An answer without its question only costs tokens
+        if len(messages) > 1 and messages[0]['role'] == 'assistant':
+            messages = messages[1:]
+    logger.info(
+        f"Chat route: user={user_id} route={decision['route']} model={decision['model']} "
+        f"messages={len(messages)} ~{sum(len(m['content']) for m in messages) // 4} tokens "
+        f"max_tokens={decision['max_tokens']} reasons={','.join(decision['reasons'])} "
+        f"({settings.CHAT_CONTEXT_STRATEGY})"
+    )
 
-# Dictionary for storing context
-# Stores context managers for each user session
-chat_managers = {}
+    messages.insert(0, {"role": "system", "content": CHAT_SYSTEM_PROMPT})
+
+    # Call OpenAI API with full conversation history
+    logger.info(f"Calling OpenAI API with {len(messages)} messages for user {user.username}")
+    api_started = time.monotonic()
+    called_at = timezone.now()
+    options = {"max_tokens": decision['max_tokens']} if decision['max_tokens'] else {}
+    response = llm.get_client().chat.completions.create(
+        model=decision['model'],
+        messages=messages,
+        timeout=API_TIMEOUT,
+        **options
+    )
+    api_latency_ms = (time.monotonic() - api_started) * 1000
 
+    reply = response.choices[0].message.content
+    logger.info(f"Received response from OpenAI: {reply[:100]}")
 
-def convert_markdown_to_html(text):
-    """Convert markdown-style formatting to HTML."""
-    if not text:
-        return text
-    
-    # Escape any HTML first to prevent injection
-    text = html.escape(text)
-    
-    # Convert markdown headers to styled divs
-    text = re.sub(r'^### (.+)$', r'<div style="font-size: 18px; font-weight: 700; color: #1f2937; margin: 16px 0 8px 0;">\1</div>', text, flags=re.MULTILINE)
-    text = re.sub(r'^## (.+)$', r'<div style="font-size: 20px; font-weight: 700; color: #1f2937; margin: 20px 0 12px 0;">\1</div>', text, flags=re.MULTILINE)
-    text = re.sub(r'^# (.+)$', r'<div style="font-size: 24px; font-weight: 700; color: #1f2937; margin: 24px 0 16px 0;">\1</div>', text, flags=re.MULTILINE)
-    
-    # Convert bold (**text**)
-    text = re.sub(r'\*\*(.+?)\*\*', r'<strong style="font-weight: 600; color: #111827;">\1</strong>', text)
-    
-    # Convert bullet points (- text)
-    text = re.sub(r'^- (.+)$', r'<div style="margin-left: 20px; margin-bottom: 8px; display: flex; gap: 8px;"><span style="color: #3b82f6; font-weight: bold;">•</span><span>\1</span></div>', text, flags=re.MULTILINE)
-    
-    # Add line breaks back (they got escaped)
-    text = text.replace('\n', '<br>')
-    
-    return text
+    usage = getattr(response, 'usage', None)
+    tasks.submit(
+        tasks.record_chat_usage, user_id, decision['model'],
+        getattr(usage, 'prompt_tokens', None),
+        getattr(usage, 'completion_tokens', None),
+        api_latency_ms, route=decision['route'], created_at=called_at.isoformat()
+    )
+    return prepare_reply(reply)
+
+
+def _run_chat_turn(user, user_message, new_messages):
+    """
+    Store the question, answer it from the FAQ table or the model and
+    store the answer; only usage accounting is left to background tasks.
+    Callers hold the user's turn lock, so turns of one user never interleave.
+    Appends the new messages to `new_messages`; returns (context_info, error).
+    """
+    context_info = None
+    error = None
+    user_id = user.id
+
+    # One number for the question and one for the answer, even if the answer fails
+    seq = reserve_turn_seq(user_id, 2)
+
+    # Save user message to database
+    new_messages.append(
+        ChatMessage.objects.create(
+            user=user, role='user', content=user_message, raw_content=user_message, seq=seq
+        )
+    )
+
+    # Create or retrieve context manager for user
+    if user_id not in chat_managers:
+        chat_managers[user_id] = _create_context_manager(user)
+
+    context_manager = chat_managers[user_id]
+    decision = _route_turn(user_message, len(context_manager.conversation_history))
+
+    # Store user message
+    context_manager.add_message("user", user_message)
+
+    try:
+        # Stock questions are answered from the FAQ table, without the model
+        faq = find_faq_answer(user_message)
+        if faq is not None:
+            route = 'faq'
+            reply, reply_html = faq.answer, faq.answer_html
+            logger.info(f"Chat route: user={user_id} route=faq entry={faq.id}")
+        else:
+            route = decision['route']
+            reply, reply_html = _ask_model(user, context_manager, decision)
+
+        # Store HTML formatted reply to database before answering, so a
+        # reload or a rebuilt context always sees the whole turn
+        new_messages.append(
+            ChatMessage.objects.create(
+                user=user, role='assistant', content=reply_html, raw_content=reply, seq=seq + 1
+            )
+        )
+
+        # Store AI response in memory for context manager
+        context_manager.add_message("assistant", reply)
+
+        # Filter response - wrap in try/except in case it fails
+        try:
+            filtered_result = ResponseFilter.filter_response(reply, user_message)
+            context_info = {
+                "route": route,
+                "summary": context_manager.get_conversation_summary(),
+                "is_relevant": filtered_result["is_relevant"],
+                "confidence": filtered_result["confidence"],
+                "warnings": filtered_result["warnings"]
+            }
+        except Exception as filter_error:
+            logger.warning(f"Filter error (non-blocking): {filter_error}")
+            # Continue without filtering
+
+    except (json.JSONDecodeError, AttributeError) as e:
+        error = f"API Error: Invalid response format - {str(e)}"
+        logger.error(f"JSON/Attribute error in chat: {e}", exc_info=True)
+    except Exception as e:
+        error = f"API Error: {str(e)}"
+        logger.error(f"Error in chat: {e}", exc_info=True)
 
+    # Account for this turn's growth and enforce the process-wide cap
+    chat_managers.update(user_id)
+    return context_info, error
 
 
 @require_http_methods(["GET", "POST"])
@@ -69,8 +231,15 @@ def chat_view(request):
     error = None
     context_info = None
     chat_history = []
+    new_messages = []
     user = request.user
 
+    # AJAX clients get only the new messages instead of the whole page
+    wants_json = (
+        request.content_type == 'application/json'
+        or request.headers.get('x-requested-with') == 'XMLHttpRequest'
+    )
+
     try:
         if request.method == "POST":
             # Check if it's AJAX (JSON) request
@@ -88,91 +257,21 @@ def chat_view(request):
                 user_message = request.POST.get("message", "").strip()
 
             if user_message:
-                user_id = user.id
-
-                # Save user message to database
-                ChatMessage.objects.create(user=user, role='user', content=user_message)
-
-                # Create or retrieve context manager for user
-                if user_id not in chat_managers:
-                    chat_managers[user_id] = ChatContextManager(
-                        max_messages=CHAT_MAX_MESSAGES,
-                        max_tokens=CHAT_MAX_TOKENS
-                    )
-                
-                context_manager = chat_managers[user_id]
-
-                # Store user message
-                context_manager.add_message("user", user_message)
-
                 try:
-                    # Get conversation history
-                    messages = context_manager.get_context_for_api()
-                    logger.info(f"Chat messages for API: {len(messages)} messages")
-                    
-                    # System prompt
-                    system_prompt = {
-                        "role": "system",
-                        "content": """You are a basketball AI coach and expert.
-                        Answer questions about:
-                        - NBA, Euroleague and other leagues
-                        - Player statistics (PPG, RPG, APG)
-                        - Game analysis and team strategies
-                        - Basketball history and rules
-                        - Training and fitness advice for basketball players
-                        
-                        Be helpful, concise, and encouraging."""
-                    }
-                    messages.insert(0, system_prompt)
-
-                    # Call OpenAI API with full conversation history
-                    logger.info(f"Calling OpenAI API with {len(messages)} messages for user {user.username}")
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=messages,
-                        timeout=API_TIMEOUT
-                    )
-
-                    reply = response.choices[0].message.content
-                    logger.info(f"Received response from OpenAI: {reply[:100]}")
-                    reply = html.unescape(reply)
-                    reply = reply.replace('\\u000A', '\n')
-                    
-                    # Convert markdown to HTML for better display
-                    reply_html = convert_markdown_to_html(reply)
-                    
-                    # Store HTML formatted reply to database
-                    ChatMessage.objects.create(user=user, role='assistant', content=reply_html)
-                    logger.info(f"Saved assistant message to database for user {user.username}")
-                    
-                    # Store AI response in memory for context manager
-                    context_manager.add_message("assistant", reply)
-
-                    # Filter response - wrap in try/except in case it fails
-                    try:
-                        filtered_result = ResponseFilter.filter_response(reply, user_message)
-                        context_info = {
-                            "summary": context_manager.get_conversation_summary(),
-                            "is_relevant": filtered_result["is_relevant"],
-                            "confidence": filtered_result["confidence"],
-                            "warnings": filtered_result["warnings"]
-                        }
-                    except Exception as filter_error:
-                        logger.warning(f"Filter error (non-blocking): {filter_error}")
-                        # Continue without filtering
-                    
-                    # Set reply to None since it's already in chat_history
-                    reply = None
-
-                except (json.JSONDecodeError, AttributeError) as e:
-                    error = f"API Error: Invalid response format - {str(e)}"
-                    logger.error(f"JSON/Attribute error in chat: {e}", exc_info=True)
-                except Exception as e:
-                    error = f"API Error: {str(e)}"
-                    logger.error(f"Error in chat: {e}", exc_info=True)
+                    with chat_locks.hold(user.id, timeout=CHAT_TURN_WAIT):
+                        context_info, error = _run_chat_turn(user, user_message, new_messages)
+                except TimeoutError:
+                    if wants_json:
+                        return JsonResponse({"error": BUSY_MESSAGE}, status=429)
+                    error = BUSY_MESSAGE
+            elif wants_json:
+                return JsonResponse({"error": "Empty message"}, status=400)
+
+            if wants_json:
+                return _chat_turn_response(new_messages, context_info, error)
         
         # Load chat history from database filtered by user
-        chat_history = ChatMessage.objects.filter(user=user).order_by('created_at')
+        chat_history = ChatMessage.objects.for_user(user).order_by('seq', 'created_at')
         
     except Exception as e:
         logger.error(f"Unexpected error in chat_view: {e}")
@@ -190,20 +289,25 @@ def chat_view(request):
     )
 
 
-# ДОДАЙ: Нова функція для порівняння гравців
-def compare_players_view(request):
-    """
-    Порівняння двох гравців
-    URL: /compare-players/?p1=LeBron&p2=Curry
-    """
+def _compare_params(request):
+    """Нормалізовані параметри: зайві пробіли не створюють нових ключів кешу"""
+    return {
+        'view': 'compare',
+        'p1': ' '.join(request.GET.get('p1', 'Player 1').split()) or 'Player 1',
+        'p2': ' '.join(request.GET.get('p2', 'Player 2').split()) or 'Player 2',
+    }
+
+
+def _parse_params(request):
+    return {'view': 'parse', 'text': request.GET.get('text', '').strip()}
+
+
+def _compare_players(p1, p2):
     from .algorithms import PlayerStats, PlayerComparator
-    
-    player1_name = request.GET.get('p1', 'Player 1')
-    player2_name = request.GET.get('p2', 'Player 2')
-    
+
     # Тимчасові дані 
     player1_data = {
-        'name': player1_name,
+        'name': p1,
         'points': 2056,
         'rebounds': 624,
         'assists': 816,
@@ -211,43 +315,97 @@ def compare_players_view(request):
     }
     
     player2_data = {
-        'name': player2_name,
+        'name': p2,
         'points': 2400,
         'rebounds': 400,
         'assists': 560,
         'games_played': 80
     }
     
-    p1 = PlayerStats(player1_data)
-    p2 = PlayerStats(player2_data)
-    
-    comparison = PlayerComparator.compare_players(p1, p2)
+    return PlayerComparator.compare_players(PlayerStats(player1_data), PlayerStats(player2_data))
+
+
+def _parse_player(text):
+    from .algorithms import DataParser
+
+    parsed_data = DataParser.parse_player_string(text)
     
+    if parsed_data:
+        return {
+            "success": True,
+            "data": parsed_data
+        }
+    return {
+        "success": False,
+        "error": "Не вдалося розпарсити текст"
+    }
+
+
+# ДОДАЙ: Нова функція для порівняння гравців
+@require_http_methods(["GET", "HEAD"])
+@cache_control(public=True, max_age=HTTP_MAX_AGE)
+@conditional(PLAYERS_NAMESPACE, _compare_params)
+def compare_players_view(request):
+    """
+    Порівняння двох гравців
+    URL: /compare-players/?p1=LeBron&p2=Curry
+    Результат кешується за нормалізованими параметрами
+    """
+    params = _compare_params(request)
+    comparison = get_or_compute(
+        PLAYERS_NAMESPACE, params,
+        lambda: _compare_players(params['p1'], params['p2'])
+    )
     return JsonResponse(comparison)
 
 
 # Функція для парсингу гравців
+@require_http_methods(["GET", "HEAD"])
+@cache_control(public=True, max_age=HTTP_MAX_AGE)
+@conditional(PLAYERS_NAMESPACE, _parse_params)
 def parse_player_view(request):
     """
     Парсить текст з даними гравця
     URL: /parse-player/?text=LeBron James: 25.7 PPG, 7.8 RPG, 10.2 APG
     """
-    from .algorithms import DataParser
-    
-    text = request.GET.get('text', '')
-    
-    parsed_data = DataParser.parse_player_string(text)
-    
-    if parsed_data:
-        return JsonResponse({
-            "success": True,
-            "data": parsed_data
-        })
+    params = _parse_params(request)
+    result = get_or_compute(
+        PLAYERS_NAMESPACE, params,
+        lambda: _parse_player(params['text'])
+    )
+    return JsonResponse(result)
+
+
+@require_http_methods(["POST"])
+@login_required(login_url='login')
+def bulk_parse_view(request):
+    """
+    Stream-parse an uploaded file or raw request body of stat lines.
+    URL: POST /bulk-parse/?kind=player|score|auto
+    Body: multipart field "file" or plain text, one record per line.
+    Response: JSONL, one record per line plus a trailing summary.
+    """
+    from .algorithms import BulkDataParser
+
+    try:
+        parser = BulkDataParser(kind=request.GET.get('kind', 'auto'))
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+    if request.content_type == 'multipart/form-data':
+        source = request.FILES.get('file')
+        if source is None:
+            return JsonResponse({"success": False, "error": "No file uploaded"}, status=400)
     else:
-        return JsonResponse({
-            "success": False,
-            "error": "Не вдалося розпарсити текст"
-        })
+        # HttpRequest is file-like: iterating reads the body line by line
+        source = request
+
+    response = StreamingHttpResponse(
+        parser.to_jsonl(source),
+        content_type='application/x-ndjson; charset=utf-8'
+    )
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
 
 
 @require_http_methods(["POST"])
@@ -256,37 +414,227 @@ def reset_chat_context(request):
     """Reset conversation context for current user."""
     user = request.user
     user_id = user.id
-    # Remove from memory
-    if user_id in chat_managers:
-        del chat_managers[user_id]
-    # Remove from database
-    ChatMessage.objects.filter(user=user).delete()
+    # Let a running turn finish first, so its answer is deleted with the rest
+    try:
+        with chat_locks.hold(user_id, timeout=CHAT_TURN_WAIT):
+            # Remove from memory
+            chat_managers.pop(user_id, None)
+            # Remove from database; for_user() deletes on the chat
+            # database holding this user's rows
+            ChatMessage.objects.for_user(user).delete()
+    except TimeoutError:
+        return JsonResponse({"success": False, "message": BUSY_MESSAGE}, status=429)
     logger.info(f"Chat context reset for user: {user.username}")
     
     return JsonResponse({"success": True, "message": "Chat history cleared"})
 
 
+@require_http_methods(["GET"])
+@login_required(login_url='login')
+def chat_search_view(request):
+    """
+    Search the current user's chat history.
+    URL: /chat/search/?q=free throws&page=1&per_page=20
+    """
+    from .search import search_chat_messages
+
+    query = request.GET.get("q", "").strip()
+    try:
+        page = int(request.GET.get("page", 1))
+        per_page = int(request.GET.get("per_page", 20))
+    except ValueError:
+        return JsonResponse({"error": "page and per_page must be integers"}, status=400)
+
+    if not query:
+        return JsonResponse({"error": "Empty query"}, status=400)
+
+    found = search_chat_messages(request.user, query, page=page, per_page=per_page)
+    return JsonResponse({"query": query, "page": page, **found})
+
+
+@require_http_methods(["GET"])
+@login_required(login_url='login')
+def chat_stats_view(request):
+    """
+    Chat usage dashboard data from the analytics rollups (staff only).
+    URL: /chat/stats/?days=30&by=day|hour&top=10
+    New messages are folded in first, at most CHAT_STATS_FOLD_LIMIT per
+    request; `manage.py chat_stats` catches up any backlog.
+    """
+    from .analytics import chat_stats, update_chat_rollups
+
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Staff only"}, status=403)
+    try:
+        days = int(request.GET.get("days", 30))
+        top = int(request.GET.get("top", 10))
+    except ValueError:
+        return JsonResponse({"error": "days and top must be integers"}, status=400)
+
+    rollup = update_chat_rollups(max_rows=settings.CHAT_STATS_FOLD_LIMIT)
+    try:
+        stats = chat_stats(days=days, by=request.GET.get("by", "day"), top_users=max(0, min(top, 100)))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse({**stats, "caught_up": rollup["caught_up"]})
+
+
+@require_http_methods(["GET"])
+@login_required(login_url='login')
+def export_view(request):
+    """
+    Download the current user's chat history and todos.
+    URL: /export/?format=jsonl|csv&gzip=1&include=chat,todos
+    """
+    from .export import export_filename, export_stream
+
+    fmt = request.GET.get("format", "jsonl")
+    compress = request.GET.get("gzip") == "1"
+    kinds = [k for k in request.GET.get("include", "chat,todos").split(",") if k]
+
+    try:
+        chunks = export_stream(request.user, fmt=fmt, kinds=kinds, compress=compress)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    if compress:
+        content_type = "application/gzip"
+    elif fmt == "csv":
+        content_type = "text/csv; charset=utf-8"
+    else:
+        content_type = "application/x-ndjson; charset=utf-8"
+
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = (
+        f'attachment; filename="{export_filename(request.user, fmt, compress)}"'
+    )
+    logger.info(f"Export started for {request.user.username}: {fmt}, gzip={compress}")
+    return response
+
+
 @login_required(login_url='login')
 def calories_view(request):
+    from .algorithms import daily_calories, validate_calorie_input
+
     calories = None
+    error = None
+    status = 200
 
     if request.method == "POST":
-        gender = request.POST.get("gender")
-        age = int(request.POST.get("age"))
-        height = int(request.POST.get("height"))
-        weight = int(request.POST.get("weight"))
-        activity = float(request.POST.get("activity"))
-
-        if gender == "male":
-            bmr = 88.36 + (13.4 * weight) + (4.8 * height) - (5.7 * age)
+        try:
+            values = validate_calorie_input(
+                request.POST.get("gender"),
+                request.POST.get("age"),
+                request.POST.get("height"),
+                request.POST.get("weight"),
+                request.POST.get("activity"),
+            )
+        except ValueError as e:
+            error = str(e)
+            status = 400
         else:
-            bmr = 447.6 + (9.2 * weight) + (3.1 * height) - (4.3 * age)
-
-        calories = round(bmr * activity)
+            calories = daily_calories(*values)
 
     return render(request, "core/calories.html", {
-        "calories": calories
-    })
+        "calories": calories,
+        "error": error,
+    }, status=status)
+
+
+def _csv_rows(lines):
+    """Dict rows from CSV lines (bytes or str); header names are case-insensitive."""
+    lines = (line.decode('utf-8-sig', errors='replace') if isinstance(line, bytes) else line for line in lines)
+    reader = csv.DictReader(lines)
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    return reader
+
+
+def _jsonl_rows(lines):
+    """One object per non-empty line; unparseable lines pass through as text and fail validation."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield line[:200]
+
+
+def _json_too_large():
+    return JsonResponse({
+        "success": False,
+        "error": f"JSON input is limited to {settings.CALORIE_BATCH_MAX_JSON_BYTES} bytes; "
+                 f"send larger batches as JSONL or CSV, which stream",
+    }, status=413)
+
+
+@require_http_methods(["POST"])
+@login_required(login_url='login')
+def calories_batch_view(request):
+    """
+    Daily calorie targets for a whole roster in one request.
+    URL: POST /calories/batch/?format=jsonl|csv
+    Body: CSV (text/csv), JSONL (application/x-ndjson), a JSON array or
+    {"rows": [...]} (application/json), or a multipart "file" upload.
+    Each row: gender, age, height, weight, activity (factor or level name),
+    optional id/name echoed back.
+    Response: one result or error per input row, in input order; JSONL ends
+    with a summary line.
+    """
+    from .algorithms import CalorieBatchCalculator
+
+    content_type = request.content_type
+    if content_type == 'multipart/form-data':
+        upload = request.FILES.get('file')
+        if upload is None:
+            return JsonResponse({"success": False, "error": "No file uploaded"}, status=400)
+        name = upload.name.lower()
+        if name.endswith('.csv'):
+            rows, input_format = _csv_rows(upload), 'csv'
+        elif name.endswith('.json'):
+            # Parsed whole, so the upload is read into memory only under the cap
+            if upload.size > settings.CALORIE_BATCH_MAX_JSON_BYTES:
+                return _json_too_large()
+            content_type, body = 'application/json', upload.read()
+        else:
+            rows, input_format = _jsonl_rows(upload), 'jsonl'
+    elif content_type == 'text/csv':
+        # HttpRequest is file-like: iterating reads the body line by line
+        rows, input_format = _csv_rows(request), 'csv'
+    elif content_type in ('application/x-ndjson', 'application/jsonl'):
+        rows, input_format = _jsonl_rows(request), 'jsonl'
+    elif content_type == 'application/json':
+        # request.body also enforces DATA_UPLOAD_MAX_MEMORY_SIZE
+        if int(request.META.get('CONTENT_LENGTH') or 0) > settings.CALORIE_BATCH_MAX_JSON_BYTES:
+            return _json_too_large()
+        body = request.body
+    else:
+        return JsonResponse({"success": False, "error": f"Unsupported content type: {content_type}"}, status=415)
+
+    if content_type == 'application/json':
+        # A JSON document has to be parsed whole; JSONL and CSV stream
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return JsonResponse({"success": False, "error": "Invalid JSON"}, status=400)
+        rows = data.get("rows") if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            return JsonResponse({"success": False, "error": "Expected a list of rows"}, status=400)
+        input_format = 'jsonl'
+
+    output_format = request.GET.get('format', input_format)
+    if output_format not in ('jsonl', 'csv'):
+        return JsonResponse({"success": False, "error": "format must be jsonl or csv"}, status=400)
+
+    calculator = CalorieBatchCalculator(max_rows=settings.CALORIE_BATCH_MAX_ROWS)
+    if output_format == 'csv':
+        response = StreamingHttpResponse(calculator.to_csv(rows), content_type='text/csv; charset=utf-8')
+    else:
+        response = StreamingHttpResponse(calculator.to_jsonl(rows), content_type='application/x-ndjson; charset=utf-8')
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
 
 
 def home(request):
@@ -315,6 +663,222 @@ def todo_view(request):
     })
 
 
+TODO_RANGE_MAX_DAYS = 92  # Longest window a single range request may cover
+
+
+@require_http_methods(["GET"])
+@login_required(login_url='login')
+def todo_range_view(request):
+    """
+    Todos and per-day totals for a date window in a constant number of queries.
+    URL: /todo/range/?start=2026-03-01&end=2026-03-31[&todos=0]
+    """
+    user = request.user
+
+    try:
+        start = date.fromisoformat(request.GET.get("start", ""))
+        end = date.fromisoformat(request.GET.get("end", ""))
+    except ValueError:
+        return JsonResponse({"error": "start and end must be YYYY-MM-DD dates"}, status=400)
+
+    if end < start:
+        return JsonResponse({"error": "end must not be before start"}, status=400)
+    if (end - start).days + 1 > TODO_RANGE_MAX_DAYS:
+        return JsonResponse({"error": f"Range is limited to {TODO_RANGE_MAX_DAYS} days"}, status=400)
+
+    todos_in_range = Todo.objects.filter(user=user, date__range=(start, end))
+
+    # One GROUP BY query, answered from the (user, date, created_at, completed) index
+    per_day = (
+        todos_in_range
+        .order_by("date")
+        .values("date")
+        .annotate(total=Count("id"), completed=Count("id", filter=Q(completed=True)))
+    )
+    days = [
+        {"date": row["date"].isoformat(), "total": row["total"], "completed": row["completed"]}
+        for row in per_day
+    ]
+
+    response = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "days": days,
+        "total": sum(day["total"] for day in days),
+        "completed": sum(day["completed"] for day in days),
+    }
+
+    if request.GET.get("todos", "1") != "0":
+        response["todos"] = [
+            {
+                "id": todo["id"],
+                "title": todo["title"],
+                "date": todo["date"].isoformat(),
+                "completed": todo["completed"],
+                "created_at": todo["created_at"].isoformat(),
+            }
+            for todo in todos_in_range
+            .order_by("date", "created_at")
+            .values("id", "title", "date", "completed", "created_at")
+        ]
+
+    return JsonResponse(response)
+
+
+TODO_BATCH_MAX_OPERATIONS = 500  # Operations accepted in one batch request
+TODO_BATCH_OPS = ("create", "update", "complete", "delete")
+TODO_MAX_ID = 2 ** 63 - 1  # Largest id a bigint primary key can hold
+
+
+def _todo_to_json(todo):
+    return {
+        "id": todo.id,
+        "title": todo.title,
+        "date": todo.date.isoformat() if isinstance(todo.date, date) else todo.date,
+        "completed": todo.completed,
+        "created_at": todo.created_at.isoformat() if todo.created_at else None,
+    }
+
+
+def _validate_todo_operation(op):
+    """Return the cleaned operation or raise ValueError with a readable message."""
+    if not isinstance(op, dict):
+        raise ValueError("Operation must be an object")
+
+    kind = op.get("op")
+    if kind not in TODO_BATCH_OPS:
+        raise ValueError(f"op must be one of: {', '.join(TODO_BATCH_OPS)}")
+
+    cleaned = {"op": kind}
+
+    if kind != "create":
+        todo_id = op.get("id")
+        # bool is an int subclass: {"id": true} must not mean id 1
+        if not isinstance(todo_id, int) or isinstance(todo_id, bool):
+            raise ValueError("id is required and must be an integer")
+        if not 1 <= todo_id <= TODO_MAX_ID:
+            raise ValueError("id is out of range")
+        cleaned["id"] = todo_id
+
+    if "title" in op or kind == "create":
+        title = op.get("title")
+        if not isinstance(title, str) or not title.strip():
+            raise ValueError("title must be a non-empty string")
+        if len(title) > 255:
+            raise ValueError("title is longer than 255 characters")
+        cleaned["title"] = title.strip()
+
+    if "date" in op or kind == "create":
+        try:
+            cleaned["date"] = date.fromisoformat(op.get("date") or "")
+        except (TypeError, ValueError):
+            raise ValueError("date must be YYYY-MM-DD")
+
+    if kind == "complete" or "completed" in op:
+        completed = op.get("completed", True)
+        # bool() would turn "false" or 0 into a silent guess
+        if not isinstance(completed, bool):
+            raise ValueError("completed must be true or false")
+        cleaned["completed"] = completed
+
+    if kind == "update" and not cleaned.keys() & {"title", "date", "completed"}:
+        raise ValueError("update needs at least one of title, date, completed")
+
+    return cleaned
+
+
+@require_http_methods(["POST"])
+@login_required(login_url='login')
+def todo_batch_view(request):
+    """
+    Apply a list of todo operations in one transaction.
+    URL: POST /todo/batch/
+    Body: {"operations": [
+        {"op": "create", "title": "Free throws x100", "date": "2026-03-02"},
+        {"op": "update", "id": 5, "title": "...", "date": "..."},
+        {"op": "complete", "id": 6, "completed": true},
+        {"op": "delete", "id": 7}
+    ]}
+    Returns only the changed rows. The number of queries does not depend
+    on the number of operations.
+    """
+    user = request.user
+
+    try:
+        data = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    operations = data.get("operations") if isinstance(data, dict) else None
+
+    if not isinstance(operations, list) or not operations:
+        return JsonResponse({"error": "operations must be a non-empty list"}, status=400)
+    if len(operations) > TODO_BATCH_MAX_OPERATIONS:
+        return JsonResponse(
+            {"error": f"At most {TODO_BATCH_MAX_OPERATIONS} operations per request"}, status=400
+        )
+
+    cleaned = []
+    for index, op in enumerate(operations):
+        try:
+            cleaned.append(_validate_todo_operation(op))
+        except ValueError as e:
+            return JsonResponse({"error": str(e), "operation": index}, status=400)
+
+    with transaction.atomic():
+        ids = {op["id"] for op in cleaned if "id" in op}
+        existing = {
+            todo.id: todo
+            for todo in Todo.objects.select_for_update().filter(user=user, id__in=ids)
+        } if ids else {}
+
+        to_create = []
+        changed = {}
+        deleted = set()
+        update_fields = set()
+
+        for index, op in enumerate(cleaned):
+            if op["op"] == "create":
+                to_create.append(Todo(
+                    user=user, title=op["title"], date=op["date"],
+                    completed=op.get("completed", False)
+                ))
+                continue
+
+            todo = existing.get(op["id"])
+            if todo is None or op["id"] in deleted:
+                transaction.set_rollback(True)
+                return JsonResponse({"error": "Todo not found", "operation": index}, status=404)
+
+            if op["op"] == "delete":
+                deleted.add(todo.id)
+                changed.pop(todo.id, None)
+                continue
+
+            for field in ("title", "date", "completed"):
+                if field in op:
+                    setattr(todo, field, op[field])
+                    update_fields.add(field)
+            changed[todo.id] = todo
+
+        created = Todo.objects.bulk_create(to_create) if to_create else []
+        if changed:
+            Todo.objects.bulk_update(list(changed.values()), sorted(update_fields))
+        if deleted:
+            Todo.objects.filter(user=user, id__in=deleted).delete()
+
+    logger.info(
+        f"Todo batch for {user.username}: {len(created)} created, "
+        f"{len(changed)} updated, {len(deleted)} deleted"
+    )
+
+    return JsonResponse({
+        "success": True,
+        "created": [_todo_to_json(todo) for todo in created],
+        "updated": [_todo_to_json(todo) for todo in changed.values()],
+        "deleted": sorted(deleted),
+    })
+
+
 # ============ AUTHENTICATION VIEWS ============
 
 def register_view(request):
@@ -322,6 +886,12 @@ def register_view(request):
     error = None
     
     if request.method == "POST":
+        ip = client_ip(request)
+        retry_after = register_ip_throttle.check(ip)
+        if retry_after:
+            return _throttled(request, "core/register.html", retry_after)
+        register_ip_throttle.hit(ip)
+
         username = request.POST.get("username", "").strip()
         email = request.POST.get("email", "").strip()
         password1 = request.POST.get("password1", "")
@@ -336,20 +906,34 @@ def register_view(request):
             error = "Password must be at least 6 characters"
         elif password1 != password2:
             error = "Passwords do not match"
-        elif User.objects.filter(username=username).exists():
-            error = "Username already exists"
-        elif User.objects.filter(email=email).exists():
-            error = "Email already exists"
         else:
-            # Create user
-            user = User.objects.create_user(username=username, email=email, password=password1)
-            login(request, user)
-            logger.info(f"New user registered: {username}")
-            return redirect("home")
+            # Unique indexes on username and lower(email) decide; the
+            # duplicate check only runs when the insert fails
+            try:
+                with transaction.atomic():
+                    user = User.objects.create_user(username=username, email=email, password=password1)
+            except IntegrityError:
+                if User.objects.filter(username=username).exists():
+                    error = "Username already exists"
+                else:
+                    error = "Email already exists"
+            else:
+                login(request, user)
+                logger.info(f"New user registered: {username}")
+                return redirect("home")
     
     return render(request, "core/register.html", {"error": error})
 
 
+def _throttled(request, template, retry_after):
+    """429 page for a throttled auth form, before any password is hashed."""
+    minutes = max(1, round(retry_after / 60))
+    error = f"Too many attempts. Try again in {minutes} minute{'s' if minutes != 1 else ''}."
+    response = render(request, template, {"error": error}, status=429)
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
 def login_view(request):
     """User login view."""
     error = None
@@ -358,13 +942,25 @@ def login_view(request):
         username = request.POST.get("username", "")
         password = request.POST.get("password", "")
         
+        # Throttles are checked before authenticate(), whose PBKDF2 hash is
+        # the expensive part of a bad login
+        ip = client_ip(request)
+        user_key = normalize_username(username)
+        retry_after = max(login_ip_throttle.check(ip), login_user_throttle.check(user_key))
+        if retry_after:
+            logger.warning(f"Login throttled for {username!r} from {ip}")
+            return _throttled(request, "core/login.html", retry_after)
+
         user = authenticate(request, username=username, password=password)
         
         if user is not None:
+            login_user_throttle.reset(user_key)
             login(request, user)
             logger.info(f"User logged in: {username}")
             return redirect("home")
         else:
+            login_ip_throttle.hit(ip)
+            login_user_throttle.hit(user_key)
             error = "Invalid username or password"
     
     return render(request, "core/login.html", {"error": error})
@@ -11,4 +11,9 @@ if path not in sys.path:
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
 
 from django.core.wsgi import get_wsgi_application
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+from django.conf import settings
+if settings.LLM_PRELOAD:
+    from core import llm
+    llm.preload()
@@ -6,28 +6,30 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bb_project.settings')
 django.setup()
 
+from core.analytics import chat_stats, update_chat_rollups
 from core.models import ChatMessage
 
-# Display all messages in database
+# Display the latest messages in the database
 print("=" * 60)
-print("All Chat Messages in Database:")
+print("Latest Chat Messages in Database:")
 print("=" * 60)
 
-messages = ChatMessage.objects.all().order_by('created_at')
-if messages.exists():
-    for msg in messages:
-        print(f"[{msg.created_at}] {msg.session_id[:10]}... ({msg.role}): {msg.content[:100]}")
+messages = ChatMessage.objects.prefetch_related('user').order_by('-id')[:50]
+if messages:
+    for msg in reversed(messages):
+        username = msg.user.username if msg.user else '-'
+        print(f"[{msg.created_at}] {username} #{msg.seq} ({msg.role}): {msg.raw_content[:100]}")
         print()
 else:
     print("No messages found in database")
 
+# Totals and per-user counts come from the analytics rollups
+result = update_chat_rollups()
+stats = chat_stats(days=366, top_users=20)
 print("=" * 60)
-print(f"Total messages: {messages.count()}")
+print(f"Total messages (last year): {stats['totals']['messages']}  (+{result['processed']} folded now)")
 print("=" * 60)
 
-# Test grouping by session
-from django.db.models import Count
-sessions = ChatMessage.objects.values('session_id').annotate(count=Count('id')).order_by('-count')
-print("\nMessages per session:")
-for session in sessions:
-    print(f"  Session {session['session_id'][:10]}...: {session['count']} messages")
+print("\nMessages per user:")
+for user in stats["top_users"]:
+    print(f"  {user['username']}: {user['messages']} messages")